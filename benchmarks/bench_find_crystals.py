@@ -0,0 +1,85 @@
+"""Benchmark `find_crystals` with the available segmentation modes.
+
+Runs on the given (serialED) images, or on synthetic images of randomly
+placed crystals if none are given. The crystal positions are compared
+against the reference 'bf' mode.
+
+Usage:
+    python benchmarks/bench_find_crystals.py [images ...] [--spread 2.0]
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+import warnings
+
+import numpy as np
+
+from instamatic.config import calibration
+from instamatic.formats import read_image
+from instamatic.processing.find_crystals import find_crystals
+
+MODES = ('bf', 'cg_j', 'watershed')
+
+
+def make_image(seed: int, n_crystals: int = 25, shape: tuple = (516, 516)) -> np.ndarray:
+    """Bright background with dark elliptical crystals and gaussian noise."""
+    rng = np.random.default_rng(seed)
+    img = np.full(shape, 200.0)
+    yy, xx = np.indices(shape)
+    for _ in range(n_crystals):
+        cy, cx = rng.integers(40, min(shape) - 40, 2)
+        a, b = rng.integers(6, 40, 2)
+        theta = rng.random() * np.pi
+        u = (yy - cy) * np.cos(theta) + (xx - cx) * np.sin(theta)
+        v = -(yy - cy) * np.sin(theta) + (xx - cx) * np.cos(theta)
+        img[(u / a) ** 2 + (v / b) ** 2 < 1] = 60
+    return img + rng.normal(0, 10, shape)
+
+
+def mean_distance(crystals, reference) -> float:
+    """Mean distance from every reference crystal to the nearest crystal."""
+    if not crystals or not reference:
+        return np.nan
+    a = np.array([(c.x, c.y) for c in crystals])
+    b = np.array([(c.x, c.y) for c in reference])
+    return np.linalg.norm(b[:, None] - a[None], axis=-1).min(axis=1).mean()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('images', nargs='*', help='Images to run on (synthetic if empty)')
+    parser.add_argument('--spread', type=float, default=2.0, help='Crystal spread (um)')
+    parser.add_argument('--mag', type=int, default=None, help='Magnification (mag1)')
+    options = parser.parse_args()
+
+    if options.images:
+        images = [read_image(fn)[0] for fn in options.images]
+    else:
+        images = [make_image(seed) for seed in range(10)]
+
+    mag = options.mag or next(iter(calibration['mag1']['pixelsize']))
+
+    warnings.simplefilter('ignore')
+
+    results = {}
+    for mode in MODES:
+        t0 = time.perf_counter()
+        results[mode] = [
+            find_crystals(img, mag, spread=options.spread, mode=mode) for img in images
+        ]
+        dt = (time.perf_counter() - t0) / len(images)
+
+        n_crystals = sum(len(crystals) for crystals in results[mode])
+        distance = np.nanmean(
+            [mean_distance(a, b) for a, b in zip(results[mode], results['bf'])]
+        )
+        print(
+            f'{mode:>10s}: {dt * 1000:7.1f} ms/image, {n_crystals:4d} crystals, '
+            f'mean distance to bf: {distance:.2f} px'
+        )
+
+
+if __name__ == '__main__':
+    main()
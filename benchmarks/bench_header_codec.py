@@ -0,0 +1,81 @@
+"""Benchmark writing and reading 1000 TIFF image headers with the available
+header codecs.
+
+Usage:
+    python benchmarks/bench_header_codec.py
+"""
+
+from __future__ import annotations
+
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import yaml
+
+from instamatic.formats import read_tiff, write_tiff
+from instamatic.microscope.components.deflectors import DeflectorTuple
+from instamatic.microscope.components.stage import StagePositionTuple
+
+N = 1000
+
+
+def make_header(i: int) -> dict:
+    return {
+        'BeamShift': DeflectorTuple(x=1234 + i, y=-4321),
+        'BeamTilt': DeflectorTuple(x=0, y=0),
+        'DiffShift': DeflectorTuple(x=32768, y=32768),
+        'ImageShift1': DeflectorTuple(x=0, y=0),
+        'ImageShift2': DeflectorTuple(x=0, y=0),
+        'StagePosition': StagePositionTuple(x=1.0e4, y=-2.0e4, z=0, a=0.1 * i, b=0),
+        'Magnification': 2500,
+        'FunctionMode': 'mag1',
+        'Brightness': 40000,
+        'DiffFocus': 30000,
+        'SpotSize': 3,
+        'ImageExposureTime': 0.5,
+        'ImageBinsize': 1,
+        'ImageResolution': (512, 512),
+        'ImageGetTime': time.time(),
+        'ImageComment': f'frame {i}',
+        'ImageCameraName': 'simulate',
+        'ImageCameraDimensions': (512, 512),
+    }
+
+
+def legacy_write(fname, data, header):
+    write_tiff(fname, data, header=yaml.dump(header))
+
+
+def main():
+    data = np.zeros((16, 16), dtype=np.uint16)
+    headers = [make_header(i) for i in range(N)]
+
+    with tempfile.TemporaryDirectory() as drc:
+        drc = Path(drc)
+
+        cases = {
+            'yaml (legacy)': legacy_write,
+            'yaml': lambda fn, d, h: write_tiff(fn, d, h, codec='yaml'),
+            'json': lambda fn, d, h: write_tiff(fn, d, h, codec='json'),
+        }
+
+        print(f'{N} headers, LibYAML available: {yaml.__with_libyaml__}')
+        print(f'{"codec":16s} {"write (s)":>10s} {"read (s)":>10s}')
+        for name, write in cases.items():
+            fns = [drc / f'{name[:4]}_{i:04d}.tiff' for i in range(N)]
+
+            t0 = time.perf_counter()
+            for fn, header in zip(fns, headers):
+                write(fn, data, header)
+            t1 = time.perf_counter()
+            for fn in fns:
+                read_tiff(fn)
+            t2 = time.perf_counter()
+
+            print(f'{name:16s} {t1 - t0:10.3f} {t2 - t1:10.3f}')
+
+
+if __name__ == '__main__':
+    main()
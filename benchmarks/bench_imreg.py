@@ -0,0 +1,73 @@
+"""Benchmark registering a stack of images against a single reference with
+`imreg.translation` (before and after `Registrator`), `Registrator` and
+`skimage`'s `phase_cross_correlation`.
+
+Usage:
+    python benchmarks/bench_imreg.py
+"""
+
+from __future__ import annotations
+
+import time
+
+import numpy as np
+from scipy import ndimage
+from skimage.registration import phase_cross_correlation
+
+from instamatic.imreg import Registrator, translation
+
+N = 50
+SHAPE = (512, 512)
+
+
+def make_stack(seed: int = 0) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Smooth random reference and copies shifted by random integer shifts."""
+    rng = np.random.default_rng(seed)
+    reference = ndimage.gaussian_filter(rng.random(SHAPE), 3) * 1000
+    shifts = rng.integers(-20, 20, (N, 2))
+    stack = np.array([np.roll(reference, shift, axis=(0, 1)) for shift in shifts])
+    stack = stack + rng.normal(0, 1, stack.shape)
+    return reference.astype(np.uint16), stack.astype(np.uint16), -shifts
+
+
+def legacy_translation(im0: np.ndarray, im1: np.ndarray) -> list:
+    """`imreg.translation` before `Registrator`, full complex FFTs with numpy."""
+    f0 = np.fft.fft2(im0)
+    f1 = np.fft.fft2(im1)
+    ir = abs(np.fft.ifft2((f0 * f1.conjugate()) / (abs(f0) * abs(f1))))
+    t0, t1 = np.unravel_index(np.argmax(ir), ir.shape)
+    return [
+        t0 - ir.shape[0] if t0 > ir.shape[0] // 2 else t0,
+        t1 - ir.shape[1] if t1 > ir.shape[1] // 2 else t1,
+    ]
+
+
+def main():
+    reference, stack, shifts = make_stack()
+
+    cases = {
+        'translation (legacy)': lambda: [legacy_translation(reference, img) for img in stack],
+        'translation': lambda: [translation(reference, img) for img in stack],
+        'Registrator.register': lambda: [reg.register(img) for img in stack],
+        'Registrator.register_stack': lambda: reg.register_stack(stack),
+        'skimage, upsample 10': lambda: [
+            phase_cross_correlation(reference, img, upsample_factor=10)[0] for img in stack
+        ],
+        'Registrator, upsample 10': lambda: reg10.register_stack(stack),
+    }
+
+    reg = Registrator(reference)
+    reg10 = Registrator(reference, upsample_factor=10)
+
+    print(f'{N} images of {SHAPE[0]}x{SHAPE[1]} against one reference')
+    print(f'{"method":28s} {"time (s)":>10s} {"ms/image":>10s} {"correct":>8s}')
+    for name, func in cases.items():
+        t0 = time.perf_counter()
+        result = np.array(func(), dtype=float)
+        t1 = time.perf_counter()
+        correct = np.sum(np.all(np.abs(result - shifts) < 0.5, axis=1))
+        print(f'{name:28s} {t1 - t0:10.3f} {1000 * (t1 - t0) / N:10.1f} {correct:>5d}/{N}')
+
+
+if __name__ == '__main__':
+    main()
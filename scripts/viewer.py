@@ -1,10 +1,27 @@
 from __future__ import annotations
 
-import sys
-
 import matplotlib.pyplot as plt
+from matplotlib.widgets import Slider
+
+from instamatic.formats import open_stack
+
+
+def print_info(fn, img, h):
+    print(f"""Loading data: {fn}
+        size: {img.nbytes / 1024} kB
+       shape: {img.shape}
+       range: {img.min()}-{img.max()}
+       dtype: {img.dtype}
+""")
+
+    if not h:
+        return
+
+    max_len = max(len(s) for s in h.keys())
 
-from instamatic.formats import read_image
+    fmt = f'{{:{max_len}s}} = {{}}'
+    for key in sorted(h.keys()):
+        print(fmt.format(key, h[key]))
 
 
 def main():
@@ -12,6 +29,8 @@ def main():
 
     description = """
 Simple image viewer to open any image collected collected using instamatic. Supported formats include `TIFF`, `MRC`, [`HDF5`](http://www.h5py.org/), and [`SMV`](https://strucbio.biologie.uni-konstanz.de/ccp4wiki/index.php/SMV_file_format).
+
+Multiple images (a list of files, a directory, or a stack of images in a MRC/HDF5 file) can be browsed using the slider or the left/right arrow keys. Images are loaded lazily, with the neighbouring images preloaded in the background.
 """
 
     parser = argparse.ArgumentParser(
@@ -21,34 +40,55 @@ Simple image viewer to open any image collected collected using instamatic. Supp
     parser.add_argument(
         'args',
         type=str,
-        nargs=1,
+        nargs='+',
         metavar='IMG',
-        help='Image to display (TIFF, HDF5, MRC, SMV).',
+        help='Image(s) to display (TIFF, HDF5, MRC, SMV), or a directory.',
+    )
+
+    parser.add_argument(
+        '-c',
+        '--cache',
+        type=float,
+        default=512,
+        dest='cache_size',
+        help='Size of the image cache in MB (default: %(default)s)',
     )
 
     options = parser.parse_args()
     args = options.args
 
-    fn = args[0]
+    fn = args[0] if len(args) == 1 else args
+    stack = open_stack(fn, cache_size=options.cache_size)
 
-    img, h = read_image(fn)
+    img = stack[0]
+    print_info(args[0], img, stack.header(0))
 
-    print(f"""Loading data: {fn}
-        size: {img.nbytes / 1024} kB
-       shape: {img.shape}
-       range: {img.min()}-{img.max()}
-       dtype: {img.dtype}
-""")
+    fig, ax = plt.subplots()
+    im = ax.imshow(img, cmap='gray')
+    ax.set_title(args[0])
 
-    max_len = max(len(s) for s in h.keys())
+    if len(stack) > 1:
+        fig.subplots_adjust(bottom=0.15)
+        slider_ax = fig.add_axes([0.15, 0.03, 0.7, 0.03])
+        slider = Slider(slider_ax, 'Frame', 0, len(stack) - 1, valinit=0, valstep=1)
 
-    fmt = f'{{:{max_len}s}} = {{}}'
-    for key in sorted(h.keys()):
-        print(fmt.format(key, h[key]))
+        def update(val):
+            i = int(val)
+            im.set_data(stack[i])
+            title = stack.fns[i] if hasattr(stack, 'fns') else f'{args[0]} [{i}]'
+            ax.set_title(title)
+            fig.canvas.draw_idle()
+
+        def on_key(event):
+            step = {'right': 1, 'left': -1, 'pageup': 10, 'pagedown': -10}.get(event.key)
+            if step:
+                slider.set_val(min(max(slider.val + step, 0), len(stack) - 1))
+
+        slider.on_changed(update)
+        fig.canvas.mpl_connect('key_press_event', on_key)
 
-    plt.imshow(img, cmap='gray')
-    plt.title(fn)
     plt.show()
+    stack.close()
 
 
 if __name__ == '__main__':
@@ -111,8 +111,10 @@ class AcquireAtItems:
                 # print(f" >> {interval}: {func.__name__}")
                 func(ctrl)
 
-    def move_to_item(self, item):
-        """Move the stage to the stage coordinates given by the NavItem."""
+    @staticmethod
+    def item_coordinates(item) -> tuple:
+        """Return the stage coordinates (x, y, z) in nm given by the NavItem,
+        z is None if not given."""
         try:
             x = item.stage_x * 1000  # um -> nm
             y = item.stage_y * 1000  # um -> nm
@@ -127,6 +129,11 @@ class AcquireAtItems:
                 raise IndexError(
                     f'Coordinate must have 2 (x, y) or 3 (x, y, z) elements: {item}'
                 )
+        return x, y, z
+
+    def move_to_item(self, item):
+        """Move the stage to the stage coordinates given by the NavItem."""
+        x, y, z = self.item_coordinates(item)
 
         if z is not None:
             self.ctrl.stage.set(z=z)
@@ -138,6 +145,35 @@ class AcquireAtItems:
 
         set_xy(x=x, y=y)
 
+    def estimate_move_times(self, start_index: int = 0, motion_model=None) -> np.ndarray:
+        """Estimate the time in seconds needed to move the stage to each of
+        the items, starting from the current stage position. Use `np.cumsum`
+        to get the expected arrival times.
+
+        Parameters
+        ----------
+        start_index : int
+            Start from this item.
+        motion_model : StageMotionModel
+            Defaults to the model from the stage motion calibrations.
+
+        Returns
+        -------
+        times : np.ndarray
+            Time per move, nan if the stage motion is not calibrated.
+        """
+        if motion_model is None:
+            from instamatic.calibrate.stage_motion_model import StageMotionModel
+
+            motion_model = StageMotionModel.from_file()
+
+        targets = [self.item_coordinates(item) for item in self.nav_items[start_index:]]
+        # see `set_xy_with_backlash_correction`
+        backlash_step = 10000 if self.backlash else None
+        return motion_model.path_times(
+            self.ctrl.stage.get(), targets, backlash_step=backlash_step
+        )
+
     def start(self, start_index: int = 0):
         """Start serial acquisition protocol.
 
@@ -155,6 +191,9 @@ class AcquireAtItems:
         ntot = len(nav_items)
 
         print(f'\nAcquiring on {ntot} items.')
+        stage_time = np.sum(self.estimate_move_times(start_index))
+        if np.isfinite(stage_time):
+            print(f'Estimated stage motion time: {stage_time:.0f} s')
         print('Press <Ctrl-C> or ⬛ to interrupt.\n')
 
         self.move_to_item(nav_items[0])  # pre-move
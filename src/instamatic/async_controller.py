@@ -0,0 +1,225 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Optional, Tuple
+
+import numpy as np
+
+from instamatic._typing import float_deg, int_nm
+from instamatic.controller import TEMController, requires_cam_attr
+from instamatic.image_utils import rotate_image
+
+
+class AsyncComponent:
+    """Awaitable proxy for a `TEMController` component (deflector, lens,
+    state).
+
+    Every public method of the wrapped component is exposed as a
+    coroutine that is executed on the TEM executor of the parent
+    `AsyncTEMController`. Properties are not proxied, use `await
+    component.get()` / `await component.set(...)` instead.
+    """
+
+    def __init__(self, component: Any, actrl: 'AsyncTEMController'):
+        super().__init__()
+        self._component = component
+        self._actrl = actrl
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({self._component.name})'
+
+    def __getattr__(self, attr_name: str) -> Callable:
+        if attr_name.startswith('_'):
+            raise AttributeError(attr_name)
+
+        if isinstance(getattr(type(self._component), attr_name, None), property):
+            raise AttributeError(
+                f'`{attr_name}` is a property, use `await {self._component.name}.get()` '
+                'or `await ....set()` instead'
+            )
+
+        method = getattr(self._component, attr_name)
+        if not callable(method):
+            raise AttributeError(f'`{attr_name}` is not callable')
+
+        async def wrapper(*args, **kwargs):
+            return await self._actrl.run_tem(method, *args, **kwargs)
+
+        wrapper.__name__ = attr_name
+        wrapper.__doc__ = method.__doc__
+        return wrapper
+
+
+class AsyncStage(AsyncComponent):
+    """Awaitable stage control.
+
+    Stage moves are issued with `wait=False` and completion is awaited
+    by polling `is_moving`, so the TEM executor stays available for
+    other (optics) calls while the stage is moving.
+    """
+
+    async def set(
+        self,
+        x: Optional[int_nm] = None,
+        y: Optional[int_nm] = None,
+        z: Optional[int_nm] = None,
+        a: Optional[float_deg] = None,
+        b: Optional[float_deg] = None,
+        wait: bool = True,
+    ) -> None:
+        """Move the stage, if `wait`, return once the stage has stopped."""
+        await self._actrl.run_tem(self._component.set, x=x, y=y, z=z, a=a, b=b, wait=False)
+        if wait:
+            await self.wait()
+
+    async def wait(self) -> None:
+        """Wait for stage movement to finish without blocking the event
+        loop."""
+        while await self._actrl.run_tem(self._component.is_moving):
+            await asyncio.sleep(self._actrl.poll_interval)
+
+
+class AsyncTEMController:
+    """Asynchronous (`asyncio`) facade around a `TEMController`.
+
+    Microscope calls run on a single TEM executor thread, so the
+    microscope interface (or the socket of the tem server client) is
+    never used from two threads at once. Camera exposures run on a
+    separate camera executor, so they can overlap with stage and optics
+    calls. Stage moves do not occupy the TEM executor while the stage is
+    moving (see `AsyncStage`).
+
+    Usage:
+        actrl = AsyncTEMController(ctrl)
+
+        async def main():
+            await asyncio.gather(
+                actrl.stage.set(a=20),
+                actrl.beamshift.set(x=100, y=200),
+                actrl.get_image(exposure=0.1),
+            )
+
+        asyncio.run(main())
+    """
+
+    def __init__(self, ctrl: TEMController, poll_interval: float = 0.05):
+        super().__init__()
+        self.ctrl = ctrl
+        self.cam = ctrl.cam
+        self.poll_interval = poll_interval
+
+        self._tem_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='tem')
+        self._cam_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='cam')
+
+        self.gunshift = AsyncComponent(ctrl.gunshift, self)
+        self.guntilt = AsyncComponent(ctrl.guntilt, self)
+        self.beamshift = AsyncComponent(ctrl.beamshift, self)
+        self.beamtilt = AsyncComponent(ctrl.beamtilt, self)
+        self.imageshift1 = AsyncComponent(ctrl.imageshift1, self)
+        self.imageshift2 = AsyncComponent(ctrl.imageshift2, self)
+        self.diffshift = AsyncComponent(ctrl.diffshift, self)
+        self.stage = AsyncStage(ctrl.stage, self)
+        self.magnification = AsyncComponent(ctrl.magnification, self)
+        self.brightness = AsyncComponent(ctrl.brightness, self)
+        self.difffocus = AsyncComponent(ctrl.difffocus, self)
+        self.beam = AsyncComponent(ctrl.beam, self)
+        self.screen = AsyncComponent(ctrl.screen, self)
+        self.mode = AsyncComponent(ctrl.mode, self)
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({self.ctrl.tem.name})'
+
+    async def __aenter__(self) -> 'AsyncTEMController':
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        self.close()
+
+    async def run_tem(self, func: Callable, *args, **kwargs) -> Any:
+        """Run `func(*args, **kwargs)` on the TEM executor."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._tem_executor, partial(func, *args, **kwargs))
+
+    async def run_cam(self, func: Callable, *args, **kwargs) -> Any:
+        """Run `func(*args, **kwargs)` on the camera executor."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._cam_executor, partial(func, *args, **kwargs))
+
+    async def to_dict(self, *keys) -> dict:
+        """Awaitable version of `TEMController.to_dict`."""
+        return await self.run_tem(self.ctrl.to_dict, *keys)
+
+    async def from_dict(self, dct: dict) -> None:
+        """Awaitable version of `TEMController.from_dict`."""
+        await self.run_tem(self.ctrl.from_dict, dct)
+
+    @requires_cam_attr
+    async def get_raw_image(self, exposure: float = None, binsize: int = None) -> np.ndarray:
+        """Awaitable version of `TEMController.get_raw_image`."""
+        return await self.run_cam(self.cam.get_image, exposure=exposure, binsize=binsize)
+
+    @requires_cam_attr
+    async def get_image(
+        self,
+        exposure: float = None,
+        binsize: int = None,
+        comment: str = '',
+        header_keys: Tuple[str] = ('all',),
+    ) -> Tuple[np.ndarray, dict]:
+        """Awaitable version of `TEMController.get_image`. The header is
+        collected on the TEM executor while the camera is exposing.
+
+        Returns
+        -------
+        image: np.ndarray, headerfile: dict
+            Tuple of the image as numpy array and dictionary with all the tem parameters and image attributes
+        """
+        ctrl = self.ctrl
+
+        if not binsize:
+            binsize = self.cam.default_binsize
+        if not exposure:
+            exposure = self.cam.default_exposure
+
+        was_blanked = ctrl.autoblank and await self.run_tem(lambda: ctrl.beam.is_blanked)
+        if was_blanked:
+            await self.run_tem(ctrl.beam.unblank)
+
+        try:
+            t0 = time.perf_counter()
+            image = self.get_raw_image(exposure=exposure, binsize=binsize)
+            header = self.run_tem(
+                lambda: (
+                    ctrl.to_dict(*header_keys) if header_keys else {},
+                    ctrl.mode.get(),
+                    ctrl.magnification.value,
+                )
+            )
+            arr, (h, mode, mag) = await asyncio.gather(image, header)
+            t1 = time.perf_counter()
+        finally:
+            if was_blanked:
+                await self.run_tem(ctrl.beam.blank)
+
+        arr = rotate_image(arr, mode=mode, mag=mag)
+
+        h['ImageGetTimeStart'] = t0
+        h['ImageGetTimeEnd'] = t1
+        h['ImageGetTime'] = time.time()
+        h['ImageExposureTime'] = exposure
+        h['ImageBinsize'] = binsize
+        h['ImageResolution'] = arr.shape
+        h['ImageComment'] = comment
+        h['ImageCameraName'] = self.cam.name
+        h['ImageCameraDimensions'] = self.cam.get_camera_dimensions()
+
+        return arr, h
+
+    def close(self) -> None:
+        """Shut down the executors, the wrapped `TEMController` stays
+        open."""
+        self._tem_executor.shutdown(wait=True)
+        self._cam_executor.shutdown(wait=True)
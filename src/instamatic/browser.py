@@ -4,11 +4,11 @@ import os
 import time
 
 import matplotlib.pyplot as plt
-import mrcfile
 import numpy as np
 from pyserialem import read_nav_file
 
-from instamatic.formats import read_tiff
+from instamatic.formats.stack import FileSeries, MrcStack
+from instamatic.pyramid import PyramidView
 
 
 class Browser:
@@ -17,17 +17,20 @@ class Browser:
     def __init__(self, montage):
         super().__init__()
         self.montage = montage
-        self.mmap = None
+        self.images = None
+        self.data = None
         self.imagecoords = montage.feature_coords_image
         self.stagecoords = montage.feature_coords_stage
-        self.stitched = montage.stitched
+        self.stitched = getattr(montage, 'stitched', None)
+        self.pyramid = getattr(montage, 'pyramid', None)
 
     def set_images(self, mmm: str = 'mmm.mrc'):
         """Set the path to the image data (medium mag).
 
-        Must be mrc format and contain multiple pages.
+        Must be mrc format and contain multiple pages, which are loaded
+        on demand.
         """
-        self.mmap = mrcfile.mmap(mmm)
+        self.images = MrcStack(mmm)
 
     def set_nav_file(self, nav: str = 'output.nav'):
         """Set the `.nav` file to load the stage/image coordinates from."""
@@ -35,6 +38,7 @@ class Browser:
         self.map_items = [item for item in nav_items if item.kind == 'Map']
         self.stagecoords = np.array([mi.stage_xy for mi in self.map_items]) * 1000
         self.imagecoords = self.montage.stage_to_pixelcoords(self.stagecoords)
+        self.data = None
 
     def set_data_location(self, s: str = 'data/diff_{label}.tiff'):
         """Set the data location.
@@ -43,6 +47,7 @@ class Browser:
         label gets filled in by the tag defined in the .nav file.
         """
         self.data_fmt = s
+        self.data = None
 
     def start(self, ctrl, cmap: str = 'gray', vmax=5000, levels: int = 3):
         """Display the browser panel.
@@ -89,12 +94,20 @@ class Browser:
 
     def setup_l1(self, cmap='gray', vmax=5000):
         """Setup the left global map panel."""
-        # FIXME: How to transform the coordinates instead?
-        self.stitched = np.flipud(np.rot90(self.stitched))
         self.blank = np.arange(100).reshape(10, 10)
 
         px1_x, px1_y = self.imagecoords.T
-        self.im1 = self.ax1.imshow(self.stitched, vmax=vmax, cmap=cmap)
+        if self.pyramid is not None:
+            # only the visible part of the map is loaded at screen resolution
+            binning = getattr(self.montage, 'stitched_binning', 1)
+            self.view1 = PyramidView(
+                self.pyramid, self.ax1, binning=binning, transpose=True, vmax=vmax, cmap=cmap
+            )
+            self.im1 = self.view1.im
+        else:
+            # FIXME: How to transform the coordinates instead?
+            self.stitched = np.flipud(np.rot90(self.stitched))
+            self.im1 = self.ax1.imshow(self.stitched, vmax=vmax, cmap=cmap)
         # FIXME: Where does the 512 come from?
         self.data1 = self.ax1.scatter(px1_x, px1_y + 512, marker='+', color='r', picker=8)
         self.ax1.set_title('Global map')
@@ -102,7 +115,7 @@ class Browser:
 
     def setup_l2(self, cmap='gray', vmax=5000):
         """Setup the middle medium mag panel."""
-        self.im2 = self.ax2.imshow(self.mmap.data[0], vmax=vmax, cmap=cmap)
+        self.im2 = self.ax2.imshow(self.images[0], vmax=vmax, cmap=cmap)
         self.data2 = self.ax2.scatter([], [], marker='+', color='red', picker=8, lw=1.0)
         self.ax2.set_title('Medium image')
         self.ax2.axis('off')
@@ -155,7 +168,7 @@ class Browser:
     def update_ax2(self, ind: int = 0):
         ind = self.gm_ind
 
-        img = self.mmap.data[ind]
+        img = self.images[ind]
         # FIXME: Why is the flip needed here?
         img = np.flipud(img)
         self.im2.set_data(img)
@@ -170,14 +183,24 @@ class Browser:
         self.data2.set_color(colors_rgba)
         self.ax2.set_title(self.map_item.tag)
 
+    def get_data(self) -> FileSeries:
+        """Return the data of all markers as a lazily loaded stack, so that
+        the data of the neighbouring markers are preloaded."""
+        if self.data is None:
+            labels = [label for item in self.map_items for label in item.markers]
+            self.data_index = {label: i for i, label in enumerate(labels)}
+            self.data = FileSeries([self.data_fmt.format(label=label) for label in labels])
+        return self.data
+
     def update_ax3(self, ind: int = 0):
         ind = self.mmm_ind
         label = self.marker_labels[ind]
 
-        data_fn = self.data_fmt.format(label=label)
+        data = self.get_data()
+        data_fn = data.fns[self.data_index[label]]
 
         if os.path.exists(data_fn):
-            img = read_tiff(data_fn)[0]
+            img = data[self.data_index[label]]
             self.im3.set_data(img)
             self.ax3.set_title(label)
         else:
@@ -7,5 +7,6 @@ from .calibrate_movie_delays import CalibMovieDelays
 from .calibrate_stage_lowmag import CalibStage
 from .calibrate_stage_rotation import CalibStageRotation
 from .calibrate_stage_translation import CalibStageTranslation
+from .stage_motion_model import StageMotionModel
 
 # from .calibrate_stage_mag1 import CalibStageMag1
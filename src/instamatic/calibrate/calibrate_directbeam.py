@@ -7,6 +7,7 @@ import sys
 
 import matplotlib.pyplot as plt
 import numpy as np
+from scipy import ndimage
 from skimage.registration import phase_cross_correlation
 from typing_extensions import Self
 
@@ -26,9 +27,44 @@ refine_params = {
 }
 
 
-def optimize_diffraction_focus(ctrl, steps=(50, 15, 5)):
+# Last optimized diffraction focus per camera length, used as starting point
+_difffocus_warm_start = {}
+
+
+class _ExposureLimitReached(Exception):
+    """Ends `search_diffraction_focus` when `max_exposures` are taken."""
+
+
+def beam_halfwidth_score(img: np.ndarray) -> int:
+    """Number of pixels above half of the maximum intensity, which is
+    minimal when the primary beam is in focus."""
+    return int(np.sum(img > img.max() / 2))
+
+
+def beam_area_score(img: np.ndarray) -> float:
+    """Effective area of the primary beam (integrated intensity over peak
+    intensity, above the median background). Unlike
+    `beam_halfwidth_score`, this changes continuously with the focus."""
+    background = np.median(img)
+    peak = img.max() - background
+    if peak <= 0:
+        return np.inf
+    return float(np.sum(np.clip(img - background, 0, None)) / peak)
+
+
+def optimize_diffraction_focus(ctrl, steps=(50, 15, 5), method='grid', **kwargs):
     """Function to optimize the diffraction focus live on the microscope It
-    does so by minimizing the halfwidth of the primary beam."""
+    does so by minimizing the halfwidth of the primary beam.
+
+    method: 'grid' scans 11 values around the current focus for each of
+        the `steps` (33 exposures). 'search' uses a bracketing parabolic /
+        golden-section search on a crop around the primary beam (< 10 exposures),
+        see `search_diffraction_focus` for the keyword arguments.
+    """
+    if method == 'search':
+        return search_diffraction_focus(ctrl, step=steps[0], tolerance=steps[-1], **kwargs)
+    elif method != 'grid':
+        raise ValueError(f"Unknown method: {method!r}, must be 'grid' or 'search'")
 
     for step in steps:
         current = ctrl.difffocus.value
@@ -41,7 +77,7 @@ def optimize_diffraction_focus(ctrl, steps=(50, 15, 5)):
 
             img, h = ctrl.get_image(header_keys=None)
 
-            score = np.sum(img > img.max() / 2) ** 2
+            score = beam_halfwidth_score(img) ** 2
 
             if score < best_score:
                 best_score = score
@@ -49,11 +85,132 @@ def optimize_diffraction_focus(ctrl, steps=(50, 15, 5)):
 
         newval = current + best_delta
         ctrl.difffocus.set(newval)
-        logger.info('Best diff_focus (step=%d): %d, score: %d', step, best_score, newval)
+        logger.info('Best diff_focus (step=%d): %d, score: %d', step, newval, best_score)
 
     return newval
 
 
+def search_diffraction_focus(
+    ctrl,
+    start: int = None,
+    step: int = 50,
+    tolerance: int = 5,
+    crop: int = 64,
+    max_exposures: int = 9,
+    warm_start: bool = True,
+) -> int:
+    """Optimize the diffraction focus by minimizing the halfwidth of the
+    primary beam with as few exposures as possible.
+
+    The minimum is bracketed around the starting value, and then refined
+    with successive parabolic interpolation, falling back to golden-section
+    steps if the parabola is not usable. Only a region of `crop` pixels
+    around the primary beam (located in the first exposure) is scored
+    with `beam_area_score`.
+
+    Parameters
+    ----------
+    ctrl : TEMController
+    start : int, optional
+        Starting value for the diffraction focus. By default the last optimum for
+        the current camera length is used (if `warm_start`), or the current value.
+    step : int
+        Initial step size for bracketing the minimum
+    tolerance : int
+        Stop when the minimum is bracketed within this distance
+    crop : int
+        Half-width in pixels of the region around the beam to score
+    max_exposures : int
+        Maximum number of images to take
+    warm_start : bool
+        Start from the last optimum for the current camera length
+
+    Returns
+    -------
+    int
+        Optimized diffraction focus, which is also set on the microscope
+    """
+    camera_length = ctrl.magnification.value
+    if start is None:
+        start = ctrl.difffocus.value
+        if warm_start:
+            start = _difffocus_warm_start.get(camera_length, start)
+
+    scores = {}
+    box = None
+
+    def score(value: float) -> int:
+        nonlocal box
+        value = int(round(value))
+        if value not in scores:
+            if len(scores) >= max_exposures:
+                raise _ExposureLimitReached
+            ctrl.difffocus.set(value)
+            img, _ = ctrl.get_image(header_keys=None)
+            if box is None:
+                cx, cy = np.unravel_index(np.argmax(ndimage.uniform_filter(img, 5)), img.shape)
+                box = (
+                    slice(max(cx - crop, 0), cx + crop + 1),
+                    slice(max(cy - crop, 0), cy + crop + 1),
+                )
+            scores[value] = beam_area_score(img[box])
+        return scores[value]
+
+    golden = 0.381966
+    a, b, c = start - step, start, start + step
+
+    try:
+        fb = score(b)
+        fa, fc = score(a), score(c)
+
+        # bracket the minimum: f(b) <= f(a), f(c)
+        while fa < fb or fc < fb:
+            if fa < fc:
+                a, b, c = a - int(1.618 * (b - a)), a, b
+                fa, fb, fc = score(a), fa, fb
+            else:
+                a, b, c = b, c, c + int(1.618 * (c - b))
+                fa, fb, fc = fb, fc, score(c)
+
+        while c - a > 2 * tolerance:
+            # vertex of the parabola through a, b, c
+            p = (b - a) * (fb - fc)
+            q = (b - c) * (fb - fa)
+            denom = 2 * (p - q)
+            u = b - ((b - a) * p - (b - c) * q) / denom if denom != 0 else None
+
+            if u is None or not (a < u < c) or abs(u - b) < tolerance:
+                # golden-section step into the larger interval
+                u = b + golden * (c - b) if (c - b) > (b - a) else b - golden * (b - a)
+            u = int(round(u))
+            if u == b:
+                u = b + tolerance if (c - b) > (b - a) else b - tolerance
+
+            fu = score(u)
+            if fu < fb:
+                if u > b:
+                    a, fa = b, fb
+                else:
+                    c, fc = b, fb
+                b, fb = u, fu
+            elif u > b:
+                c, fc = u, fu
+            else:
+                a, fa = u, fu
+    except _ExposureLimitReached:
+        pass
+
+    best = min(scores, key=lambda value: (scores[value], abs(value - start)))
+    ctrl.difffocus.set(best)
+    _difffocus_warm_start[camera_length] = best
+
+    logger.info(
+        'Best diff_focus: %d, score: %.1f (%d exposures)', best, scores[best], len(scores)
+    )
+
+    return best
+
+
 class CalibDirectBeam:
     """Calibration routine for the position of the direct beam in diffraction
     space."""
@@ -338,7 +495,7 @@ Calibrate direct beam position
             if auto_diff_focus:
                 print('Optimizing diffraction focus')
                 current_difffocus = ctrl.difffocus.value
-                difffocus = optimize_diffraction_focus(ctrl)
+                difffocus = optimize_diffraction_focus(ctrl, method='search')
                 logger.info(
                     'Optimized diffraction focus from %s to %s', current_difffocus, difffocus
                 )
@@ -1,7 +1,10 @@
 from __future__ import annotations
 
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from pathlib import Path
-from typing import Any, Iterable, Literal, Optional
+from typing import Any, Iterable, Literal, Optional, Sequence
 
 import matplotlib.pyplot as plt
 import numpy as np
@@ -17,6 +20,8 @@ from instamatic.io import get_new_work_subdirectory
 from instamatic.microscope.utils import StagePositionTuple
 from instamatic.utils.iterating import pairwise
 
+logger = logging.getLogger(__name__)
+
 np.set_printoptions(suppress=True)
 
 Mode = Literal['mag1', 'mag2', 'lowmag', 'samag']
@@ -55,16 +60,120 @@ def get_outlier_filter(data: list[np.ndarray], threshold: float = 2.0) -> np.nda
     return sel
 
 
-def cross_correlate_image_pair(img0: np.ndarray, img1: np.ndarray) -> np.ndarray:
-    """Cross correlate a pair of images and return translation between them."""
-    s, e, p = phase_cross_correlation(img0, img1, upsample_factor=10)
+def cross_correlate_image_pair(
+    img0: np.ndarray,
+    img1: np.ndarray,
+    space: Literal['real', 'fourier'] = 'real',
+    verbose: bool = False,
+) -> np.ndarray:
+    """Cross correlate a pair of images and return translation between them.
+
+    With `space='fourier'`, `img0` and `img1` must be the FFTs of the
+    images (`np.fft.fftn`), so that they can be reused for several
+    pairs. The shift is logged, and also printed if `verbose`.
+    """
+    s, e, p = phase_cross_correlation(img0, img1, upsample_factor=10, space=space)
     if np.isclose(e, 1.0, atol=1e-3) and np.allclose(s, 0, atol=1e-3):
-        s, e, p = phase_cross_correlation(img0, img1, upsample_factor=10, normalization=None)
-    print(f'shift [{s[0]:+6.1f}, {s[1]:+6.1f}] error {e:5.3f} phasediff {p:+6.3f}')
+        s, e, p = phase_cross_correlation(
+            img0, img1, upsample_factor=10, space=space, normalization=None
+        )
+    msg = f'shift [{s[0]:+6.1f}, {s[1]:+6.1f}] error {e:5.3f} phasediff {p:+6.3f}'
+    logger.info(msg)
+    if verbose:
+        print(msg)
     return s
 
 
-def calibrate_stage_from_file(drc: AnyPath, plot: bool = False) -> np.ndarray:
+def _cross_correlate_consecutive(
+    images: Sequence[np.ndarray], verbose: bool = False
+) -> list[np.ndarray]:
+    """Register consecutive images, transforming each image only once."""
+    ffts = [np.fft.fftn(img) for img in images]
+    return [
+        cross_correlate_image_pair(f0, f1, space='fourier', verbose=verbose)
+        for f0, f1 in pairwise(ffts)
+    ]
+
+
+def _cross_correlate_chunk(
+    images: Sequence[np.ndarray], verbose: bool = False
+) -> tuple[list[np.ndarray], np.ndarray, np.ndarray]:
+    """Register consecutive images of a (non-empty) chunk, also returns the
+    FFTs of the first and last image to register the pairs across
+    chunks."""
+    ffts = [np.fft.fftn(img) for img in images]
+    translations = [
+        cross_correlate_image_pair(f0, f1, space='fourier', verbose=verbose)
+        for f0, f1 in pairwise(ffts)
+    ]
+    return translations, ffts[0], ffts[-1]
+
+
+def cross_correlate_image_series(
+    *series: Sequence[np.ndarray],
+    max_workers: Optional[int] = None,
+    verbose: bool = False,
+) -> list[list[np.ndarray]]:
+    """Cross correlate each pair of consecutive images in one or more image
+    series and return the translations between them.
+
+    The FFT of every image is calculated once and reused for both pairs
+    it is part of. With `max_workers`, the images are split into disjoint
+    contiguous chunks that are registered on a process pool, the pairs
+    across two chunks are registered from the FFTs returned by the workers.
+
+    Parameters
+    ----------
+    series: Sequence[np.ndarray]
+        One or more series of images.
+    max_workers: Optional[int]
+        Number of worker processes. By default (or with `max_workers=1`),
+        everything runs in the current process.
+    verbose: bool
+        Print the shift of every pair, they are always logged.
+
+    Returns
+    -------
+    translations: list[list[np.ndarray]]
+        For each series, the translation between each pair of consecutive images.
+    """
+    n_pairs = sum(max(len(images) - 1, 0) for images in series)
+    if not max_workers or max_workers <= 1 or n_pairs < 2:
+        return [_cross_correlate_consecutive(images, verbose=verbose) for images in series]
+
+    n_images = sum(len(images) for images in series)
+    chunk_size = -(-n_images // max_workers)  # ceil
+
+    # (series index, chunk of images), every image is in exactly one chunk
+    chunks: list[tuple[int, Sequence[np.ndarray]]] = []
+    for i, images in enumerate(series):
+        for start in range(0, len(images), chunk_size):
+            chunks.append((i, images[start : start + chunk_size]))
+
+    translations: list[list[np.ndarray]] = [[] for _ in series]
+    last_fft: dict[int, np.ndarray] = {}  # last image of the previous chunk of each series
+
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        chunk_func = partial(_cross_correlate_chunk, verbose=verbose)
+        results = pool.map(chunk_func, [chunk for _, chunk in chunks])
+        for (i, _), (result, first, last) in zip(chunks, results):
+            if i in last_fft:
+                pair = cross_correlate_image_pair(
+                    last_fft[i], first, space='fourier', verbose=verbose
+                )
+                translations[i].append(pair)
+            translations[i].extend(result)
+            last_fft[i] = last
+
+    return translations
+
+
+def calibrate_stage_from_file(
+    drc: AnyPath,
+    plot: bool = False,
+    max_workers: Optional[int] = None,
+    verbose: bool = False,
+) -> np.ndarray:
     """Calibrate the stage from the saved log/tiff files. This is essentially
     the same function as below, with the exception that it reads the `log.yaml`
     to recalculate the stage matrix.
@@ -75,6 +184,10 @@ def calibrate_stage_from_file(drc: AnyPath, plot: bool = False) -> np.ndarray:
         Directory containing the `log.yaml` and tiff files.
     plot : bool
         Plot the results of the fitting.
+    max_workers : Optional[int]
+        Number of processes used for image registration, by default in the current process.
+    verbose : bool
+        Print the shift of every image pair.
 
     Returns
     -------
@@ -92,11 +205,15 @@ def calibrate_stage_from_file(drc: AnyPath, plot: bool = False) -> np.ndarray:
     stage_shift_list: list[tuple[int_nm, int_nm]] = []
     translation_list: list[np.ndarray] = []
 
+    series = []
     for i, (n_shifts, (shift_x, shift_y)) in enumerate(stage_shift_plans):
-        images = [read_tiff(str(drc / f'{i}_{j}.tiff')) for j in range(n_shifts)]
-        for img0, img1 in pairwise(images):
-            stage_shift_list.append((shift_x, shift_y))
-            translation_list.append(cross_correlate_image_pair(img0, img1))
+        series.append([read_tiff(str(drc / f'{i}_{j}.tiff'))[0] for j in range(n_shifts)])
+        stage_shift_list.extend([(shift_x, shift_y)] * (n_shifts - 1))
+
+    for translations in cross_correlate_image_series(
+        *series, max_workers=max_workers, verbose=verbose
+    ):
+        translation_list.extend(translations)
 
     # Filter outliers
     sel: np.ndarray = get_outlier_filter(translation_list)
@@ -119,6 +236,8 @@ def calibrate_stage_from_stageshifts(
     *stage_shift_plans: tuple[int, tuple[int_nm, int_nm]],
     plot: bool = False,
     drc: Optional[AnyPath] = None,
+    max_workers: Optional[int] = None,
+    verbose: bool = False,
 ) -> np.ndarray:
     """Run the calibration algorithm on the given X/Y ranges. An image will be
     taken at each position for cross correlation with the previous. An affine
@@ -139,6 +258,10 @@ def calibrate_stage_from_stageshifts(
         Plot the fitting result.
     drc: Optional[AnyPath]
         If present, directory where resulting `log.yaml` and tiff will be saved.
+    max_workers: Optional[int]
+        Number of processes used for image registration, by default in the current process.
+    verbose: bool
+        Print the shift of every image pair.
 
     Returns
     -------
@@ -163,8 +286,11 @@ def calibrate_stage_from_stageshifts(
     mode = ctrl.mode.get()
     binning = ctrl.cam.get_binning()
 
+    # Images are registered after acquisition, so that all pairs can be processed in parallel
+    series: list[list[np.ndarray]] = []
     for i, (n_shifts, (shift_x, shift_y)) in enumerate(stage_shift_plans):
-        last_img, _ = ctrl.get_image(out=None if drc is None else drc / f'{i}_0.tiff')
+        img, _ = ctrl.get_image(out=None if drc is None else drc / f'{i}_0.tiff')
+        images = [img]
 
         for j in range(1, n_shifts):
             new_x_pos = stage_starting_position.x + j * shift_x
@@ -173,15 +299,19 @@ def calibrate_stage_from_stageshifts(
 
             img, _ = ctrl.get_image(out=None if drc is None else drc / f'{i}_{j}.tiff')
 
-            translation_list.append(cross_correlate_image_pair(last_img, img))
+            images.append(img)
             stage_shift_list.append((shift_x, shift_y))
 
             print(f'{i:02d}-{j:02d}: {ctrl.stage}')
 
-            last_img = img
-
+        series.append(images)
         ctrl.stage.set(*stage_starting_position)
 
+    for translations in cross_correlate_image_series(
+        *series, max_workers=max_workers, verbose=verbose
+    ):
+        translation_list.extend(translations)
+
     # Filter outliers
     sel: np.ndarray = get_outlier_filter(translation_list)
     stage_shifts: np.ndarray = np.array(stage_shift_list)[sel]
@@ -234,6 +364,8 @@ def calibrate_stage(
     max_n_step: int = 15,
     plot: bool = False,
     drc: Optional[AnyPath] = None,
+    max_workers: Optional[int] = None,
+    verbose: bool = False,
 ) -> np.ndarray:
     """Calibrate the stage movement (nm) and the position of the camera
     (pixels) at a specific magnification.
@@ -264,6 +396,10 @@ def calibrate_stage(
         Plot the fitting result.
     drc: Optional[AnyPath]
         Path to store the raw data (optional).
+    max_workers: Optional[int]
+        Number of processes used for image registration, by default in the current process.
+    verbose: bool
+        Print the shift of every image pair.
 
     Returns
     -------
@@ -310,6 +446,8 @@ def calibrate_stage(
         *stage_shift_plans,
         plot=plot,
         drc=drc,
+        max_workers=max_workers,
+        verbose=verbose,
     )
 
     return stagematrix
@@ -324,6 +462,8 @@ def calibrate_stage_all(
     min_n_step: int = 5,
     max_n_step: int = 9,
     save: bool = False,
+    max_workers: Optional[int] = None,
+    verbose: bool = False,
 ) -> dict:
     """Run the stagematrix calibration routine for all magnifications
     specified. Return the updates values for the configuration file.
@@ -350,6 +490,10 @@ def calibrate_stage_all(
         calibration. This is used for higher magnifications.
     save: bool
         Save the data to the data directory.
+    max_workers: Optional[int]
+        Number of processes used for image registration, by default in the current process.
+    verbose: bool
+        Print the shift of every image pair.
 
     Returns
     -------
@@ -387,6 +531,8 @@ def calibrate_stage_all(
                     min_n_step=min_n_step,
                     max_n_step=max_n_step,
                     drc=drc,
+                    max_workers=max_workers,
+                    verbose=verbose,
                 )
             except ValueError as e:  # raises if pixelsize is 0 or 1.0
                 print(e)
@@ -488,6 +634,15 @@ The stagematrix takes the image binning into account."""
         ),
     )
 
+    parser.add_argument(
+        '-j',
+        '--workers',
+        dest='max_workers',
+        type=int,
+        metavar='N',
+        help='Number of processes used for image registration (default: 1).',
+    )
+
     parser.add_argument(
         '-s',
         '--save',
@@ -506,6 +661,7 @@ The stagematrix takes the image binning into account."""
         plot=False,
         drc=None,
         save=False,
+        max_workers=None,
     )
 
     options = parser.parse_args()
@@ -530,6 +686,8 @@ The stagematrix takes the image binning into account."""
         'min_n_step': options.min_n_step,
         'max_n_step': options.max_n_step,
         'save': options.save,
+        'max_workers': options.max_workers,
+        'verbose': True,
     }
 
     if mode != 'all':
@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass, field
+from typing import Mapping, Optional, Sequence, Union
+
+import numpy as np
+from typing_extensions import Self
+
+from instamatic._typing import AnyPath
+from instamatic.calibrate.calibrate_stage_motion import CalibStageMotion, Speed
+from instamatic.calibrate.calibrate_stage_rotation import CalibStageRotation
+from instamatic.calibrate.calibrate_stage_translation import axis_to_calib_class_dict
+from instamatic.microscope.utils import StagePositionTuple
+
+logger = logging.getLogger(__name__)
+
+AXES = StagePositionTuple._fields
+Position = Union[StagePositionTuple, Sequence[Optional[float]], Mapping[str, float]]
+
+
+def _as_position(position: Position, reference: StagePositionTuple) -> StagePositionTuple:
+    """Complete a (partial) position with the values from `reference`."""
+    if isinstance(position, Mapping):
+        values = [position.get(axis) for axis in AXES]
+    else:
+        values = list(position) + [None] * (len(AXES) - len(position))
+    return StagePositionTuple(
+        *(ref if value is None else value for value, ref in zip(values, reference))
+    )
+
+
+@dataclass
+class StageMotionModel:
+    """Predict the time needed for stage moves from the stage motion
+    calibrations (`CalibStageTranslation`, `CalibStageRotation`).
+
+    The axes z, a, b are moved one after the other, followed by x and y
+    together, as in `JeolMicroscope.setStagePosition`. Set `simultaneous`
+    for goniometers that move all axes at once. Moves of an axis without
+    calibration take `nan` seconds.
+
+    calibrations: dict,
+        motion calibration for every calibrated axis ('x', 'y', 'z', 'a')
+    settle: float,
+        time in seconds added to every move for the stage to settle
+    simultaneous: bool,
+        all axes move at the same time
+    """
+
+    calibrations: dict[str, CalibStageMotion] = field(default_factory=dict)
+    settle: float = 0.0
+    simultaneous: bool = False
+
+    @classmethod
+    def from_file(cls, drc: Optional[AnyPath] = None, **kwargs) -> Self:
+        """Load all available stage motion calibrations from `drc` (the
+        calibration directory by default)."""
+        classes = {**axis_to_calib_class_dict, 'a': CalibStageRotation}
+        calibrations = {}
+        for axis, calib_class in classes.items():
+            path = None if drc is None else f'{drc}/{calib_class._yaml_filename}'
+            try:
+                calibrations[axis] = calib_class.from_file(path)
+            except OSError:
+                logger.debug('No stage motion calibration for axis %s', axis)
+        return cls(calibrations, **kwargs)
+
+    def axis_time(self, axis: str, span: float, speed: Speed = None) -> float:
+        """Time in seconds needed to move `axis` by `span` (nm or degree)."""
+        span = abs(span)
+        if span == 0:
+            return 0.0
+        try:
+            calib = self.calibrations[axis]
+        except KeyError:
+            return np.nan
+        return calib.span_speed_to_time(span, speed)
+
+    def move_time(
+        self,
+        start: Position,
+        target: Position,
+        speed: Speed = None,
+        backlash_step: Optional[float] = None,
+    ) -> float:
+        """Time in seconds to move the stage from `start` to `target`.
+
+        start: StagePositionTuple,
+            current position, i.e. `ctrl.stage.get()`
+        target: tuple or dict,
+            target position, axes that are None or missing do not move
+        speed: float,
+            speed setting, only applied to the rotation (a)
+        backlash_step: float,
+            approach the xy target from `backlash_step` (nm) below, as in
+            `Stage.set_xy_with_backlash_correction`
+        """
+        start = StagePositionTuple(*start)
+        target = _as_position(target, start)
+
+        if backlash_step:
+            pre = target._replace(x=target.x - backlash_step, y=target.y - backlash_step)
+            return self.move_time(start, pre, speed) + self.move_time(pre, target._asdict())
+
+        times = {
+            axis: self.axis_time(axis, new - old, speed if axis == 'a' else None)
+            for axis, old, new in zip(AXES, start, target)
+        }
+        if not any(times.values()):
+            return 0.0
+
+        if self.simultaneous:
+            total = max(times.values())
+        else:
+            total = times['z'] + times['a'] + times['b'] + max(times['x'], times['y'])
+
+        return total + self.settle
+
+    def path_times(
+        self,
+        start: Position,
+        targets: Sequence[Position],
+        **kwargs,
+    ) -> np.ndarray:
+        """Time in seconds for each move along a path from `start` through
+        all `targets`. Use `np.cumsum` to get the arrival times.
+
+        **kwargs are passed to `StageMotionModel.move_time`.
+        """
+        current = StagePositionTuple(*start)
+        times = np.empty(len(targets))
+        for i, target in enumerate(targets):
+            target = _as_position(target, current)
+            times[i] = self.move_time(current, target, **kwargs)
+            current = target
+        return times
@@ -11,12 +11,14 @@ from pathlib import Path
 import yaml
 from typing_extensions import Self
 
+from .calibration_table import CalibrationTable
 from .config_updater import (
     check_defaults_yaml,
     check_settings_yaml,
     convert_config,
     is_oldstyle,
 )
+from .snapshot import ConfigSnapshot
 
 logger = logging.getLogger(__name__)
 
@@ -31,6 +33,7 @@ _camera = 'camera'
 _scripts = 'scripts'
 _alignments = 'alignments'
 _instamatic = 'instamatic'
+_snapshot = '.config_snapshot.pickle'
 
 
 def nested_update(d: dict, u: dict) -> dict:
@@ -95,6 +98,11 @@ def get_alignments() -> dict:
     return {fn.stem: yaml.safe_load(open(fn)) for fn in yaml_filenames}
 
 
+def load_yaml(path: str):
+    """Load a configuration yaml file via the compiled snapshot."""
+    return config_snapshot.load_yaml(path)
+
+
 class ConfigObject:
     """Namespace for configuration (maps dict items to attributes)."""
 
@@ -115,11 +123,11 @@ class ConfigObject:
     def from_file(cls, path: str) -> Self:
         """Read configuration from yaml file, returns namespace."""
         name = Path(path).stem
-        return cls(yaml.load(open(path), Loader=yaml.Loader), name=name, location=path)
+        return cls(load_yaml(path), name=name, location=path)
 
     def update_from_file(self, path: str) -> None:
         """Update configuration from yaml file."""
-        self.update(yaml.load(open(path), Loader=yaml.Loader))
+        self.update(load_yaml(path))
         self.location = path
 
     def update(self, mapping: dict):
@@ -153,10 +161,20 @@ def load_calibration(calibration_name: str = None):
         calibration_config.update(d)
 
     calibration = calibration_config
+    build_calibration_table()
 
     settings.calibration = calibration.name
 
 
+def build_calibration_table():
+    """(Re)build the lookup tables for the calibration,
+    `config.calibration.table`, from the calibration and microscope
+    ranges."""
+    calibration.table = CalibrationTable.from_mapping(
+        calibration.mapping, ranges=microscope.mapping.get('ranges')
+    )
+
+
 def load_microscope_config(microscope_name: str = None):
     global microscope
 
@@ -174,6 +192,9 @@ def load_microscope_config(microscope_name: str = None):
 
     microscope = microscope_config
 
+    if 'calibration' in globals():
+        build_calibration_table()
+
     settings.microscope = microscope.name
 
 
@@ -238,7 +259,20 @@ def load_all(
     load_defaults()
     load_microscope_config(microscope_name)
     load_camera_config(camera_name)
-    load_calibration(calibration_name)
+
+    # the calibration is parsed on first access of `config.calibration`
+    global _calibration_name
+    _calibration_name = calibration_name
+    globals().pop('calibration', None)
+
+
+def __getattr__(name: str):
+    """Load the calibration lazily, so that modules that do not need it
+    never parse it."""
+    if name == 'calibration':
+        load_calibration(_calibration_name)
+        return calibration
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
 
 
 base_drc = get_base_drc()
@@ -258,11 +292,13 @@ logs_drc.mkdir(exist_ok=True)
 
 print(f'Config directory: {config_drc}')
 
+config_snapshot = ConfigSnapshot(config_drc / _snapshot)
+
 settings = None
 defaults = None
 microscope = None
-calibration = None
 camera = None
+_calibration_name = None
 
 load_all()
 
@@ -272,12 +308,12 @@ locations = {
     'logs': logs_drc,
     'scripts': scripts_drc,
     'camera': alignments_drc,
-    'calibration': calibration.location.parent,
+    'calibration': calibration_drc,
     'microscope': microscope.location.parent,
     'alignments': camera.location.parent,
     'data': settings.data_directory,
     'work': settings.work_directory,
-    'calibration_config': calibration.location,
+    'calibration_config': calibration_drc / f'{_calibration_name or settings.calibration}.yaml',
     'microscope_config': microscope.location,
     'alignments_config': camera.location,
     'settings': config_drc / _settings_yaml,
@@ -0,0 +1,213 @@
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, Literal, Mapping, Optional, Sequence
+
+import numpy as np
+from typing_extensions import Self
+
+logger = logging.getLogger(__name__)
+
+Fallback = Optional[Literal['nearest', 'interpolate']]
+
+
+@dataclass(frozen=True)
+class ModeCalibration:
+    """Array-backed calibration for a single magnification mode.
+
+    The arrays are indexed by the position of the magnification in `mags`,
+    which is the magnification index (`ctrl.magnification.index`) if the
+    microscope ranges are given. Missing calibrations are `nan`.
+
+    mode: str,
+        magnification mode, i.e. `lowmag`, `mag1`, `diff`
+    mags: np.ndarray[n],
+        sorted magnifications (or camera lengths in `diff` mode)
+    pixelsizes: np.ndarray[n],
+        pixel size in nm (px / Angstrom in `diff` mode)
+    stagematrices: np.ndarray[n, 2, 2],
+        stage matrices to convert from stage to pixel coordinates
+    rotations: np.ndarray[n],
+        number of 90 degree rotations for `np.rot90`
+    flipud, fliplr: bool,
+        flip the images for this mode
+    """
+
+    mode: str
+    mags: np.ndarray
+    pixelsizes: np.ndarray
+    stagematrices: np.ndarray
+    rotations: np.ndarray
+    flipud: bool = False
+    fliplr: bool = False
+    _indices: dict = field(init=False, repr=False, compare=False)
+    _calibrated: dict = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        # dict lookups are much faster than `np.searchsorted` for a single magnification
+        indices = {int(mag): i for i, mag in enumerate(self.mags)}
+        calibrated = {
+            name: ~np.isnan(getattr(self, name).reshape(len(self.mags), -1)).any(axis=1)
+            for name in ('pixelsizes', 'stagematrices')
+        }
+        object.__setattr__(self, '_indices', indices)
+        object.__setattr__(self, '_calibrated', calibrated)
+
+    @classmethod
+    def from_mapping(cls, mode: str, mapping: dict, mags: Sequence[int] = ()) -> Self:
+        """Build the arrays from the calibration `mapping` of `mode`,
+        `mags` adds uncalibrated magnifications, i.e. from the microscope
+        ranges."""
+
+        def items(key: str) -> dict:
+            return {mag: value for mag, value in (mapping.get(key) or {}).items() if mag > 0}
+
+        pixelsizes = items('pixelsize')
+        stagematrices = {
+            mag: value for mag, value in items('stagematrix').items() if len(value) == 4
+        }
+        rotations = items('rot90')
+
+        all_mags = np.unique([*mags, *pixelsizes, *stagematrices, *rotations]).astype(int)
+        index = {mag: i for i, mag in enumerate(all_mags)}
+
+        pixelsize_arr = np.full(len(all_mags), np.nan)
+        for mag, value in pixelsizes.items():
+            pixelsize_arr[index[mag]] = value
+
+        stagematrix_arr = np.full((len(all_mags), 2, 2), np.nan)
+        for mag, value in stagematrices.items():
+            stagematrix_arr[index[mag]] = np.reshape(value, (2, 2))
+
+        rotation_arr = np.zeros(len(all_mags), dtype=int)
+        for mag, value in rotations.items():
+            rotation_arr[index[mag]] = value
+
+        for arr in (all_mags, pixelsize_arr, stagematrix_arr, rotation_arr):
+            arr.flags.writeable = False
+
+        return cls(
+            mode=mode,
+            mags=all_mags,
+            pixelsizes=pixelsize_arr,
+            stagematrices=stagematrix_arr,
+            rotations=rotation_arr,
+            flipud=bool(mapping.get('flipud', False)),
+            fliplr=bool(mapping.get('fliplr', False)),
+        )
+
+    def index(self, mag) -> np.ndarray:
+        """Index of magnification(s) `mag` in the arrays, raises KeyError
+        for unknown magnifications."""
+        mag = np.asarray(mag, dtype=float)
+        idx = np.searchsorted(self.mags, mag).clip(max=max(len(self.mags) - 1, 0))
+        if not len(self.mags) or not np.all(self.mags[idx] == mag):
+            raise KeyError(f'Unknown {self.mode} magnification(s): {mag}')
+        return idx
+
+    def _lookup(self, name: str, mag, fallback: Fallback) -> np.ndarray:
+        values = getattr(self, name)
+
+        calibrated = self._calibrated[name]
+
+        if isinstance(mag, (int, np.integer)):
+            i = self._indices.get(mag)
+            if i is not None and calibrated[i]:
+                return values[i].copy()
+
+        mag = np.asarray(mag, dtype=float)
+        flat = mag.ravel()
+
+        idx = np.searchsorted(self.mags, flat).clip(max=max(len(self.mags) - 1, 0))
+        found = np.zeros(flat.shape, dtype=bool)
+        if len(self.mags):
+            found = (self.mags[idx] == flat) & calibrated[idx]
+
+        if found.all():
+            out = values[idx]
+        elif fallback is None or not calibrated.any() or not np.isfinite(flat).all():
+            raise KeyError(
+                f'No {name} calibration for {self.mode} magnification(s) {flat[~found]}'
+            )
+        else:
+            logger.warning(
+                'No %s calibration for %s magnification(s) %s, using %s value',
+                name,
+                self.mode,
+                flat[~found],
+                fallback,
+            )
+            out = self._fallback(values[calibrated], self.mags[calibrated], flat, fallback)
+
+        return out.reshape(mag.shape + values.shape[1:])
+
+    @staticmethod
+    def _fallback(values: np.ndarray, mags: np.ndarray, flat: np.ndarray, fallback: Fallback):
+        """Nearest or interpolated `values` at `flat` from the calibrated
+        `mags` (in log space, values are extrapolated as constant)."""
+        x, xp = np.log(flat), np.log(mags)
+
+        if fallback == 'nearest':
+            return values[np.abs(x[:, None] - xp[None]).argmin(axis=1)]
+
+        if fallback != 'interpolate':
+            raise ValueError(f'Unknown fallback: {fallback!r}')
+
+        if values.ndim == 1:
+            # pixel sizes scale as a power of the magnification
+            return np.exp(np.interp(x, xp, np.log(values)))
+
+        # stage matrices scale inversely with the magnification
+        scaled = (values * mags[:, None, None]).reshape(len(mags), -1)
+        out = np.stack([np.interp(x, xp, column) for column in scaled.T], axis=-1)
+        return out.reshape(-1, *values.shape[1:]) / flat[:, None, None]
+
+    def pixelsize(self, mag, fallback: Fallback = None):
+        """Pixel size for magnification(s) `mag`.
+
+        fallback: str,
+            `nearest` or `interpolate` to estimate missing calibrations from
+            the neighbouring magnifications, raise KeyError if None
+        """
+        out = self._lookup('pixelsizes', mag, fallback)
+        return float(out) if out.ndim == 0 else out
+
+    def stagematrix(self, mag, fallback: Fallback = None) -> np.ndarray:
+        """Stage matrix (2x2) for magnification(s) `mag`, see
+        `ModeCalibration.pixelsize` for `fallback`."""
+        return self._lookup('stagematrices', mag, fallback)
+
+    def rot90(self, mag) -> int:
+        """Number of 90 degree rotations for magnification `mag`, 0 if not
+        calibrated."""
+        i = self._indices.get(mag)
+        return 0 if i is None else int(self.rotations[i])
+
+
+class CalibrationTable(Dict[str, ModeCalibration]):
+    """Array-backed lookup tables for the calibration of every mode, built
+    once when the calibration is loaded (`config.calibration.table`).
+
+    Usage:
+        table = config.calibration.table
+        table['mag1'].pixelsize(2500)
+        table['mag1'].pixelsize([2500, 3000, 3500], fallback='interpolate')
+        table['lowmag'].stagematrix(200)
+    """
+
+    @classmethod
+    def from_mapping(
+        cls, mapping: dict, ranges: Optional[Mapping[str, Sequence[int]]] = None
+    ) -> Self:
+        """Build the tables from the calibration `mapping`, including the
+        magnifications from the microscope `ranges`."""
+        ranges = ranges or {}
+        return cls(
+            (mode, ModeCalibration.from_mapping(mode, dct, ranges.get(mode, ())))
+            for mode, dct in mapping.items()
+            if isinstance(dct, Mapping) and {'pixelsize', 'stagematrix', 'rot90'} & set(dct)
+        )
+
+    def __missing__(self, mode: str):
+        raise KeyError(f'No calibration for mode `{mode}`')
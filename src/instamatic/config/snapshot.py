@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import pickle
+from pathlib import Path
+from typing import Any, NamedTuple
+
+from instamatic.config.utils import yaml
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION = 1
+PICKLE_PROTOCOL = 4  # readable by all supported python versions
+
+
+class SnapshotEntry(NamedTuple):
+    mtime_ns: int
+    size: int
+    digest: str
+    data: bytes  # pickled contents of the yaml file
+
+
+class ConfigSnapshot:
+    """Compiled snapshot of the parsed configuration yaml files, stored as a
+    single pickle next to the yaml files, so that they do not have to be
+    parsed on every start.
+
+    An entry is valid if the size and modification time of its yaml file
+    are unchanged, or else if the hash of the file contents still matches
+    (e.g. after copying the configuration directory). Missing or outdated
+    entries are parsed from the yaml file and the snapshot is updated. A
+    snapshot that cannot be read or written is ignored.
+
+    Usage:
+        snapshot = ConfigSnapshot(config_drc / '.config_snapshot.pickle')
+        dct = snapshot.load_yaml(config_drc / 'settings.yaml')
+    """
+
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = Path(path)
+        self.entries: dict[str, SnapshotEntry] = {}
+        self.read()
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}('{self.path}')"
+
+    def read(self) -> None:
+        """Read all entries from the snapshot file."""
+        try:
+            with open(self.path, 'rb') as f:
+                version, entries = pickle.load(f)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            logger.warning('Ignoring config snapshot `%s`: %s', self.path, e)
+            return
+
+        if version == SNAPSHOT_VERSION:
+            self.entries = entries
+
+    def write(self) -> None:
+        """Write all entries to the snapshot file (atomically)."""
+        tmp = self.path.with_name(f'{self.path.name}.{os.getpid()}.tmp')
+        try:
+            with open(tmp, 'wb') as f:
+                pickle.dump((SNAPSHOT_VERSION, self.entries), f, protocol=PICKLE_PROTOCOL)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            logger.warning('Could not write config snapshot `%s`: %s', self.path, e)
+            tmp.unlink(missing_ok=True)
+
+    def load_yaml(self, path: str) -> Any:
+        """Return the contents of yaml file `path`, from the snapshot if it
+        is up to date.
+
+        Every call returns a new copy, so the result can be modified.
+        """
+        key = str(Path(path).resolve())
+        stat = os.stat(key)
+        entry = self.entries.get(key)
+
+        if entry and (entry.mtime_ns, entry.size) == (stat.st_mtime_ns, stat.st_size):
+            return pickle.loads(entry.data)
+
+        with open(key, 'rb') as f:
+            raw = f.read()
+        digest = hashlib.sha1(raw).hexdigest()
+
+        if entry and entry.digest == digest:
+            data = entry.data
+        else:
+            logger.debug('Parsing `%s`', key)
+            data = pickle.dumps(yaml.load(raw, Loader=yaml.Loader), protocol=PICKLE_PROTOCOL)
+
+        self.entries[key] = SnapshotEntry(stat.st_mtime_ns, stat.st_size, digest, data)
+        self.write()
+
+        return pickle.loads(data)
@@ -18,6 +18,7 @@ from instamatic.microscope import components
 from instamatic.microscope.base import MicroscopeBase
 from instamatic.microscope.components.deflectors import DeflectorTuple
 from instamatic.microscope.microscope import get_microscope
+from instamatic.microscope.mirror import StateMirror
 
 _ctrl = None  # store reference of ctrl so it can be accessed without re-initializing
 
@@ -26,6 +27,7 @@ default_tem = config.microscope.name
 
 use_tem_server = config.settings.use_tem_server
 use_cam_server = config.settings.use_cam_server
+use_tem_state_mirror = config.settings.use_tem_state_mirror
 
 
 def initialize(
@@ -51,6 +53,12 @@ def initialize(
     print(f'Microscope: {tem_name}{" (server)" if use_tem_server else ""}')
     tem = get_microscope(tem_name, use_server=use_tem_server)
 
+    if use_tem_state_mirror:
+        tem = StateMirror(tem)
+        poll_interval = config.settings.tem_state_mirror_poll_interval
+        if poll_interval:
+            tem.start_polling(interval=poll_interval)
+
     if cam_name:
         if use_cam_server:
             cam_tag = ' (server)'
@@ -297,8 +305,7 @@ class TEMController:
         if not binning:
             binning = self.cam.get_binning()
 
-        stagematrix = config.calibration[mode]['stagematrix'][mag]
-        stagematrix = np.array(stagematrix).reshape(2, 2) * binning  # um -> nm
+        stagematrix = config.calibration.table[mode].stagematrix(mag) * binning  # um -> nm
 
         return stagematrix
 
@@ -813,7 +820,16 @@ class TEMController:
         self.from_dict(d)
         print(f"Microscope alignment restored from '{name}'")
 
+    def invalidate_state(self) -> None:
+        """Clear the cached microscope state if the TEM interface is wrapped
+        in a `StateMirror`, e.g. after changing settings on the microscope
+        panel."""
+        if isinstance(self.tem, StateMirror):
+            self.tem.invalidate()
+
     def close(self):
+        if isinstance(self.tem, StateMirror):
+            self.tem.stop_polling()
         try:
             self.cam.close()
         except AttributeError:
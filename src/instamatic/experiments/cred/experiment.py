@@ -12,6 +12,9 @@ import instamatic
 from instamatic import config
 from instamatic.experiments.experiment_base import ExperimentBase
 from instamatic.formats import write_tiff
+from instamatic.microscope.rotation_monitor import RotationMonitor
+from instamatic.processing.drift_tracker import DriftCorrector, DriftTracker
+from instamatic.processing.frame_quality import FrameQualityMonitor
 from instamatic.processing.ImgConversionTPX import ImgConversionTPX as ImgConversion
 
 # degrees to rotate before activating data collection procedure
@@ -54,6 +57,20 @@ class Experiment(ExperimentBase):
         Specify which data types/input files should be written
     stop_event:
         Instance of `threading.Event()` that signals the experiment to be terminated.
+    frame_metrics_interval:
+        Calculate quality metrics (spot count, resolution, beam center drift) for every
+        n-th frame during the data collection, 0 to disable. Defaults to
+        `config.settings.cred_live_frame_metrics_interval`.
+    frame_metrics_callback:
+        Called with the `FrameMetrics` of every analyzed frame (from a background thread).
+    drift_tracking_interval:
+        Register every n-th frame against the first one to track the beam drift during the
+        data collection, 0 to disable. Defaults to `config.settings.cred_drift_tracking_interval`.
+    drift_correction:
+        Correct the drift with this deflector (`DiffShift` or `BeamShift`), None to disable.
+        Defaults to `config.settings.cred_drift_correction`.
+    drift_callback:
+        Called with the `DriftEstimate` of every registered frame (from a background thread).
     """
 
     def __init__(
@@ -75,6 +92,11 @@ class Experiment(ExperimentBase):
         write_dials: bool = True,
         write_red: bool = True,
         stop_event=None,
+        frame_metrics_interval: int = None,
+        frame_metrics_callback=None,
+        drift_tracking_interval: int = None,
+        drift_correction: str = None,
+        drift_callback=None,
     ):
         super().__init__()
         self.ctrl = ctrl
@@ -115,6 +137,23 @@ class Experiment(ExperimentBase):
         )
 
         self.track_stage_position = config.settings.cred_track_stage_positions
+
+        if frame_metrics_interval is None:
+            frame_metrics_interval = config.settings.cred_live_frame_metrics_interval
+        self.frame_metrics_interval = frame_metrics_interval
+        self.frame_metrics_callback = frame_metrics_callback
+        self.frame_monitor = None
+
+        if drift_tracking_interval is None:
+            drift_tracking_interval = config.settings.cred_drift_tracking_interval
+        if drift_correction is None:
+            drift_correction = config.settings.cred_drift_correction
+        self.drift_tracking_interval = drift_tracking_interval
+        self.drift_correction = drift_correction
+        self.drift_callback = drift_callback
+        self.drift_tracker = None
+
+        self.rotation_monitor = None
         self.stage_positions = []
 
         if use_vm:
@@ -227,6 +266,11 @@ class Experiment(ExperimentBase):
         self.stage_positions.append((0, self.start_position))
         a = self.start_position[3]
 
+        self.rotation_monitor = monitor = RotationMonitor(
+            self.ctrl.stage, start_threshold=ACTIVATION_THRESHOLD, stall_time=None
+        )
+        monitor.start()
+
         if self.mode == 'simulate':
             start_angle = a
             print('Data Recording started.')
@@ -239,15 +283,12 @@ class Experiment(ExperimentBase):
 
         else:
             print('Waiting for rotation to start...', end=' ')
-            a0 = a
-            while abs(a - a0) < ACTIVATION_THRESHOLD:
+            while not monitor.started.wait(monitor.interval):
                 if self.stopEvent.is_set():
                     break
 
-                a = self.ctrl.stage.a
-
             print('Data Recording started.')
-            start_angle = a
+            start_angle = monitor.start_angle if monitor.started.is_set() else monitor.angle
 
         if self.unblank_beam:
             print('Unblanking beam')
@@ -270,6 +311,100 @@ class Experiment(ExperimentBase):
 
         print('Done.')
 
+    def start_frame_monitor(self) -> FrameQualityMonitor:
+        """Start the background analysis of the collected frames."""
+        camera_length = int(self.ctrl.magnification.get())
+        pixelsize = config.calibration['diff']['pixelsize'].get(camera_length)
+        if pixelsize:
+            pixelsize *= self.ctrl.cam.get_binning()
+
+        monitor = FrameQualityMonitor(
+            pixelsize=pixelsize,
+            callback=self.frame_metrics_callback,
+            interval=self.frame_metrics_interval,
+            log=self.logger,
+        )
+        monitor.start()
+        return monitor
+
+    def stop_frame_monitor(self) -> None:
+        """Stop the background analysis and log a summary."""
+        monitor = self.frame_monitor
+        monitor.stop()
+
+        if not monitor.results:
+            return
+
+        n_spots = np.mean([m.n_spots for m in monitor.results])
+        max_drift = max(m.drift for m in monitor.results)
+        print_and_log(
+            f'Frame metrics: {len(monitor.results)} frames analyzed ({monitor.dropped} skipped), '
+            f'mean spot count {n_spots:.1f}, max beam center drift {max_drift:.1f} px',
+            logger=self.logger,
+        )
+
+    def start_drift_tracker(self) -> DriftTracker:
+        """Start tracking (and correcting) the beam drift in the
+        background."""
+        corrector = None
+        if self.drift_correction:
+            corrector = DriftCorrector.from_calibration(
+                self.ctrl,
+                key=self.drift_correction,
+                min_interval=config.settings.cred_drift_correction_interval,
+            )
+            print_and_log(
+                f'Drift correction enabled using {self.drift_correction}', logger=self.logger
+            )
+
+        tracker = DriftTracker(
+            interval=self.drift_tracking_interval,
+            corrector=corrector,
+            callback=self.drift_callback,
+            log=self.logger,
+        )
+        tracker.start()
+        return tracker
+
+    def stop_drift_tracker(self) -> None:
+        """Stop tracking the drift, log a summary and write `drift.txt`."""
+        tracker = self.drift_tracker
+        tracker.stop()
+
+        if not tracker.results:
+            return
+
+        max_drift = max(r.drift for r in tracker.results)
+        msg = f'Drift tracking: {len(tracker.results)} frames registered ({tracker.dropped} skipped), max drift {max_drift:.1f} px'
+        if tracker.corrector:
+            total = tracker.corrector.total
+            msg += f', {len(tracker.corrector.corrections)} corrections, total {self.drift_correction} [{total[0]:+.0f} {total[1]:+.0f}]'
+        print_and_log(msg, logger=self.logger)
+
+        t0 = tracker.results[0].time
+        rows = [
+            (r.index, r.time - t0, *r.shift, r.peak, *(r.correction or (0, 0)))
+            for r in tracker.results
+        ]
+        self.path.mkdir(parents=True, exist_ok=True)
+        np.savetxt(
+            self.path / 'drift.txt',
+            rows,
+            fmt=('%6d', '%10.3f', '%8.2f', '%8.2f', '%6.3f', '%8.0f', '%8.0f'),
+            header='frame  time(s)  shift_row  shift_col  peak  correction_x  correction_y',
+        )
+
+    def interpolate_frame_angles(self, buffer: list) -> None:
+        """Store the rotation angle at the middle of each exposure in the
+        headers as `AlphaInterpolated`, interpolated from the samples of the
+        rotation monitor."""
+        if not buffer:
+            return
+        times = [(h['ImageGetTimeStart'] + h['ImageGetTimeEnd']) / 2 for _, _, h in buffer]
+        angles = self.rotation_monitor.angle_at(times)
+        for (_, _, h), angle in zip(buffer, angles):
+            h['AlphaInterpolated'] = float(angle)
+
     def start_collection(self) -> bool:
         """Main experimental function, returns True if experiment runs
         normally, False if it is interrupted for whatever reason."""
@@ -289,47 +424,69 @@ class Experiment(ExperimentBase):
         if self.relax_beam_before_experiment:
             self.relax_beam()
 
-        self.start_angle = self.start_rotation()
-        self.ctrl.cam.block()
+        if self.frame_metrics_interval:
+            self.frame_monitor = self.start_frame_monitor()
+
+        if self.drift_tracking_interval:
+            self.drift_tracker = self.start_drift_tracker()
+
+        try:
+            self.start_angle = self.start_rotation()
+            self.ctrl.cam.block()
+
+            i = 1
 
-        i = 1
+            t0 = time.perf_counter()
 
-        t0 = time.perf_counter()
+            while not self.stopEvent.is_set():
+                if i % self.image_interval == 0:
+                    t_start = time.perf_counter()
+                    acquisition_time = (t_start - t0) / (i - 1)
 
-        while not self.stopEvent.is_set():
-            if i % self.image_interval == 0:
-                t_start = time.perf_counter()
-                acquisition_time = (t_start - t0) / (i - 1)
+                    self.ctrl.difffocus.set(self.diff_focus_defocused, confirm_mode=False)
+                    img, h = self.ctrl.get_image(exposure_image, header_keys=None)
+                    self.ctrl.difffocus.set(self.diff_focus_proper, confirm_mode=False)
 
-                self.ctrl.difffocus.set(self.diff_focus_defocused, confirm_mode=False)
-                img, h = self.ctrl.get_image(exposure_image, header_keys=None)
-                self.ctrl.difffocus.set(self.diff_focus_proper, confirm_mode=False)
+                    image_buffer.append((i, img, h))
 
-                image_buffer.append((i, img, h))
+                    next_interval = t_start + acquisition_time
+                    # print(f"{i} BLOOP! {next_interval-t_start:.3f} {acquisition_time:.3f} {t_start-t0:.3f}")
 
-                next_interval = t_start + acquisition_time
-                # print(f"{i} BLOOP! {next_interval-t_start:.3f} {acquisition_time:.3f} {t_start-t0:.3f}")
+                    while time.perf_counter() > next_interval:
+                        next_interval += acquisition_time
+                        i += 1
+                        # print(f"{i} "SKIP!  {next_interval-t_start:.3f} {acquisition_time:.3f}")
 
-                while time.perf_counter() > next_interval:
-                    next_interval += acquisition_time
-                    i += 1
-                    # print(f"{i} "SKIP!  {next_interval-t_start:.3f} {acquisition_time:.3f}")
+                    diff = next_interval - time.perf_counter()  # seconds
 
-                diff = next_interval - time.perf_counter()  # seconds
+                    if self.track_stage_position and diff > 0.1:
+                        self.stage_positions.append((i, self.ctrl.stage.get()))
 
-                if self.track_stage_position and diff > 0.1:
-                    self.stage_positions.append((i, self.ctrl.stage.get()))
+                    time.sleep(diff)
 
-                time.sleep(diff)
+                else:
+                    img, h = self.ctrl.get_image(self.exposure, header_keys=None)
+                    # print(f"{i} Image!")
+                    buffer.append((i, img, h))
+                    if self.frame_monitor:
+                        self.frame_monitor.submit(i, img)
+                    if self.drift_tracker:
+                        self.drift_tracker.submit(i, img)
+                        # corrections are applied between frames, from this thread
+                        self.drift_tracker.apply_correction()
 
-            else:
-                img, h = self.ctrl.get_image(self.exposure, header_keys=None)
-                # print(f"{i} Image!")
-                buffer.append((i, img, h))
+                i += 1
 
-            i += 1
+            t1 = time.perf_counter()
+        finally:
+            if self.rotation_monitor:  # None if `start_rotation` failed early
+                self.rotation_monitor.stop()
+            if self.frame_monitor:
+                self.stop_frame_monitor()
+            if self.drift_tracker:
+                self.stop_drift_tracker()
 
-        t1 = time.perf_counter()
+        self.interpolate_frame_angles(buffer)
 
         if self.mode == 'footfree':
             self.ctrl.stage.stop()
@@ -422,6 +579,10 @@ class Experiment(ExperimentBase):
         The buffer index must start at 1.
         """
 
+        # fit the frame angles to the rotation, unless the stage did not rotate (i.e. simulate)
+        monitor = self.rotation_monitor
+        rotation_trace = monitor.samples if monitor.started.is_set() else None
+
         img_conv = ImgConversion(
             buffer=buffer,
             osc_angle=self.osc_angle,
@@ -435,6 +596,7 @@ class Experiment(ExperimentBase):
             wavelength=self.wavelength,
             stretch_amplitude=self.stretch_amplitude,
             stretch_azimuth=self.stretch_azimuth,
+            rotation_trace=rotation_trace,
         )
 
         print('Writing data files...')
@@ -13,6 +13,7 @@ import instamatic
 from instamatic import config
 from instamatic.experiments.experiment_base import ExperimentBase
 from instamatic.formats import write_tiff
+from instamatic.microscope.rotation_monitor import RotationMonitor
 
 
 class Experiment(ExperimentBase):
@@ -143,13 +144,9 @@ class Experiment(ExperimentBase):
         self.cam.get_ready_for_record()
         print('Ready...')
 
-    def manual_activation(self) -> float:
-        ACTIVATION_THRESHOLD = 0.2
-
+    def manual_activation(self, monitor: RotationMonitor) -> float:
         print('Waiting for rotation to start...', end=' ')
-        a0 = a = self.ctrl.stage.a
-        while abs(a - a0) < ACTIVATION_THRESHOLD:
-            a = self.ctrl.stage.a
+        a = monitor.wait_for_start()
 
         print('Rotation started...')
 
@@ -198,9 +195,18 @@ class Experiment(ExperimentBase):
             delay=0.2
         )  # give the beamblank some time to dissappear to avoid weak first frame
 
+        # samples the rotation in the background, replacing continuous polling of the stage
+        monitor = RotationMonitor(
+            self.ctrl.stage,
+            target=None if manual_control else target_angle,
+            tolerance=angle_tolerance,
+            # a motorised rotation only ends at the target, not on a slow readout
+            stall_time=interval if manual_control else None,
+        )
+        monitor.start()
+
         if manual_control:
-            start_angle = self.manual_activation()
-            last_angle = 999
+            start_angle = self.manual_activation(monitor)
         elif self.rotation_speed:
             self.ctrl.stage.set_a_with_speed(
                 a=target_angle, speed=self.rotation_speed, wait=False
@@ -217,45 +223,40 @@ class Experiment(ExperimentBase):
 
         print('Acquiring data...')
 
-        while True:
-            t = time.perf_counter()
-
-            if not manual_control:
-                if abs(self.ctrl.stage.a - target_angle) < angle_tolerance:
-                    print('Target angle reached!')
-                    break
-
-            if t - t_delta > interval:
-                n += 1
-                x, y, z, a, _ = pos = self.ctrl.stage.get()
-                self.stage_positions.append((t, pos))
-                t_delta = t
-                # print(t, pos)
-
-                if manual_control:
-                    current_angle = a
-                    if last_angle == current_angle:
-                        print(
-                            f'Manual rotation was interrupted (current: {current_angle:.2f} | last {last_angle:.2f})'
-                        )
+        try:
+            while not monitor.finished.wait(monitor.interval):
+                t = time.perf_counter()
+
+                if t - t_delta > interval:
+                    n += 1
+                    x, y, z, a, _ = pos = self.ctrl.stage.get()
+                    self.stage_positions.append((t, pos))
+                    t_delta = t
+                    # print(t, pos)
+
+                    if manual_control:
+                        print(f' >> Current angle: {a:.2f}', end='      \r')
+
+                    if self.track:
+                        self.track_crystal(n=n, angle=a)
+
+                # Stop/interrupt and go to next crystal
+                if msvcrt.kbhit():
+                    key = msvcrt.getch().decode()
+                    if key == ' ':
+                        print('Stopping the stage!')
+                        self.ctrl.stage.stop()
                         break
-                    last_angle = current_angle
-
-                    print(f' >> Current angle: {a:.2f}', end='      \r')
-
-                if self.track:
-                    self.track_crystal(n=n, angle=a)
-
-            # Stop/interrupt and go to next crystal
-            if msvcrt.kbhit():
-                key = msvcrt.getch().decode()
-                if key == ' ':
-                    print('Stopping the stage!')
-                    self.ctrl.stage.stop()
-                    break
-                if key == 'q':
-                    self.ctrl.stage.stop()
-                    raise InterruptedError('Data collection was interrupted!')
+                    if key == 'q':
+                        self.ctrl.stage.stop()
+                        raise InterruptedError('Data collection was interrupted!')
+        finally:
+            monitor.stop()
+
+        if monitor.target_reached.is_set():
+            print('Target angle reached!')
+        elif monitor.stalled.is_set():
+            print(f'Rotation was interrupted (current: {monitor.angle:.2f})')
 
         t1 = time.perf_counter()
         self.cam.stop_record()
@@ -3,6 +3,7 @@ from __future__ import annotations
 import json
 import logging
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 import matplotlib.pyplot as plt
@@ -257,6 +258,11 @@ class Experiment(ExperimentBase):
         self.change_spotsize = self.diff_spotsize != self.image_spotsize
         self.crystal_spread = kwargs.get('crystal_spread', 0.6)
 
+        # segment and save the images in a worker, overlapping with the stage movement
+        self.pipeline = kwargs.get('pipeline', False)
+        # move to the next position while segmenting: True, False, or 'auto'
+        self.prefetch_stage = kwargs.get('prefetch_stage', 'auto')
+
         if self.ctrl.cam.name == 'timepix':
             self.find_crystals = find_crystals_timepix
             self.flatfield = kwargs.get('flatfield', 'flatfield.tiff')
@@ -390,6 +396,58 @@ class Experiment(ExperimentBase):
                 )
                 yield i, (x, y)
 
+    def center_positions(self, i, scan_center):
+        """Generate the stage positions around scan center `i`, without
+        moving the stage.
+
+        Return
+            dct: dict, contains information on positions
+        """
+        center_x, center_y = scan_center
+        for j, (x_offset, y_offset) in enumerate(self.offsets):
+            x = center_x + x_offset
+            y = center_y + y_offset
+
+            dct = {
+                'exp_scan_number': i,
+                'exp_image_number': j,
+                'exp_scan_offset': (x_offset, y_offset),
+                'exp_scan_center': (center_x, center_y),
+                'exp_stage_position': (x, y),
+            }
+            dct['ImageComment'] = 'scan {exp_scan_number} image {exp_image_number}'.format(
+                **dct
+            )
+            yield dct
+
+    def scan_positions(self):
+        """Generate the stage positions for all scan centers, without moving
+        the stage.
+
+        Return
+            dct: dict, contains information on positions
+        """
+        for i, scan_center in enumerate(self.scan_centers):
+            yield from self.center_positions(i, scan_center)
+
+    def move_to_position(self, d_pos, delay=0.05, backlash=False):
+        """Move the stage to the position in `d_pos`, returns False if the
+        position cannot be reached. With `backlash`, approach the position
+        from the common direction (`Stage.set_xy_with_backlash_correction`)."""
+        x, y = d_pos['exp_stage_position']
+        try:
+            if backlash:
+                self.ctrl.stage.set_xy_with_backlash_correction(x=x, y=y)
+            else:
+                self.ctrl.stage.set(x=x, y=y)
+        except ValueError as e:
+            print(e)
+            print(' >> Moving to next position...')
+            print()
+            return False
+        time.sleep(delay)
+        return True
+
     def loop_positions(self, delay=0.05):
         """Loop over positions defined Move the stage to each of the positions
         in self.offsets.
@@ -398,34 +456,16 @@ class Experiment(ExperimentBase):
             dct: dict, contains information on positions
         """
         for i, scan_center in self.loop_centers():
-            center_x, center_y = scan_center
-
-            t = tqdm(self.offsets, desc='                           ')
-            for j, (x_offset, y_offset) in enumerate(t):
-                x = center_x + x_offset
-                y = center_y + y_offset
-                try:
-                    self.ctrl.stage.set(x=x, y=y)
-                except ValueError as e:
-                    print(e)
-                    print(' >> Moving to next position...')
-                    print()
+            t = tqdm(
+                list(self.center_positions(i, scan_center)), desc='                           '
+            )
+            for dct in t:
+                if not self.move_to_position(dct, delay=delay):
                     continue
-                else:
-                    time.sleep(delay)
-                    t.set_description(f'Stage(x={x:7.0f}, y={y:7.0f})')
-
-                    dct = {
-                        'exp_scan_number': i,
-                        'exp_image_number': j,
-                        'exp_scan_offset': (x_offset, y_offset),
-                        'exp_scan_center': (center_x, center_y),
-                        'exp_stage_position': (x, y),
-                    }
-                    dct['ImageComment'] = (
-                        'scan {exp_scan_number} image {exp_image_number}'.format(**dct)
-                    )
-                    yield dct
+                t.set_description(
+                    'Stage(x={:7.0f}, y={:7.0f})'.format(*dct['exp_stage_position'])
+                )
+                yield dct
 
     def loop_crystals(self, crystal_coords, delay=0):
         """Loop over crystal coordinates (pixels) Switch to diffraction mode,
@@ -477,124 +517,260 @@ class Experiment(ExperimentBase):
             h['FlatfieldCorrection'] = True
         return img, h
 
-    def run(self, ctrl=None, **kwargs):
-        """Run serial electron diffraction experiment."""
+    def acquire_image(self, header_keys=None):
+        """Take an image for crystal finding, returns None for dark
+        images."""
+        if self.change_spotsize:
+            self.ctrl.tem.setSpotSize(self.image_spotsize)
 
-        self.initialize_microscope()
+        img, h = self.ctrl.get_image(
+            exposure=self.image_exposure,
+            binsize=self.image_binsize,
+            header_keys=header_keys,
+        )
 
-        header_keys = kwargs.get('header_keys', None)
+        if self.change_spotsize:
+            self.ctrl.tem.setSpotSize(self.image_spotsize)
 
-        d_image = {
-            'exp_neutral_diffshift': self.neutral_beamshift,
-            'exp_neutral_beamshift': self.neutral_diffshift,
-            'exp_image_spotsize': self.image_spotsize,
-            'exp_magnification': self.magnification,
-            'ImageDimensions': self.image_dimensions,
-        }
-        d_diff = {
-            'exp_neutral_diffshift': self.neutral_beamshift,
-            'exp_neutral_beamshift': self.neutral_diffshift,
-            'exp_diff_brightness': self.diff_brightness,
-            'exp_diff_spotsize': self.diff_spotsize,
-            'exp_diff_cameralength': self.diff_cameralength,
-            'exp_diff_difffocus': self.diff_difffocus,
-            'ImagePixelsize': self.diff_pixelsize,
-        }
+        self.ctrl.tem.setSpotSize(self.diff_spotsize)
 
-        self.log.info('d_image', d_image)
-        self.log.info('d_tiff', d_diff)
+        im_mean = img.mean()
+        if im_mean < self.image_threshold:
+            # self.log.debug("Dark image detected (mean=%f)", im_mean)
+            return None
 
-        input("\nPress <ENTER> to start experiment ('Ctrl-C' to interrupt)\n")
+        return self.apply_corrections(img, h)
 
-        for i, d_pos in enumerate(self.loop_positions()):
-            outfile = self.imagedir / f'image_{i:04d}'
+    def process_image(self, img, h, outfile, write=write_hdf5):
+        """Locate the crystals in `img` and save it to `outfile`.
+
+        Return
+            crystal_positions: list of CrystalPosition
+        """
+        crystal_positions = (
+            self.find_crystals(img, self.magnification, spread=self.crystal_spread)
+            * self.image_binsize
+        )
+        h['exp_crystal_coords'] = [(crystal.x, crystal.y) for crystal in crystal_positions]
+
+        write(outfile, img, header=h)
 
-            if self.change_spotsize:
-                self.ctrl.tem.setSpotSize(self.image_spotsize)
+        return crystal_positions
 
+    def collect_diffraction(
+        self, i, crystal_positions, d_pos, d_diff, header_keys=None, write=write_hdf5
+    ):
+        """Collect a diffraction pattern of every crystal in
+        `crystal_positions` at the current stage position."""
+        crystal_coords = [(crystal.x, crystal.y) for crystal in crystal_positions]
+
+        for k, d_cryst in enumerate(self.loop_crystals(crystal_coords)):
+            outfile = self.datadir / f'image_{i:04d}_{k:04d}'
+            comment = f'Image {i} Crystal {k}'
             img, h = self.ctrl.get_image(
-                exposure=self.image_exposure,
-                binsize=self.image_binsize,
+                binsize=self.diff_binsize,
+                exposure=self.diff_exposure,
+                comment=comment,
                 header_keys=header_keys,
             )
+            img, h = self.apply_corrections(img, h)
 
-            if self.change_spotsize:
-                self.ctrl.tem.setSpotSize(self.image_spotsize)
+            for d in (d_diff, d_pos, d_cryst):
+                h.update(d)
 
-            self.ctrl.tem.setSpotSize(self.diff_spotsize)
+            h['crystal_is_isolated'] = crystal_positions[k].isolated
+            h['crystal_clusters'] = crystal_positions[k].n_clusters
+            h['total_area_micrometer'] = crystal_positions[k].area_micrometer
+            h['total_area_pixel'] = crystal_positions[k].area_pixel
 
-            im_mean = img.mean()
-            if im_mean < self.image_threshold:
-                # self.log.debug("Dark image detected (mean=%f)", im_mean)
-                continue
+            # img_processed = neural_network.preprocess(img.astype(float))
+            # quality = neural_network.predict(img_processed)
+            # h["crystal_quality"] = quality
 
-            img, h = self.apply_corrections(img, h)
+            write(outfile, img, header=h)
 
-            crystal_positions = (
-                self.find_crystals(img, self.magnification, spread=self.crystal_spread)
-                * self.image_binsize
-            )
-            crystal_coords = [(crystal.x, crystal.y) for crystal in crystal_positions]
+            if self.sample_rotation_angles:
+                for rotation_angle in self.sample_rotation_angles:
+                    self.log.debug('Rotation angle = %f', rotation_angle)
+                    self.ctrl.stage.a = rotation_angle
+
+                    outfile = self.datadir / f'image_{i:04d}_{k:04d}_{rotation_angle}'
+                    img, h = self.ctrl.get_image(
+                        exposure=self.diff_exposure,
+                        binsize=self.diff_binsize,
+                        comment=comment,
+                        header_keys=header_keys,
+                    )
+                    img, h = self.apply_corrections(img, h)
+
+                    for d in (d_diff, d_pos, d_cryst):
+                        h.update(d)
+
+                    write(outfile, img, header=h)
+
+                self.ctrl.stage.a = 0
+
+    def should_prefetch(self, n_hits, n_images):
+        """Decide whether to move to the next position before the crystals
+        in the current image are known.
+
+        A prefetched move must be undone if crystals are found, so it only
+        pays off if most images are empty. In 'auto' mode, this is
+        estimated from the fraction of images with crystals so far.
+        """
+        if self.prefetch_stage == 'auto':
+            return (n_hits + 1) / (n_images + 2) < 0.5
+        return bool(self.prefetch_stage)
+
+    def run_sequential(self, d_image, d_diff, header_keys=None):
+        """Move, image, find crystals, save and collect diffraction data for
+        one position at a time."""
+        for i, d_pos in enumerate(self.loop_positions()):
+            outfile = self.imagedir / f'image_{i:04d}'
 
+            ret = self.acquire_image(header_keys=header_keys)
+            if ret is None:
+                continue
+
+            img, h = ret
             for d in (d_image, d_pos):
                 h.update(d)
-            h['exp_crystal_coords'] = crystal_coords
 
-            write_hdf5(outfile, img, header=h)
+            crystal_positions = self.process_image(img, h, outfile)
 
-            ncrystals = len(crystal_coords)
+            ncrystals = len(crystal_positions)
             if ncrystals == 0:
                 continue
 
             self.log.info('%d crystals found in %s', ncrystals, outfile)
 
-            for k, d_cryst in enumerate(self.loop_crystals(crystal_coords)):
-                outfile = self.datadir / f'image_{i:04d}_{k:04d}'
-                comment = f'Image {i} Crystal {k}'
-                img, h = self.ctrl.get_image(
-                    binsize=self.diff_binsize,
-                    exposure=self.diff_exposure,
-                    comment=comment,
-                    header_keys=header_keys,
+            self.collect_diffraction(i, crystal_positions, d_pos, d_diff, header_keys)
+
+            self.image_mode()
+
+    def run_pipelined(self, d_image, d_diff, header_keys=None, delay=0.05):
+        """Collect the data with the crystal finding and file writing in
+        worker threads.
+
+        While the crystals in an image are located, the stage moves on to
+        the next position if `should_prefetch` says so, and moves back with
+        backlash correction if any crystals are found. The diffraction
+        patterns are collected as soon as the crystal positions are known.
+        All images are saved in the background, in order.
+        """
+        positions = list(self.scan_positions())
+
+        analysis = ThreadPoolExecutor(max_workers=1, thread_name_prefix='sed_analysis')
+        writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='sed_writer')
+
+        def write_hdf5_logged(outfile, img, header):
+            try:
+                write_hdf5(outfile, img, header=header)
+            except Exception as e:
+                self.log.error('Could not write %s: %s', outfile, e)
+
+        def write(outfile, img, header):
+            writer.submit(write_hdf5_logged, outfile, img, header)
+
+        n_hits = n_images = n_prefetched = 0
+        current = None  # index of the position the stage is at
+        t0 = time.perf_counter()
+
+        try:
+            t = tqdm(positions, desc='                           ')
+            for i, d_pos in enumerate(t):
+                outfile = self.imagedir / f'image_{i:04d}'
+
+                if current != i and not self.move_to_position(d_pos, delay=delay):
+                    continue
+                current = i
+                t.set_description(
+                    'Stage(x={:7.0f}, y={:7.0f})'.format(*d_pos['exp_stage_position'])
                 )
-                img, h = self.apply_corrections(img, h)
 
-                for d in (d_diff, d_pos, d_cryst):
+                ret = self.acquire_image(header_keys=header_keys)
+                if ret is None:
+                    continue
+
+                img, h = ret
+                for d in (d_image, d_pos):
                     h.update(d)
 
-                h['crystal_is_isolated'] = crystal_positions[k].isolated
-                h['crystal_clusters'] = crystal_positions[k].n_clusters
-                h['total_area_micrometer'] = crystal_positions[k].area_micrometer
-                h['total_area_pixel'] = crystal_positions[k].area_pixel
+                future = analysis.submit(self.process_image, img, h, outfile, write=write)
+
+                if i + 1 < len(positions) and self.should_prefetch(n_hits, n_images):
+                    n_prefetched += 1
+                    if self.move_to_position(positions[i + 1], delay=delay):
+                        current = i + 1
+
+                crystal_positions = future.result()
+                n_images += 1
 
-                # img_processed = neural_network.preprocess(img.astype(float))
-                # quality = neural_network.predict(img_processed)
-                # h["crystal_quality"] = quality
+                ncrystals = len(crystal_positions)
+                if ncrystals == 0:
+                    continue
 
-                write_hdf5(outfile, img, header=h)
+                n_hits += 1
+                self.log.info('%d crystals found in %s', ncrystals, outfile)
 
-                if self.sample_rotation_angles:
-                    for rotation_angle in self.sample_rotation_angles:
-                        self.log.debug('Rotation angle = %f', rotation_angle)
-                        self.ctrl.stage.a = rotation_angle
+                if current != i:
+                    # coming back against the scan direction, eliminate the backlash
+                    if not self.move_to_position(d_pos, delay=delay, backlash=True):
+                        continue
+                    current = i
 
-                        outfile = self.datadir / f'image_{i:04d}_{k:04d}_{rotation_angle}'
-                        img, h = self.ctrl.get_image(
-                            exposure=self.diff_exposure,
-                            binsize=self.diff_binsize,
-                            comment=comment,
-                            header_keys=header_keys,
-                        )
-                        img, h = self.apply_corrections(img, h)
+                self.collect_diffraction(
+                    i, crystal_positions, d_pos, d_diff, header_keys, write=write
+                )
 
-                        for d in (d_diff, d_pos, d_cryst):
-                            h.update(d)
+                self.image_mode()
+        finally:
+            analysis.shutdown()
+            writer.shutdown()
+
+        dt = time.perf_counter() - t0
+        self.log.info(
+            'serialED: %d positions in %.0f s (%.0f / hour), %d with crystals, %d prefetched',
+            len(positions),
+            dt,
+            3600 * len(positions) / dt if dt else 0,
+            n_hits,
+            n_prefetched,
+        )
 
-                        write_hdf5(outfile, img, header=h)
+    def run(self, ctrl=None, **kwargs):
+        """Run serial electron diffraction experiment."""
 
-                    self.ctrl.stage.a = 0
+        self.initialize_microscope()
 
-            self.image_mode()
+        header_keys = kwargs.get('header_keys', None)
+
+        d_image = {
+            'exp_neutral_diffshift': self.neutral_beamshift,
+            'exp_neutral_beamshift': self.neutral_diffshift,
+            'exp_image_spotsize': self.image_spotsize,
+            'exp_magnification': self.magnification,
+            'ImageDimensions': self.image_dimensions,
+        }
+        d_diff = {
+            'exp_neutral_diffshift': self.neutral_beamshift,
+            'exp_neutral_beamshift': self.neutral_diffshift,
+            'exp_diff_brightness': self.diff_brightness,
+            'exp_diff_spotsize': self.diff_spotsize,
+            'exp_diff_cameralength': self.diff_cameralength,
+            'exp_diff_difffocus': self.diff_difffocus,
+            'ImagePixelsize': self.diff_pixelsize,
+        }
+
+        self.log.info('d_image', d_image)
+        self.log.info('d_tiff', d_diff)
+
+        input("\nPress <ENTER> to start experiment ('Ctrl-C' to interrupt)\n")
+
+        if kwargs.get('pipeline', self.pipeline):
+            self.run_pipelined(d_image, d_diff, header_keys=header_keys)
+        else:
+            self.run_sequential(d_image, d_diff, header_keys=header_keys)
 
         print('\n\nData collection finished.')
 
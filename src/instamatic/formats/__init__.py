@@ -7,12 +7,13 @@ from pathlib import Path
 import h5py
 import numpy as np
 import tifffile
-import yaml
 
 from .adscimage import read_adsc, write_adsc
 from .csvIO import read_csv, read_ycsv, write_csv, write_ycsv
+from .header import DEFAULT_HEADER_CODEC, decode_header, encode_header
 from .mrc import read_image as read_mrc
 from .mrc import write_image as write_mrc
+from .stack import open_stack
 from .xdscbf import write as write_cbf
 
 
@@ -34,7 +35,7 @@ def read_image(fname: str) -> (np.array, dict):
     return img, h
 
 
-def write_tiff(fname: str, data, header: dict = None):
+def write_tiff(fname: str, data, header: dict = None, codec: str = DEFAULT_HEADER_CODEC):
     """Simple function to write a tiff file.
 
     fname: str,
@@ -43,10 +44,12 @@ def write_tiff(fname: str, data, header: dict = None):
         numpy array containing image data
     header: dict,
         dictionary containing the metadata that should be saved
-        key/value pairs are stored as yaml in the TIFF ImageDescription tag
+        key/value pairs are stored in the TIFF ImageDescription tag
+    codec: str,
+        serialization of the header, 'json' or 'yaml' (see `encode_header`)
     """
     if isinstance(header, dict):
-        header = yaml.dump(header)
+        header = encode_header(header, codec=codec)
     if not header:
         header = ''
 
@@ -73,7 +76,7 @@ def read_tiff(fname: str) -> (np.array, dict):
     img = page.asarray()
 
     if page.software == 'instamatic':
-        header = yaml.load(page.tags['ImageDescription'].value, Loader=yaml.Loader)
+        header = decode_header(page.tags['ImageDescription'].value)
     elif tiff.is_tvips:
         header = tiff.tvips_metadata
     else:
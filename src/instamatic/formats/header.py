@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import yaml
+
+# Use the LibYAML bindings when PyYAML was compiled with them, these are
+# an order of magnitude faster than the pure python loader/dumper
+YAML_LOADER = getattr(yaml, 'CLoader', yaml.Loader)
+YAML_DUMPER = getattr(yaml, 'CDumper', yaml.Dumper)
+
+HEADER_MARKER = '#instamatic-header:'
+HEADER_CODECS = ('json', 'yaml')
+DEFAULT_HEADER_CODEC = 'json'
+
+
+def _json_default(obj: Any) -> Any:
+    """Convert objects that the json module does not know about."""
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, Path):
+        return str(obj)
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+
+class HeaderDumper(YAML_DUMPER):
+    """Yaml dumper that stores numpy scalars as native python numbers."""
+
+    def represent_data(self, data):
+        if isinstance(data, np.generic):
+            data = data.item()
+        return super().represent_data(data)
+
+
+def encode_header(header: dict, codec: str = DEFAULT_HEADER_CODEC) -> str:
+    """Serialize an image header to a string for the TIFF ImageDescription
+    tag.
+
+    The first line holds a marker with the codec name, so that the header
+    can be decoded without guessing. The marker is a YAML comment, so the
+    headers remain readable by the (yaml-based) reader of older versions.
+
+    Parameters
+    ----------
+    header : dict
+        Header to serialize
+    codec : str, optional
+        'json' (compact, fast) or 'yaml' (LibYAML if available), by default 'json'.
+        If the header contains values that cannot be stored as json, it is
+        written as yaml instead.
+
+    Returns
+    -------
+    str
+        Serialized header
+    """
+    if codec not in HEADER_CODECS:
+        raise ValueError(f'Unknown header codec: {codec!r}, must be one of {HEADER_CODECS}')
+
+    if codec == 'json':
+        try:
+            body = json.dumps(
+                header,
+                default=_json_default,
+                separators=(',', ':'),
+                allow_nan=False,
+            )
+        except (TypeError, ValueError):
+            codec = 'yaml'
+
+    if codec == 'yaml':
+        body = yaml.dump(header, Dumper=HeaderDumper)
+
+    return f'{HEADER_MARKER} {codec}\n{body}'
+
+
+def decode_header(description: str) -> dict:
+    """Deserialize a header written by `encode_header`.
+
+    Headers without a marker (written by older versions of instamatic)
+    are loaded as yaml.
+
+    Parameters
+    ----------
+    description : str
+        Contents of the TIFF ImageDescription tag
+
+    Returns
+    -------
+    dict
+        Deserialized header
+    """
+    if description.startswith(HEADER_MARKER):
+        marker, _, body = description.partition('\n')
+        codec = marker[len(HEADER_MARKER) :].strip()
+    else:
+        codec, body = 'yaml', description
+
+    if codec == 'json':
+        header = json.loads(body)
+    elif codec == 'yaml':
+        header = yaml.load(body, Loader=YAML_LOADER)
+    else:
+        raise ValueError(f'Unknown header codec: {codec!r}')
+
+    return header if header is not None else {}
@@ -0,0 +1,303 @@
+from __future__ import annotations
+
+import glob
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Hashable, Optional, Sequence, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+
+
+class LRUCache:
+    """Thread-safe least-recently-used cache of numpy arrays, bounded by the
+    total size of the arrays (`max_bytes`)."""
+
+    def __init__(self, max_bytes: int):
+        super().__init__()
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._data: OrderedDict[Hashable, np.ndarray] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
+
+    def get(self, key: Hashable) -> Optional[np.ndarray]:
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def put(self, key: Hashable, value: np.ndarray) -> None:
+        with self._lock:
+            if key in self._data:
+                self.nbytes -= self._data.pop(key).nbytes
+            self._data[key] = value
+            self.nbytes += value.nbytes
+            # always keep the last item, even if it does not fit
+            while self.nbytes > self.max_bytes and len(self._data) > 1:
+                _, evicted = self._data.popitem(last=False)
+                self.nbytes -= evicted.nbytes
+
+    def pop(self, key: Hashable) -> None:
+        with self._lock:
+            value = self._data.pop(key, None)
+            if value is not None:
+                self.nbytes -= value.nbytes
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.nbytes = 0
+
+
+def bin2(img: np.ndarray) -> np.ndarray:
+    """Downsample `img` by a factor 2 by averaging blocks of 2x2 pixels,
+    an odd last row/column is dropped."""
+    h, w = img.shape[0] // 2 * 2, img.shape[1] // 2 * 2
+    img = img[:h, :w].astype(np.float32)
+    return (img[0::2, 0::2] + img[1::2, 0::2] + img[0::2, 1::2] + img[1::2, 1::2]) / 4
+
+
+class ImageStack:
+    """Lazy, read-only access to a stack of images (a series of files, or
+    the frames of a single file), for browsing large datasets with bounded
+    memory.
+
+    Frames are read on demand and kept in an LRU cache of `cache_size` MB.
+    After every access, the next `prefetch` frames in the direction of
+    browsing (and the previous one) are read in a background thread.
+    Thumbnails are generated once from the image pyramid (2x2 binning)
+    and kept in a separate cache of `thumbnail_cache_size` MB.
+
+    Use `open_stack` to open a stack for a given path.
+
+    Usage:
+        stack = open_stack('data/*.tiff')
+        img = stack[100]
+        thumb = stack.thumbnail(100, size=128)
+    """
+
+    def __init__(
+        self,
+        cache_size: float = 512,
+        prefetch: int = 2,
+        thumbnail_cache_size: float = 64,
+    ):
+        super().__init__()
+        self.cache = LRUCache(int(cache_size * MB))
+        self.thumbnails = LRUCache(int(thumbnail_cache_size * MB))
+        self.prefetch = prefetch
+
+        self._last = None
+        self._pending = set()
+        self._pending_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='prefetch')
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}(n={len(self)})'
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    def _read(self, i: int) -> np.ndarray:
+        """Read frame `i` from disk."""
+        raise NotImplementedError
+
+    def header(self, i: int) -> dict:
+        """Return the metadata for frame `i`."""
+        return {}
+
+    def _index(self, i: int) -> int:
+        n = len(self)
+        if not -n <= i < n:
+            raise IndexError(f'Frame {i} out of range for stack of {n} frames')
+        return i % n
+
+    def _load(self, i: int) -> np.ndarray:
+        img = self.cache.get(i)
+        if img is None:
+            img = self._read(i)
+            img.flags.writeable = False
+            self.cache.put(i, img)
+        return img
+
+    def __getitem__(self, i: int) -> np.ndarray:
+        i = self._index(i)
+        img = self._load(i)
+
+        step = -1 if self._last is not None and i < self._last else 1
+        self._last = i
+        if self.prefetch:
+            self._schedule([i + step * k for k in range(1, self.prefetch + 1)] + [i - step])
+
+        return img
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def _schedule(self, indices: Sequence[int]) -> None:
+        """Read frames `indices` in the background."""
+        for i in indices:
+            if not 0 <= i < len(self) or i in self.cache:
+                continue
+            with self._pending_lock:
+                if i in self._pending:
+                    continue
+                self._pending.add(i)
+            self._executor.submit(self._prefetch, i)
+
+    def _prefetch(self, i: int) -> None:
+        try:
+            self._load(i)
+        except Exception as e:
+            logger.debug('Could not prefetch frame %d: %s', i, e)
+        finally:
+            with self._pending_lock:
+                self._pending.discard(i)
+
+    def thumbnail(self, i: int, size: int = 128) -> np.ndarray:
+        """Return a thumbnail of frame `i` from the image pyramid, the first
+        level with both dimensions at most `size` pixels."""
+        i = self._index(i)
+        key = (i, size)
+
+        thumb = self.thumbnails.get(key)
+        if thumb is None:
+            img = self.cache.get(i)
+            if img is None:
+                # do not push full frames out of the cache for thumbnails
+                img = self._read(i)
+            thumb = img
+            while max(thumb.shape[:2]) > size and min(thumb.shape[:2]) > 1:
+                thumb = bin2(thumb)
+            thumb = thumb.astype(img.dtype, copy=False)
+            thumb.flags.writeable = False
+            self.thumbnails.put(key, thumb)
+
+        return thumb
+
+    def close(self) -> None:
+        """Stop prefetching and release the cached frames."""
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        self.cache.clear()
+        self.thumbnails.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, kind, value, traceback):
+        self.close()
+
+
+class FileSeries(ImageStack):
+    """Stack of single images, one per file, in any format supported by
+    `read_image` (TIFF, HDF5, MRC, SMV)."""
+
+    def __init__(self, fns: Sequence[str], **kwargs):
+        super().__init__(**kwargs)
+        self.fns = [Path(fn) for fn in fns]
+
+    def __len__(self) -> int:
+        return len(self.fns)
+
+    def _read(self, i: int) -> np.ndarray:
+        from instamatic.formats import read_image
+
+        img, _ = read_image(self.fns[i])
+        return img
+
+    def header(self, i: int) -> dict:
+        from instamatic.formats import read_image
+
+        _, h = read_image(self.fns[self._index(i)])
+        return h
+
+
+class MrcStack(ImageStack):
+    """Frames of an MRC file, only the requested frames are read from
+    disk."""
+
+    def __init__(self, fn: str, **kwargs):
+        from instamatic.formats.mrc import count_images
+
+        super().__init__(**kwargs)
+        self.fn = Path(fn)
+        self.n = int(count_images(str(fn)))
+
+    def __len__(self) -> int:
+        return self.n
+
+    def _read(self, i: int) -> np.ndarray:
+        from instamatic.formats.mrc import read_image
+
+        img, _ = read_image(str(self.fn), index=i)
+        return img
+
+
+class HDF5Stack(ImageStack):
+    """Frames of dataset `key` in an HDF5 file, only the requested frames
+    are read from disk.
+
+    The header is the attributes of the dataset.
+    """
+
+    def __init__(self, fn: str, key: str = 'data', **kwargs):
+        import h5py
+
+        super().__init__(**kwargs)
+        self.fn = Path(fn)
+        self.h5 = h5py.File(fn, 'r')
+        self.data = self.h5[key]
+
+    def __len__(self) -> int:
+        return 1 if self.data.ndim == 2 else len(self.data)
+
+    def _read(self, i: int) -> np.ndarray:
+        return self.data[()] if self.data.ndim == 2 else self.data[i]
+
+    def header(self, i: int) -> dict:
+        return dict(self.data.attrs)
+
+    def close(self) -> None:
+        super().close()
+        self.h5.close()
+
+
+def open_stack(path: Union[str, Sequence[str]], **kwargs) -> ImageStack:
+    """Open `path` as an `ImageStack`.
+
+    path: str or list of str,
+        an MRC or HDF5 file (all frames in the file), a directory (all
+        image files in it), a glob pattern, or a list of files
+    **kwargs:
+        passed to `ImageStack`, i.e. `cache_size`, `prefetch`
+    """
+    if not isinstance(path, (str, Path)):
+        return FileSeries(path, **kwargs)
+
+    ext = Path(path).suffix.lower()
+    if Path(path).is_dir():
+        exts = ('.tif', '.tiff', '.h5', '.hdf5', '.img', '.smv', '.mrc')
+        fns = sorted(fn for fn in Path(path).iterdir() if fn.suffix.lower() in exts)
+        return FileSeries(fns, **kwargs)
+    elif glob.has_magic(str(path)):
+        return FileSeries(sorted(glob.glob(str(path))), **kwargs)
+    elif ext == '.mrc':
+        return MrcStack(path, **kwargs)
+    elif ext in ('.h5', '.hdf5'):
+        return HDF5Stack(path, **kwargs)
+    else:
+        return FileSeries([path], **kwargs)
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+from pathlib import Path
+
 import matplotlib.pyplot as plt
 import numpy as np
 from pyserialem.montage import make_grid, sorted_grid_indices
@@ -75,6 +77,12 @@ class GridMontage:
         grid_indices = sorted_grid_indices(grid)
         px_coords = grid_indices * vect
 
+        # pixel coordinates of the images in the montage (see `Montage.calculate_montage_coords`)
+        montage_grid = make_grid(
+            (nx, ny), direction=self.direction, zigzag=self.zigzag, flip=not self.flip
+        )
+        self.tile_coords = sorted_grid_indices(montage_grid) * vect
+
         px_center = vect * ((np.array(grid.shape) / 2) - 0.5)
 
         self.stagematrix = self.ctrl.get_stagematrix(binning=binning)
@@ -93,7 +101,7 @@ class GridMontage:
         self.abs_mag_index = self.ctrl.magnification.absolute_index
         self.spotsize = self.ctrl.spotsize
         self.binning = binning
-        self.pixelsize = config.calibration[mode]['pixelsize'][magnification]  # unbinned
+        self.pixelsize = config.calibration.table[mode].pixelsize(magnification)  # unbinned
 
         print('Setting up gridscan.')
         print(f'  Mag: {self.magnification}x')
@@ -108,10 +116,26 @@ class GridMontage:
         print(f'  Spot size: {self.spotsize}')
         print(f'  Binning: {self.binning}')
 
-    def start(self):
-        """Start the experiment."""
+    def start(self, drc: str = None):
+        """Start the experiment.
+
+        The images are added to a multi-resolution pyramid as they are
+        acquired (`pyramid` in the output directory), which can be browsed
+        without stitching the full montage.
+
+        drc : str
+            Path of the output directory. If `None`, it defaults to the instamatic data directory defined in the config.
+        """
+        from instamatic.io import get_new_work_subdirectory
+        from instamatic.pyramid import MontagePyramid
+
         ctrl = self.ctrl
 
+        if not drc:
+            drc = get_new_work_subdirectory('montage')
+        self.drc = Path(drc)
+        self.pyramid = MontagePyramid(self.drc / 'pyramid', overwrite=True)
+
         buffer = []
 
         def eliminate_backlash(ctrl):
@@ -120,6 +144,7 @@ class GridMontage:
 
         def acquire_image(ctrl):
             img, h = ctrl.get_image()
+            self.pyramid.add_tile(img, self.tile_coords[len(buffer)])
             buffer.append((img, h))
 
         def post_acquire(ctrl):
@@ -134,18 +159,19 @@ class GridMontage:
 
         self.buffer = buffer
 
-        self.save()
+        self.save(self.drc)
 
     def to_montage(self):
         """Convert the experimental data to a `Montage` object."""
         images = [im for im, h in self.buffer]
-        m = Montage(
+        m = InstamaticMontage(
             images=images,
             gridspec=self.gridspec,
             overlap=self.overlap,
             stagematrix=self.stagematrix,
             stagecoords=self.stagecoords,
             pixelsize=self.pixelsize,
+            pyramid=getattr(self, 'pyramid', None),
         )
         m.update_gridspec(flip=not self.flip)  # BUG: Work-around for gridspec madness
         # Possibly related is that images are rotated 90 deg. in SerialEM mrc files
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import queue
 import threading
 from tkinter import *
 from tkinter.ttk import *
@@ -118,12 +119,14 @@ class ExperimentalcRED(LabelFrame, ModuleFrameMixin):
                 command=self.toggle_footfree,
             ).grid(row=9, column=2, sticky='W')
 
-        self.lb_coll0 = Label(frame, text='')
+        self.lb_coll0 = Label(frame, textvariable=self.var_frame_metrics)
         self.lb_coll1 = Label(frame, text='')
         self.lb_coll2 = Label(frame, text='')
         self.lb_coll0.grid(row=10, column=0, columnspan=3, sticky='EW')
         self.lb_coll1.grid(row=11, column=0, columnspan=3, sticky='EW')
         self.lb_coll2.grid(row=12, column=0, columnspan=3, sticky='EW')
+        self.lb_coll3 = Label(frame, textvariable=self.var_drift)
+        self.lb_coll3.grid(row=13, column=0, columnspan=3, sticky='EW')
         frame.grid_columnconfigure(1, weight=1)
         frame.pack(side='top', fill='x', expand=False, padx=10, pady=10)
 
@@ -165,6 +168,11 @@ class ExperimentalcRED(LabelFrame, ModuleFrameMixin):
 
         self.stopEvent = threading.Event()
 
+        # results of the worker threads, displayed from the Tk thread by `poll_status`
+        self.status_queue = queue.Queue()
+        self.status_poll_delay = 250  # ms
+        self.after(self.status_poll_delay, self.poll_status)
+
     def init_vars(self):
         self.var_exposure_time = DoubleVar(value=0.5)
         self.var_unblank_beam = BooleanVar(value=False)
@@ -183,6 +191,9 @@ class ExperimentalcRED(LabelFrame, ModuleFrameMixin):
         self.var_save_dials = BooleanVar(value=True)
         self.var_save_red = BooleanVar(value=True)
 
+        self.var_frame_metrics = StringVar(value='')
+        self.var_drift = StringVar(value='')
+
     def start_collection(self):
         # TODO: make a pop up window with the STOP button?
         if self.var_toggle_diff_defocus.get():
@@ -201,6 +212,8 @@ class ExperimentalcRED(LabelFrame, ModuleFrameMixin):
             )
 
         self.parent.bind_all('<space>', self.stop_collection)
+        self.var_frame_metrics.set('')
+        self.var_drift.set('')
 
         params = self.get_params()
         self.q.put(('cred', params))
@@ -230,9 +243,35 @@ class ExperimentalcRED(LabelFrame, ModuleFrameMixin):
             'write_dials': self.var_save_dials.get(),
             'write_red': self.var_save_red.get(),
             'stop_event': self.stopEvent,
+            'frame_metrics_callback': self.show_frame_metrics,
+            'drift_callback': self.show_drift,
         }
         return params
 
+    def show_frame_metrics(self, metrics):
+        """Display the quality metrics of the last analyzed frame.
+
+        Called from the worker thread of the monitor, so the text is
+        queued for `poll_status`.
+        """
+        self.status_queue.put((self.var_frame_metrics, str(metrics)))
+
+    def poll_status(self):
+        """Display the queued results of the worker threads (runs on the Tk
+        thread)."""
+        while True:
+            try:
+                var, text = self.status_queue.get_nowait()
+            except queue.Empty:
+                break
+            var.set(text)
+        self.after(self.status_poll_delay, self.poll_status)
+
+    def show_drift(self, estimate):
+        """Display the drift of the last registered frame (called from the
+        worker thread of the drift tracker, see `show_frame_metrics`)."""
+        self.status_queue.put((self.var_drift, str(estimate)))
+
     def toggle_interval_buttons(self):
         enable = self.var_enable_image_interval.get()
         if enable:
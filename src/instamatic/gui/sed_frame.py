@@ -26,6 +26,8 @@ PARAMS = {
     'image_spotsize': 4,
     'image_threshold': 10,
     'crystal_spread': 0.6,
+    'pipeline': False,
+    'prefetch_stage': 'auto',
 }
 
 
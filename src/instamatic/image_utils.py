@@ -41,20 +41,14 @@ def rotate_image(arr, mode: str, mag: int) -> np.array:
     arr : np.array
         Flipped and rotated image array
     """
-    try:
-        k = config.calibration[mode]['rot90'][mag]
-    except KeyError:
-        k = 0
+    calib = config.calibration.table[mode]
 
-    flipud = config.calibration[mode].get('flipud', False)
-    fliplr = config.calibration[mode].get('fliplr', False)
-
-    if flipud:
+    if calib.flipud:
         arr = np.flipud(arr)
-    if fliplr:
+    if calib.fliplr:
         arr = np.fliplr(arr)
 
-    arr = np.rot90(arr, k)
+    arr = np.rot90(arr, calib.rot90(mag))
 
     return arr
 
@@ -1,7 +1,252 @@
 from __future__ import annotations
 
+from typing import Optional, Sequence
+
 import numpy as np
-from numpy.fft import fft2, ifft2
+from scipy import fft
+
+
+def _as_float(img: np.ndarray) -> np.ndarray:
+    """Keep double precision if given, otherwise calculate in single
+    precision, which is about twice as fast."""
+    img = np.asarray(img)
+    return img.astype(np.float64 if img.dtype == np.float64 else np.float32, copy=False)
+
+
+def _wrap(peak: Sequence[int], shape: Sequence[int]) -> np.ndarray:
+    """Convert a peak position in a (circular) correlation array to a
+    signed shift."""
+    peak = np.array(peak, dtype=float)
+    shape = np.array(shape)
+    peak[peak > shape // 2] -= shape[peak > shape // 2]
+    return peak
+
+
+def _hermitian_weights(n: int) -> np.ndarray:
+    """Weights of the columns of an `rfft2` spectrum of `n` columns, the
+    columns that stand for a conjugate pair are counted twice."""
+    weights = np.full(n // 2 + 1, 2.0)
+    weights[0] = 1
+    if n % 2 == 0:
+        weights[-1] = 1
+    return weights
+
+
+class Registrator:
+    """Register images against a fixed reference image using phase
+    correlation.
+
+    The spectrum of the reference is calculated once (`scipy.fft.rfft2`)
+    and reused for every image that is registered against it, so that
+    each registration costs one forward and one inverse real FFT. The
+    shift is found on the integer grid first and optionally refined by
+    evaluating the correlation on a fine grid (`upsample_factor`) around
+    the peak only, using a matrix-multiply DFT [1].
+
+    The shift follows the convention of `skimage.registration.phase_cross_correlation`:
+    shifting the moving image by `shift` registers it with the reference.
+
+    Parameters
+    ----------
+    reference : np.array
+        Reference image, can be set later with `set_reference`
+    upsample_factor : int
+        Register to 1/`upsample_factor` of a pixel, 1 for integer shifts
+    window : str
+        Apply a window (`hann`) to the images to suppress the edges
+    pad : bool
+        Zero-pad the images to a size that is fast for the FFT
+    normalization : str
+        `phase` for phase correlation, None for plain cross correlation
+    workers : int
+        Number of threads for the FFTs, -1 for all cores
+
+    Usage:
+        reg = Registrator(img0, upsample_factor=10)
+        shift = reg.register(img1)
+        shifts = reg.register_stack(stack)
+
+    [1] Guizar-Sicairos, Thurman & Fienup, "Efficient subpixel image
+        registration algorithms", Optics Letters 33, 156-158 (2008)
+    """
+
+    def __init__(
+        self,
+        reference: Optional[np.ndarray] = None,
+        upsample_factor: int = 1,
+        window: Optional[str] = None,
+        pad: bool = False,
+        normalization: Optional[str] = 'phase',
+        workers: int = -1,
+    ):
+        super().__init__()
+        if window not in (None, 'hann'):
+            raise ValueError(f'Unknown window: {window!r}')
+        if normalization not in (None, 'phase'):
+            raise ValueError(f'Unknown normalization: {normalization!r}')
+
+        self.upsample_factor = upsample_factor
+        self.window = window
+        self.pad = pad
+        self.normalization = normalization
+        self.workers = workers
+
+        self.shape = None
+        self._window = None
+        self._f0 = None
+
+        if reference is not None:
+            self.set_reference(reference)
+
+    def __repr__(self):
+        name = self.__class__.__name__
+        return f'{name}(shape={self.shape}, upsample_factor={self.upsample_factor})'
+
+    def set_reference(self, reference: np.ndarray) -> None:
+        """Set the reference image and cache its spectrum."""
+        reference = _as_float(reference)
+        if reference.ndim != 2:
+            raise ValueError(f'Reference must be a 2D image, got shape {reference.shape}')
+
+        self.shape = reference.shape
+        if self.pad:
+            self.fft_shape = tuple(fft.next_fast_len(n, real=True) for n in self.shape)
+        else:
+            self.fft_shape = self.shape
+
+        if self.window == 'hann':
+            from scipy.signal.windows import hann
+
+            self._window = np.outer(hann(self.shape[0]), hann(self.shape[1]))
+            self._window = self._window.astype(reference.dtype)
+
+        self._f0 = self._spectrum(reference)
+        self._norm0 = self._norm(self._f0)
+
+    def _spectrum(self, images: np.ndarray) -> np.ndarray:
+        """Apply the window and return the spectrum of the last 2 axes."""
+        if images.shape[-2:] != self.shape:
+            raise ValueError(f'Image shape {images.shape[-2:]} does not match {self.shape}')
+        if self.window or self.pad:
+            # subtract the mean, so that the window/padding does not add an edge
+            images = images - images.mean(axis=(-2, -1), keepdims=True)
+        if self._window is not None:
+            images = images * self._window
+        return fft.rfft2(images, s=self.fft_shape, workers=self.workers)
+
+    def _cross_power(self, f1: np.ndarray) -> np.ndarray:
+        product = self._f0 * f1.conj()
+        if self.normalization == 'phase':
+            eps = np.finfo(product.real.dtype).eps
+            product /= np.maximum(np.abs(self._f0) * np.abs(f1), eps)
+        return product
+
+    def correlate(self, moving: np.ndarray) -> np.ndarray:
+        """Return the (circular) correlation array of `moving` with the
+        reference, the peak is at the shift between them."""
+        if self._f0 is None:
+            raise RuntimeError('No reference image set, use `set_reference` first.')
+        f1 = self._spectrum(_as_float(moving))
+        return fft.irfft2(self._cross_power(f1), s=self.fft_shape, workers=self.workers)
+
+    def _refine(self, product: np.ndarray, shift: np.ndarray) -> tuple[np.ndarray, float]:
+        """Evaluate the correlation on a grid of 1/`upsample_factor` pixel
+        in a window of 1.5 pixel around `shift`, and return the position
+        and height of the maximum."""
+        u = self.upsample_factor
+        size = int(np.ceil(u * 1.5))
+        offset = np.fix(size / 2)
+        shift = np.round(shift * u) / u
+        m, n = self.fft_shape
+
+        rows = shift[0] + (np.arange(size) - offset) / u
+        cols = shift[1] + (np.arange(size) - offset) / u
+
+        # the correlation is real, so the half spectrum of `rfft2` is enough
+        kr = np.exp(2j * np.pi * np.outer(rows, fft.fftfreq(m)))
+        kc = np.exp(2j * np.pi * np.outer(fft.rfftfreq(n), cols))
+        corr = (kr @ (product * _hermitian_weights(n)) @ kc).real / (m * n)
+
+        i, j = np.unravel_index(np.argmax(corr), corr.shape)
+        return shift + (np.array([i, j]) - offset) / u, corr[i, j]
+
+    def _norm(self, f: np.ndarray) -> float:
+        """Return the L2 norm of an image from its spectrum (Parseval)."""
+        weights = _hermitian_weights(self.fft_shape[1])
+        return np.sqrt(np.sum(weights * np.abs(f) ** 2) / np.prod(self.fft_shape))
+
+    def _register_spectrum(self, f1: np.ndarray) -> tuple[np.ndarray, float]:
+        product = self._cross_power(f1)
+        corr = fft.irfft2(product, s=self.fft_shape, workers=self.workers)
+        peak = np.unravel_index(np.argmax(corr), corr.shape)
+        shift, value = _wrap(peak, corr.shape), corr[peak]
+        if self.upsample_factor > 1:
+            shift, value = self._refine(product, shift)
+        if self.normalization is None:
+            # scale to 1 for identical images, like phase correlation
+            value /= max(self._norm0 * self._norm(f1), np.finfo(float).tiny)
+        return shift, value
+
+    def register(self, moving: np.ndarray, return_peak: bool = False):
+        """Return the translation of `moving` with respect to the reference.
+
+        Parameters
+        ----------
+        moving : np.array
+            Image with the same shape as the reference
+        return_peak : bool
+            Also return the height of the correlation peak, a measure for the
+            quality of the match, 1 for identical images
+
+        Returns
+        -------
+        shift : np.array
+            (row, col) shift that registers `moving` with the reference
+        """
+        if self._f0 is None:
+            raise RuntimeError('No reference image set, use `set_reference` first.')
+        shift, peak = self._register_spectrum(self._spectrum(_as_float(moving)))
+        return (shift, peak) if return_peak else shift
+
+    def register_stack(
+        self,
+        stack: Sequence[np.ndarray],
+        batch_size: int = 16,
+        return_peak: bool = False,
+    ):
+        """Register every image in `stack` against the reference.
+
+        The FFTs are calculated for `batch_size` images at a time, which
+        lets `scipy.fft` spread the work over the workers and bounds the
+        memory that is used for large stacks.
+
+        Parameters
+        ----------
+        stack : np.array or sequence of np.array
+            3D array or sequence of images with the same shape as the reference
+        batch_size : int
+            Number of images to transform at a time
+        return_peak : bool
+            Also return the height of the correlation peaks
+
+        Returns
+        -------
+        shifts : np.array
+            (n, 2) array with the shift of every image
+        """
+        if self._f0 is None:
+            raise RuntimeError('No reference image set, use `set_reference` first.')
+
+        shifts = np.zeros((len(stack), 2))
+        peaks = np.zeros(len(stack))
+
+        for start in range(0, len(stack), batch_size):
+            indices = range(start, min(start + batch_size, len(stack)))
+            batch = _as_float(np.stack([stack[i] for i in indices]))
+            for i, f1 in enumerate(self._spectrum(batch), start=start):
+                shifts[i], peaks[i] = self._register_spectrum(f1)
+
+        return (shifts, peaks) if return_peak else shifts
 
 
 def translation(
@@ -12,6 +257,8 @@ def translation(
 ):
     """Return translation vector to register images.
 
+    To register many images against the same reference, use `Registrator`.
+
     Parameters
     ----------
     im0, im1 : np.array
@@ -26,9 +273,8 @@ def translation(
     shift: list
         Return the 2 coordinates defining the determined image shift
     """
-    f0 = fft2(im0)
-    f1 = fft2(im1)
-    ir = abs(ifft2((f0 * f1.conjugate()) / (abs(f0) * abs(f1))))
+    reg = Registrator(np.asarray(im0, dtype=float))
+    ir = abs(reg.correlate(np.asarray(im1, dtype=float)))
     shape = ir.shape
 
     if limit_shift:
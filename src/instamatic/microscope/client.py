@@ -52,6 +52,7 @@ class MicroscopeClient:
         self.interface = interface
         self.name = interface
         self._bufsize = BUFSIZE
+        self._lock = threading.Lock()
 
         try:
             self.connect()
@@ -94,9 +95,10 @@ class MicroscopeClient:
 
     def _eval_dct(self, dct: Dict[str, Any]) -> Any:
         """Takes approximately 0.2-0.3 ms per call if HOST=='localhost'."""
-        self.s.send(dumper(dct))
-
-        response = self.s.recv(self._bufsize)
+        # the socket is shared, so requests from different threads must not interleave
+        with self._lock:
+            self.s.send(dumper(dct))
+            response = self.s.recv(self._bufsize)
 
         if response:
             status, data = loader(response)
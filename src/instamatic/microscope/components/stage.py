@@ -6,9 +6,15 @@ from typing import Generator, Optional, Tuple, Union, overload
 
 import numpy as np
 
+from instamatic import config
 from instamatic._typing import float_deg, int_nm
 from instamatic.microscope.base import MicroscopeBase
-from instamatic.microscope.utils import StagePositionTuple
+from instamatic.microscope.utils import (
+    SettleProfile,
+    StagePositionTuple,
+    get_settle_profiles,
+    wait_for_stage,
+)
 from instamatic.utils.native import AnyNumber, NativeNumber, native
 
 
@@ -21,6 +27,7 @@ class Stage:
         self._setter = self._tem.setStagePosition
         self._getter = self._tem.getStagePosition
         self._wait = True  # properties only
+        self._settle_profiles = None
 
     def __repr__(self) -> str:
         x, y, z, a, b = self.get()
@@ -31,6 +38,19 @@ class Stage:
         """Get name of the class."""
         return self.__class__.__name__
 
+    @property
+    def settle_profiles(self) -> dict[str, SettleProfile]:
+        """Settle profiles per axis, read from the `stage_settle` section of
+        the calibration file on first use."""
+        if self._settle_profiles is None:
+            mapping = config.calibration.mapping.get('stage_settle')
+            self._settle_profiles = get_settle_profiles(mapping)
+        return self._settle_profiles
+
+    @settle_profiles.setter
+    def settle_profiles(self, profiles: dict[str, SettleProfile]) -> None:
+        self._settle_profiles = profiles
+
     def set(
         self,
         x: Optional[int_nm] = None,
@@ -222,6 +242,37 @@ class Stage:
         """Blocking call that waits for stage movement to finish."""
         self._tem.waitForStage()
 
+    def wait_settled(
+        self,
+        axes: str = 'xyzab',
+        profiles: Optional[dict[str, SettleProfile]] = None,
+    ) -> float:
+        """Blocking call that waits for stage movement to finish, and then
+        until the position of all `axes` is stable (see `SettleProfile`).
+
+        axes: str,
+            axes to check, i.e. 'xy' or 'a'
+        profiles: dict,
+            settle profiles per axis, defaults to `Stage.settle_profiles`,
+            which can be set in the `stage_settle` section of the calibration file
+
+        Returns the time spent waiting in seconds.
+        """
+        profiles = profiles or self.settle_profiles
+        return wait_for_stage(
+            self.is_moving,
+            get_position=self.get,
+            profiles={axis: profiles[axis] for axis in axes},
+        )
+
+    def _settle(self, settle_delay: Optional[float], axes: str) -> None:
+        """Let the stage settle after a move, for a fixed `settle_delay`, or
+        until the position of `axes` is stable if it is None."""
+        if settle_delay is None:
+            self.wait_settled(axes)
+        elif settle_delay:
+            time.sleep(settle_delay)
+
     @contextmanager
     def no_wait(self) -> Generator[None, None, None]:
         """Context manager that prevents blocking stage position calls on
@@ -275,7 +326,7 @@ class Stage:
         x: Optional[int_nm] = None,
         y: Optional[int_nm] = None,
         step: int_nm = 10000,
-        settle_delay: float = 0.200,
+        settle_delay: Optional[float] = None,
     ) -> None:
         """Move to new x/y position with backlash correction. This is done by
         approaching the target x/y position always from the same direction.
@@ -285,7 +336,8 @@ class Stage:
         step: float,
             stepsize in nm
         settle_delay: float,
-            delay between movements in seconds to allow the stage to settle
+            delay between movements in seconds to allow the stage to settle,
+            if None, wait until the position is stable (see `Stage.wait_settled`)
         """
         wait = True
         if (x is None) or (y is None):
@@ -293,19 +345,17 @@ class Stage:
             x = current_x if x is None else x
             y = current_y if y is None else y
         self.set(x=x - step, y=y - step)
-        if settle_delay:
-            time.sleep(settle_delay)
+        self._settle(settle_delay, 'xy')
 
         self.set(x=x, y=y, wait=wait)
-        if settle_delay:
-            time.sleep(settle_delay)
+        self._settle(settle_delay, 'xy')
 
     def move_xy_with_backlash_correction(
         self,
         shift_x: Optional[int_nm] = None,
         shift_y: Optional[int_nm] = None,
         step: int_nm = 5000,
-        settle_delay: float = 0.200,
+        settle_delay: Optional[float] = None,
         wait=True,
     ) -> None:
         """Move xy by given shifts in stage coordinates with backlash
@@ -320,7 +370,8 @@ class Stage:
         step: float,
             stepsize in nm
         settle_delay: float,
-            delay between movements in seconds to allow the stage to settle
+            delay between movements in seconds to allow the stage to settle,
+            if None, wait until the position is stable (see `Stage.wait_settled`)
         wait: bool,
             block until stage movement is complete (JEOL only)
         """
@@ -347,17 +398,16 @@ class Stage:
             target_y = None
 
         self.set(x=pre_x, y=pre_y)
-        if settle_delay:
-            time.sleep(settle_delay)
+        self._settle(settle_delay, 'xy')
 
         self.set(x=target_x, y=target_y, wait=wait)
-        if settle_delay:
-            time.sleep(settle_delay)
+        if wait or settle_delay is not None:
+            self._settle(settle_delay, 'xy')
 
     def eliminate_backlash_xy(
         self,
         step: int_nm = 10000,
-        settle_delay: float = 0.200,
+        settle_delay: Optional[float] = None,
     ) -> None:
         """Eliminate backlash by in XY by moving the stage away from the
         current position, and approaching it from the common direction. Uses
@@ -366,7 +416,8 @@ class Stage:
         step: int,
             stepsize in nm
         settle_delay: float,
-            delay between movements in seconds to allow the stage to settle
+            delay between movements in seconds to allow the stage to settle,
+            if None, wait until the position is stable (see `Stage.wait_settled`)
         """
         stage = self.get()
         self.set_xy_with_backlash_correction(
@@ -378,7 +429,7 @@ class Stage:
         target_angle: float_deg = 0.0,
         step: float_deg = 1.0,
         n_steps: int = 3,
-        settle_delay: float = 0.200,
+        settle_delay: Optional[float] = None,
     ) -> None:
         """Eliminate backlash by relaxing the position. The routine will move
         in opposite direction of the targeted angle by `n_steps`*`step`, and
@@ -392,7 +443,8 @@ class Stage:
         n_steps: int > 0,
             number of steps to walk up to current angle
         settle_delay: float,
-            delay between movements in seconds to allow the stage to settle
+            delay between movements in seconds to allow the stage to settle,
+            if None, wait until the position is stable (see `Stage.wait_settled`)
         """
         current = self.a
 
@@ -407,4 +459,4 @@ class Stage:
 
         for i in reversed(range(n_steps)):
             self.a = current - s * i * step
-            time.sleep(settle_delay)
+            self._settle(settle_delay, 'a')
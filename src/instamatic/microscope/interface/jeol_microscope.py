@@ -11,7 +11,7 @@ from instamatic import config
 from instamatic._typing import float_deg, int_nm
 from instamatic.exceptions import JEOLValueError, TEMCommunicationError, TEMValueError
 from instamatic.microscope.base import MicroscopeBase
-from instamatic.microscope.utils import StagePositionTuple
+from instamatic.microscope.utils import StagePositionTuple, wait_for_stage
 
 logger = logging.getLogger(__name__)
 
@@ -291,10 +291,17 @@ class JeolMicroscope(MicroscopeBase):
         return x or y or z or a or b
 
     def waitForStage(self, delay: float = 0.0, skip_delay: float = 0.5):
-        time.sleep(skip_delay)  # skip the first readout delay, necessary on NeoARM200
-        while self.isStageMoving():
-            if delay > 0:
-                time.sleep(delay)
+        """Wait for the stage to stop moving, polling with exponential
+        backoff up to `delay` seconds (0.2 s if 0).
+
+        The first readouts of the stage status are not reliable (NeoARM200),
+        so always wait `skip_delay` seconds before polling the status.
+        """
+        wait_for_stage(
+            self.isStageMoving,
+            start_timeout=skip_delay,
+            max_interval=delay or 0.2,
+        )
 
     def setStageX(self, value: int_nm, wait: bool = True) -> None:
         self.stage3.SetX(value)
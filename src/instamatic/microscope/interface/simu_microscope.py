@@ -8,7 +8,7 @@ from instamatic import config
 from instamatic._typing import float_deg, int_nm
 from instamatic.exceptions import TEMValueError
 from instamatic.microscope.base import MicroscopeBase
-from instamatic.microscope.utils import StagePositionTuple
+from instamatic.microscope.utils import StagePositionTuple, wait_for_stage
 
 NTRLMAPPING = {
     'GUN1': 0,
@@ -389,8 +389,9 @@ class SimuMicroscope(MicroscopeBase):
         return self._is_moving
 
     def waitForStage(self, delay: float = 0.1):
-        while self.isStageMoving():
-            time.sleep(delay)
+        """Wait for the stage to stop moving, polling with exponential
+        backoff up to `delay` seconds."""
+        wait_for_stage(self.isStageMoving, max_interval=delay)
 
     def setStageX(self, value: int_nm, wait: bool = True) -> None:
         self.StagePosition_x = value
@@ -0,0 +1,235 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+from instamatic.microscope.base import MicroscopeBase
+
+# Time-to-live (s) of cached read-only properties; `None` never expires
+DEFAULT_TTLS = {
+    'getFunctionMode': 1.0,
+    'getMagnification': 1.0,
+    'getMagnificationIndex': 1.0,
+    'getMagnificationAbsoluteIndex': 1.0,
+    'getMagnificationRanges': None,
+    'getSpotSize': 5.0,
+    'getHTValue': 30.0,
+    'getBrightness': 0.5,
+    'getDiffFocus': 0.5,
+    'getScreenPosition': 1.0,
+    'getRotationSpeed': 5.0,
+}
+
+_MAG_STATE = (
+    'getFunctionMode',
+    'getMagnification',
+    'getMagnificationIndex',
+    'getMagnificationAbsoluteIndex',
+    'getDiffFocus',
+    'getBrightness',
+)
+
+# Cached properties invalidated by each setter. Any other call that is not
+# a plain query (`get*`, `is*`) clears the whole cache to stay on the safe side.
+INVALIDATES = {
+    'setFunctionMode': _MAG_STATE,
+    'setMagnification': _MAG_STATE,
+    'setMagnificationIndex': _MAG_STATE,
+    'increaseMagnificationIndex': _MAG_STATE,
+    'decreaseMagnificationIndex': _MAG_STATE,
+    'setSpotSize': ('getSpotSize', 'getBrightness'),
+    'setBrightness': ('getBrightness',),
+    'setDiffFocus': ('getDiffFocus',),
+    'setScreenPosition': ('getScreenPosition',),
+    'setRotationSpeed': ('getRotationSpeed',),
+}
+
+_UNCACHED = ('get', 'is')
+
+Subscriber = Callable[[str, Any], None]
+
+
+class StateMirror:
+    """Caching proxy for a `Microscope` interface object.
+
+    Read-only properties listed in `ttls` are served from memory until
+    their time-to-live expires. Calls to setters issued through the
+    mirror invalidate the cached values they affect (see `INVALIDATES`).
+    Other attributes are passed through to the wrapped interface, so the
+    mirror can be used anywhere a `Microscope` object is expected.
+
+    Subscribers registered with `subscribe` are called with `(name, value)`
+    whenever a refreshed value differs from the previously cached one. A
+    background poller (`start_polling`) keeps the cache warm and pushes
+    changes that were made outside of instamatic (e.g. on the microscope
+    panel) to the subscribers.
+
+    Usage:
+        tem = StateMirror(get_microscope())
+        tem.subscribe(lambda name, value: print(name, value))
+        tem.start_polling(interval=1.0)
+    """
+
+    def __init__(
+        self,
+        tem: MicroscopeBase,
+        ttls: Optional[Dict[str, Optional[float]]] = None,
+    ) -> None:
+        super().__init__()
+        self._tem = tem
+        self._ttls = dict(DEFAULT_TTLS if ttls is None else ttls)
+        self._cache: Dict[Tuple[Hashable, ...], Tuple[float, Any]] = {}
+        self._lock = threading.RLock()
+        self._subscribers: List[Subscriber] = []
+        self._poller: Optional[threading.Thread] = None
+        self._stop_polling = threading.Event()
+
+        self.name = getattr(tem, 'name', tem.__class__.__name__)
+        self.hits = 0
+        self.misses = 0
+
+    def __repr__(self) -> str:
+        return f'{self.__class__.__name__}({self._tem!r})'
+
+    def __dir__(self) -> list:
+        return sorted(set(dir(self._tem)) | set(super().__dir__()))
+
+    def __getattr__(self, attr_name: str) -> Any:
+        # Only called if regular lookup fails, i.e. for the microscope interface
+        if attr_name.startswith('__') or attr_name in ('_tem', '_ttls', '_cache', '_lock'):
+            raise AttributeError(attr_name)
+
+        attr = getattr(self._tem, attr_name)
+        if not callable(attr):
+            return attr
+
+        if attr_name in self._ttls:
+            return self._cached(attr_name, attr)
+        elif attr_name.startswith(_UNCACHED):
+            return attr
+        else:
+            return self._invalidating(attr_name, attr)
+
+    def _cached(self, attr_name: str, func: Callable) -> Callable:
+        def wrapper(*args, **kwargs):
+            key = (attr_name, args, tuple(sorted(kwargs.items())))
+            ttl = self._ttls[attr_name]
+            now = time.perf_counter()
+            with self._lock:
+                try:
+                    timestamp, value = self._cache[key]
+                except KeyError:
+                    pass
+                else:
+                    if ttl is None or now - timestamp < ttl:
+                        self.hits += 1
+                        return value
+            self.misses += 1
+            return self._refresh(key, func, *args, **kwargs)
+
+        wrapper.__name__ = attr_name
+        wrapper.__doc__ = func.__doc__
+        return wrapper
+
+    def _invalidating(self, attr_name: str, func: Callable) -> Callable:
+        def wrapper(*args, **kwargs):
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.invalidate(*INVALIDATES.get(attr_name, ()))
+
+        wrapper.__name__ = attr_name
+        wrapper.__doc__ = func.__doc__
+        return wrapper
+
+    def _refresh(self, key: Tuple[Hashable, ...], func: Callable, *args, **kwargs) -> Any:
+        """Call `func` on the microscope and store the result under `key`.
+
+        Exceptions are not cached. Notifies subscribers if the value
+        changed.
+        """
+        value = func(*args, **kwargs)
+        with self._lock:
+            old = self._cache.get(key)
+            self._cache[key] = (time.perf_counter(), value)
+        if old is not None and old[1] != value:
+            self._notify(key[0], value)
+        return value
+
+    def _notify(self, attr_name: str, value: Any) -> None:
+        for callback in tuple(self._subscribers):
+            try:
+                callback(attr_name, value)
+            except Exception as e:
+                print(f'State mirror subscriber {callback} failed: {e!r}')
+
+    def invalidate(self, *attr_names: str) -> None:
+        """Drop cached values for the given property names, or all of them if
+        no names are given."""
+        with self._lock:
+            if not attr_names:
+                self._cache.clear()
+                return
+            for key in [key for key in self._cache if key[0] in attr_names]:
+                del self._cache[key]
+
+    def subscribe(self, callback: Subscriber) -> None:
+        """Register `callback(name, value)` to be called when a cached
+        property changes."""
+        self._subscribers.append(callback)
+
+    def unsubscribe(self, callback: Subscriber) -> None:
+        """Remove a callback registered with `subscribe`."""
+        self._subscribers.remove(callback)
+
+    def poll(self, attr_names: Optional[Iterable[str]] = None) -> None:
+        """Refresh all cached entries (or those for `attr_names`) from the
+        microscope, notifying subscribers of any changes.
+
+        Properties that never expire (e.g. `getMagnificationRanges`) are
+        only refreshed when they are named explicitly.
+        """
+        if attr_names is None:
+            names = [name for name, ttl in self._ttls.items() if ttl is not None]
+        else:
+            names = list(attr_names)
+        with self._lock:
+            keys = [key for key in self._cache if key[0] in names]
+        for name in names:
+            if not any(key[0] == name for key in keys):
+                keys.append((name, (), ()))
+
+        for key in keys:
+            name, args, kwargs = key
+            func = getattr(self._tem, name, None)
+            if func is None:
+                continue
+            try:
+                self._refresh(key, func, *args, **dict(kwargs))
+            except Exception:
+                # e.g. `getDiffFocus` outside of diffraction mode
+                with self._lock:
+                    self._cache.pop(key, None)
+
+    def start_polling(self, interval: float = 1.0) -> None:
+        """Start a background thread that calls `poll` every `interval`
+        seconds."""
+        if self._poller is not None and self._poller.is_alive():
+            return
+
+        self._stop_polling.clear()
+
+        def run():
+            while not self._stop_polling.wait(interval):
+                self.poll()
+
+        self._poller = threading.Thread(target=run, name='StateMirrorPoller', daemon=True)
+        self._poller.start()
+
+    def stop_polling(self) -> None:
+        """Stop the background poller started with `start_polling`."""
+        self._stop_polling.set()
+        if self._poller is not None:
+            self._poller.join()
+            self._poller = None
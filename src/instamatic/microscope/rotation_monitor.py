@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from typing import Callable, Optional
+
+import numpy as np
+
+from instamatic import config
+from instamatic._typing import float_deg
+
+logger = logging.getLogger(__name__)
+
+Subscriber = Callable[[str, float, float_deg], None]
+
+
+class RotationMonitor:
+    """Sample the goniometer rotation (alpha) at a fixed rate on a
+    background thread.
+
+    The monitor keeps a record of `(time, alpha)` samples, using
+    `time.perf_counter` as clock, and sets the following events:
+
+    - `started`: alpha moved more than `start_threshold` from the first
+      sample, `start_time` and `start_angle` give the first sample beyond it;
+    - `target_reached`: alpha is within `tolerance` of `target`;
+    - `stalled`: after starting, alpha moved less than `stall_tolerance`
+      during `stall_time` seconds, i.e. the (manual) rotation stopped.
+
+    `finished` is set with either of the last two. Subscribers registered
+    with `subscribe` are called from the monitor thread with
+    `(event, time, alpha)`. Use `angle_at` to interpolate alpha for the
+    timestamps of the collected frames.
+
+    Usage:
+        with RotationMonitor(ctrl.stage, target=40) as monitor:
+            ctrl.stage.set(a=40, wait=False)
+            while not monitor.finished.wait(0.1):
+                ...
+        angles = monitor.angle_at(frame_times)
+
+    Parameters
+    ----------
+    stage : Stage
+        Stage to monitor, i.e. `ctrl.stage`
+    interval : float, optional
+        Time between samples in seconds, defaults to `settings.rotation_monitor_interval`
+    target : float, optional
+        Target angle in degrees
+    tolerance : float
+        Distance to `target` at which it counts as reached
+    start_threshold : float
+        Rotation in degrees after which the rotation counts as started
+    stall_time : float, optional
+        Time in seconds without rotation after which it counts as stalled,
+        None to disable
+    stall_tolerance : float
+        Rotation in degrees that is considered as standing still
+    """
+
+    def __init__(
+        self,
+        stage,
+        interval: Optional[float] = None,
+        target: Optional[float_deg] = None,
+        tolerance: float_deg = 0.5,
+        start_threshold: float_deg = 0.2,
+        stall_time: Optional[float] = 1.0,
+        stall_tolerance: float_deg = 0.01,
+    ):
+        super().__init__()
+        self.stage = stage
+        self.interval = interval or config.settings.rotation_monitor_interval
+        self.target = target
+        self.tolerance = tolerance
+        self.start_threshold = start_threshold
+        self.stall_time = stall_time
+        self.stall_tolerance = stall_tolerance
+
+        self.started = threading.Event()
+        self.target_reached = threading.Event()
+        self.stalled = threading.Event()
+        self.finished = threading.Event()
+
+        self.start_time: Optional[float] = None
+        self.start_angle: Optional[float_deg] = None
+
+        self._times: list[float] = []
+        self._angles: list[float_deg] = []
+        self._subscribers: list[Subscriber] = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self) -> 'RotationMonitor':
+        self.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def subscribe(self, callback: Subscriber) -> None:
+        """Call `callback(event, time, alpha)` when an event fires."""
+        self._subscribers.append(callback)
+
+    def start(self) -> None:
+        """Take the first sample and start the monitor thread."""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self.sample()
+        self._thread = threading.Thread(target=self._run, name='RotationMonitor', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the monitor thread and take a final sample."""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self.sample()
+
+    def set_target(self, target: float_deg, tolerance: Optional[float_deg] = None) -> None:
+        """Set a new target angle, and reset the `target_reached` event."""
+        self.target = target
+        if tolerance is not None:
+            self.tolerance = tolerance
+        self.target_reached.clear()
+        self.finished.clear()
+
+    @property
+    def angle(self) -> Optional[float_deg]:
+        """Last sampled alpha in degrees."""
+        with self._lock:
+            return self._angles[-1] if self._angles else None
+
+    @property
+    def samples(self) -> tuple[np.ndarray, np.ndarray]:
+        """Sample times (`time.perf_counter`) and alpha angles (degrees)."""
+        with self._lock:
+            return np.array(self._times), np.array(self._angles)
+
+    def sample(self) -> float_deg:
+        """Read alpha from the stage and update the events."""
+        t0 = time.perf_counter()
+        a = self.stage.a
+        t = (t0 + time.perf_counter()) / 2
+
+        with self._lock:
+            self._times.append(t)
+            self._angles.append(a)
+
+        self._update(t, a)
+        return a
+
+    def wait_for_start(self, timeout: Optional[float] = None) -> Optional[float_deg]:
+        """Block until the rotation has started, returns the start angle or
+        None on timeout."""
+        if self.started.wait(timeout):
+            return self.start_angle
+        return None
+
+    def wait_for_target(self, timeout: Optional[float] = None) -> bool:
+        """Block until the target is reached or the rotation stalls, returns
+        True if the target was reached."""
+        self.finished.wait(timeout)
+        return self.target_reached.is_set()
+
+    def angle_at(self, timestamps) -> np.ndarray:
+        """Interpolate alpha at `timestamps` (`time.perf_counter`).
+
+        Timestamps outside of the sampled range get the first or last
+        sampled angle.
+        """
+        times, angles = self.samples
+        return np.interp(timestamps, times, angles)
+
+    def _fire(self, event: str, t: float, a: float_deg) -> None:
+        getattr(self, event).set()
+        if event in ('target_reached', 'stalled'):
+            self.finished.set()
+        logger.debug('Rotation %s at a=%.2f', event, a)
+        for callback in self._subscribers:
+            try:
+                callback(event, t, a)
+            except Exception as e:
+                logger.exception(e)
+
+    def _update(self, t: float, a: float_deg) -> None:
+        with self._lock:
+            a0 = self._angles[0]
+            times = self._times
+            angles = self._angles
+
+        if not self.started.is_set() and abs(a - a0) >= self.start_threshold:
+            self.start_time, self.start_angle = t, a
+            self._fire('started', t, a)
+
+        if (
+            self.target is not None
+            and not self.target_reached.is_set()
+            and abs(a - self.target) < self.tolerance
+        ):
+            self._fire('target_reached', t, a)
+
+        if self.stall_time and self.started.is_set() and not self.finished.is_set():
+            t_ref = t - self.stall_time
+            if t_ref >= times[0]:
+                a_ref = np.interp(t_ref, times, angles)
+                if abs(a - a_ref) < self.stall_tolerance:
+                    self._fire('stalled', t, a)
+
+    def _run(self) -> None:
+        next_t = time.perf_counter()
+        while True:
+            next_t += self.interval
+            if self._stop.wait(max(next_t - time.perf_counter(), 0)):
+                break
+            try:
+                self.sample()
+            except Exception as e:
+                logger.warning('Could not read the stage rotation: %s', e)
@@ -1,9 +1,14 @@
 from __future__ import annotations
 
-from typing import NamedTuple
+import logging
+import time
+from dataclasses import dataclass, replace
+from typing import Callable, Iterator, NamedTuple, Optional
 
 from instamatic._typing import float_deg, int_nm
 
+logger = logging.getLogger(__name__)
+
 
 class StagePositionTuple(NamedTuple):
     x: int_nm
@@ -11,3 +16,174 @@ class StagePositionTuple(NamedTuple):
     z: int_nm
     a: float_deg
     b: float_deg
+
+
+@dataclass(frozen=True)
+class SettleProfile:
+    """Criterion for a stage axis to be settled: `n_stable` consecutive
+    position readings that differ less than `tolerance` (nm or degrees)."""
+
+    tolerance: float
+    n_stable: int = 2
+    timeout: float = 5.0  # seconds
+
+
+DEFAULT_SETTLE_PROFILES = {
+    'x': SettleProfile(tolerance=20),
+    'y': SettleProfile(tolerance=20),
+    'z': SettleProfile(tolerance=50),
+    'a': SettleProfile(tolerance=0.01),
+    'b': SettleProfile(tolerance=0.01),
+}
+
+
+def get_settle_profiles(mapping: Optional[dict] = None) -> dict[str, SettleProfile]:
+    """Get the per-axis settle profiles, the values in `mapping` (i.e. the
+    `stage_settle` section of the calibration file) override the defaults.
+
+    Example: `{'x': {'tolerance': 10, 'n_stable': 3}, 'a': {'tolerance': 0.05}}`
+    """
+    profiles = dict(DEFAULT_SETTLE_PROFILES)
+    for axis, params in (mapping or {}).items():
+        profiles[axis] = replace(profiles[axis], **params)
+    return profiles
+
+
+def poll_intervals(
+    interval: float = 0.01, max_interval: float = 0.2, backoff: float = 1.5
+) -> Iterator[float]:
+    """Generate polling intervals that increase exponentially from
+    `interval` up to `max_interval`."""
+    while True:
+        yield interval
+        interval = min(interval * backoff, max_interval)
+
+
+def wait_until(
+    condition: Callable[[], bool],
+    timeout: Optional[float] = None,
+    **kwargs,
+) -> bool:
+    """Poll `condition` with exponential backoff until it returns True.
+
+    Parameters
+    ----------
+    condition : Callable[[], bool]
+        Function to poll
+    timeout : float, optional
+        Give up after this many seconds, wait indefinitely if None
+    **kwargs
+        Passed to `poll_intervals`
+
+    Returns
+    -------
+    bool
+        False if the timeout was reached
+    """
+    t0 = time.perf_counter()
+    for interval in poll_intervals(**kwargs):
+        if condition():
+            return True
+        if timeout is not None and time.perf_counter() - t0 + interval > timeout:
+            return condition()
+        time.sleep(interval)
+
+
+def wait_settled(
+    get_position: Callable[[], StagePositionTuple],
+    profiles: dict[str, SettleProfile],
+    **kwargs,
+) -> bool:
+    """Poll the stage position until every axis in `profiles` has been stable
+    for the required number of readings.
+
+    Parameters
+    ----------
+    get_position : Callable[[], StagePositionTuple]
+        Returns the current stage position
+    profiles : dict[str, SettleProfile]
+        Settle criterion for every axis to check
+    **kwargs
+        Passed to `poll_intervals`
+
+    Returns
+    -------
+    bool
+        False if any axis did not settle within its timeout
+    """
+    if not profiles:
+        return True
+
+    timeout = max(profile.timeout for profile in profiles.values())
+    n_stable = dict.fromkeys(profiles, 1)
+    last = get_position()
+
+    def is_settled() -> bool:
+        nonlocal last
+        current = get_position()
+        for axis, profile in profiles.items():
+            delta = abs(getattr(current, axis) - getattr(last, axis))
+            n_stable[axis] = n_stable[axis] + 1 if delta <= profile.tolerance else 1
+        last = current
+        return all(n_stable[axis] >= profile.n_stable for axis, profile in profiles.items())
+
+    return wait_until(is_settled, timeout=timeout, **kwargs)
+
+
+def wait_for_stage(
+    is_moving: Callable[[], bool],
+    get_position: Optional[Callable[[], StagePositionTuple]] = None,
+    profiles: Optional[dict[str, SettleProfile]] = None,
+    start_timeout: float = 0.0,
+    timeout: Optional[float] = None,
+    **kwargs,
+) -> float:
+    """Block until the stage has stopped moving, polling with exponential
+    backoff.
+
+    Parameters
+    ----------
+    is_moving : Callable[[], bool]
+        Returns True while the stage is moving
+    get_position : Callable[[], StagePositionTuple], optional
+        Returns the current stage position, required for `profiles`
+    profiles : dict[str, SettleProfile], optional
+        After the stage reports that it stopped, wait until these axes are settled,
+        a warning is logged if they do not settle within the timeout
+    start_timeout : float
+        Some goniometers do not report the motion immediately after a move
+        command. Wait up to this many seconds for `is_moving` or the position
+        to change before waiting for the motion to end. Without `get_position`,
+        always wait the full `start_timeout`, for goniometers whose first
+        status readouts are not reliable.
+    timeout : float, optional
+        Maximum time to wait for the motion to end, wait indefinitely if None
+    **kwargs
+        Passed to `poll_intervals`
+
+    Returns
+    -------
+    float
+        Time spent waiting in seconds
+    """
+    t0 = time.perf_counter()
+
+    if start_timeout:
+        if get_position is None:
+            time.sleep(start_timeout)
+        else:
+            start = get_position()
+            wait_until(
+                lambda: is_moving() or get_position() != start,
+                timeout=start_timeout,
+                **kwargs,
+            )
+
+    wait_until(lambda: not is_moving(), timeout=timeout, **kwargs)
+
+    if profiles and not wait_settled(get_position, profiles, **kwargs):
+        logger.warning(
+            'Stage position (%s) did not settle within the timeout', ''.join(profiles)
+        )
+
+    return time.perf_counter() - t0
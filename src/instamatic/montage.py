@@ -20,10 +20,9 @@ class InstamaticMontage(Montage):
         """
         from instamatic import config
 
-        pixelsize = config.calibration[mode]['pixelsize'][magnification]
-
-        stagematrix = config.calibration[mode]['stagematrix'][magnification]
-        stagematrix = np.array(stagematrix).reshape(2, 2)
+        calib = config.calibration.table[mode]
+        pixelsize = calib.pixelsize(magnification)
+        stagematrix = calib.stagematrix(magnification)
 
         self.set_pixelsize(pixelsize)
         self.set_stagematrix(stagematrix)
@@ -32,10 +31,15 @@ class InstamaticMontage(Montage):
 
     @classmethod
     def from_montage_yaml(cls, filename: str = 'montage.yaml'):
-        """Load montage from a series of tiff files + `montage.yaml`"""
+        """Load montage from a series of tiff files + `montage.yaml`
+
+        The images are loaded on demand. If the montage was saved with
+        a pyramid (`GridMontage`), it is available as `.pyramid`.
+        """
         import yaml
 
-        from instamatic.formats import read_tiff
+        from instamatic.formats.stack import FileSeries
+        from instamatic.pyramid import MontagePyramid
 
         p = Path(filename)
         drc = p.parent
@@ -46,7 +50,7 @@ class InstamaticMontage(Montage):
         d['stagecoords'] = np.array(d['stagecoords'])
         d['stagematrix'] = np.array(d['stagematrix'])
 
-        images = [read_tiff(fn)[0] for fn in fns]
+        images = FileSeries(list(fns))
 
         gridspec = {
             k: v for k, v in d.items() if k in ('gridshape', 'direction', 'zigzag', 'flip')
@@ -56,10 +60,75 @@ class InstamaticMontage(Montage):
         m.update_gridspec(flip=not d['flip'])  # BUG: Work-around for gridspec madness
         # Possibly related is that images are rotated 90 deg. in SerialEM mrc files
 
+        if (drc / 'pyramid' / MontagePyramid.META).exists():
+            m.pyramid = MontagePyramid(drc / 'pyramid')
+
         return m
 
+    def build_pyramid(
+        self,
+        path: str = 'pyramid',
+        chunk_size: int = 512,
+        method: str = 'weighted',
+        optimized: bool = True,
+    ):
+        """Build a multi-resolution pyramid from the montage images, one
+        image at a time, instead of stitching the full montage in memory.
+
+        Parameters
+        ----------
+        path : str
+            Directory to store the pyramid chunks.
+        chunk_size : int
+            Size of the chunks in pixels.
+        method : str
+            Blending of the overlapping images, `weighted` or `average`
+        optimized : bool
+            Use optimized coordinates if they are available [default = True]
+
+        Returns
+        -------
+        pyramid : MontagePyramid
+        """
+        from instamatic.pyramid import MontagePyramid
+
+        coords = getattr(self, 'optimized_coords', None) if optimized else None
+        if coords is None:
+            coords = self.calculate_montage_coords()
+
+        pyramid = MontagePyramid(path, chunk_size=chunk_size, method=method, overwrite=True)
+        for i, coord in enumerate(coords):
+            pyramid.add_tile(self.images[i], coord)
+
+        self.pyramid = pyramid
+        return pyramid
+
+    def plot_pyramid(self, ax=None, **kwargs):
+        """Show the montage pyramid, only the visible part is loaded at the
+        resolution of the screen when zooming in.
+
+        Parameters
+        ----------
+        ax : matplotlib.Axis
+            Matplotlib axis to plot on.
+        **kwargs
+            Passed to `ax.imshow`.
+        """
+        import matplotlib.pyplot as plt
+
+        from instamatic.pyramid import PyramidView
+
+        if not ax:
+            fig, ax = plt.subplots(figsize=(10, 10))
+
+        self.pyramid_view = PyramidView(self.pyramid, ax, **kwargs)
+        ax.set_title('Stitched image')
+        return ax
+
     def export(self, outfile: str = 'stitched.tiff') -> None:
-        """Export the stitched image to a tiff file.
+        """Export the stitched image to a tiff file. If the montage has a
+        pyramid, it is written as a tiled, multi-resolution tiff file
+        without stitching the full image in memory.
 
         Parameters
         ----------
@@ -68,7 +137,10 @@ class InstamaticMontage(Montage):
         """
         from instamatic.formats import write_tiff
 
-        write_tiff(outfile, self.stitched)
+        if getattr(self, 'pyramid', None) is not None:
+            self.pyramid.export(outfile)
+        else:
+            write_tiff(outfile, self.stitched)
 
     def to_browser(self):
         from instamatic.browser import Browser
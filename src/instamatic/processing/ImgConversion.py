@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import collections
 import logging
+import re
 import time
 from datetime import datetime
 from pathlib import Path
@@ -43,12 +44,15 @@ def rotation_axis_to_xyz(rotation_axis, invert=False, setting='xds'):
         raise ValueError("Must be one of {'dials', 'xds'}")
 
 
-def export_dials_variables(path, *, sequence=(), missing=(), rotation_xyz=None):
+def export_dials_variables(
+    path, *, sequence=(), missing=(), rotation_xyz=None, data='directory=data'
+):
     """Export variables for DIALS to account for missing frames writes
     dials_variables.sh (bash) and dials_variables.bat (cmd)
 
     `sequence` is a tuple of sequence numbers of the data frames
     `missing `is a tuple of sequence numbers of the missing frames
+    `data` is the input passed to `dials.import` in the instructions
     """
     scanranges = find_subranges(sequence)
 
@@ -73,7 +77,7 @@ def export_dials_variables(path, *, sequence=(), missing=(), rotation_xyz=None):
         print('#     source dials_variables.sh', file=f)
         print('#', file=f)
         print('# and:', file=f)
-        print('#     dials.import directory=data $rotation_axis', file=f)
+        print(f'#     dials.import {data} $rotation_axis', file=f)
         print('#     dials.find_spots datablock.json $scan_range', file=f)
         print('#     dials.integrate $exclude_images refined.pickle refined.json', file=f)
         print('#', file=f)
@@ -92,7 +96,7 @@ def export_dials_variables(path, *, sequence=(), missing=(), rotation_xyz=None):
         print(':: To run:', file=f)
         print('::     call dials_variables.bat', file=f)
         print('::', file=f)
-        print('::     dials.import directory=data %rotation_axis%', file=f)
+        print(f'::     dials.import {data} %rotation_axis%', file=f)
         print('::     dials.find_spots datablock.json %scan_range%', file=f)
         print('::     dials.integrate %exclude_images% refined.pickle refined.json', file=f)
 
@@ -115,6 +119,35 @@ def get_calibrated_rotation_speed(val):
     return calibrated_value
 
 
+_frame_writer = None
+
+
+def _init_frame_writer(cls, state: dict, shm_name: str, shape: tuple, dtype: str, slots: dict):
+    """Process pool initializer for `ImgConversion.threadpoolwriter`.
+
+    Rebuilds the converter from `state`, with the image data mapped
+    from the shared memory block `shm_name`.
+    """
+    from multiprocessing import shared_memory
+
+    global _frame_writer
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    frames = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+    conv = cls.__new__(cls)
+    conv.__dict__.update(state)
+    conv.data = {i: frames[slot] for i, slot in slots.items()}
+    conv._shm = shm  # keep the shared memory mapped for the lifetime of the worker
+    _frame_writer = conv
+
+
+def _write_frame(task: tuple) -> Path:
+    """Write a single frame, `task` is a tuple of (format, path, index)."""
+    fmt, path, i = task
+    return getattr(_frame_writer, f'write_{fmt}')(path, i)
+
+
 class ImgConversion:
     """This class is for post RED/cRED data collection image conversion. Files
     can be generated for REDp, DIALS, XDS, and PETS.
@@ -122,8 +155,15 @@ class ImgConversion:
     The image buffer is passed as a list of tuples, where each tuple
     contains the index (int), image data (2D numpy array),
     metadata/header (dict). The buffer index must start at 1.
+
+    If a `rotation_trace` is given, the oscillation start and end angle
+    of every frame are obtained from the rotation angle versus time (see
+    `ImgConversion.fit_frame_angles`), rather than assuming a constant
+    rotation per frame.
     """
 
+    frame_angles: Optional[dict] = None  # {index: (start, end)}, set by `fit_frame_angles`
+
     def __init__(
         self,
         buffer: list,  # image buffer, list of (index [int], image data [2D numpy array], header [dict])
@@ -135,6 +175,8 @@ class ImgConversion:
         acquisition_time: float,  # seconds, acquisition time (exposure time + overhead)
         flatfield: str = 'flatfield.tiff',
         method: str = 'continuous-rotation 3D ED',  # or 'stills' or 'precession', used for CIF/documentation
+        rotation_trace: Optional[tuple] = None,  # (times, angles), `RotationMonitor.samples`
+        timestamps: Optional[dict] = None,  # {index: (t_start, t_end)} of the frames
     ):
         if flatfield is not None:
             flatfield, h = read_tiff(flatfield)
@@ -163,9 +205,10 @@ class ImgConversion:
 
         self.data_shape = img.shape
         try:
-            self.pixelsize = config.calibration['diff']['pixelsize'][
-                camera_length
-            ]  # px / Angstrom
+            # estimated from the neighbouring camera lengths if not calibrated
+            self.pixelsize = config.calibration.table['diff'].pixelsize(
+                camera_length, fallback='interpolate'
+            )  # px / Angstrom
         except KeyError:
             self.pixelsize = 1
             print(
@@ -202,6 +245,9 @@ class ImgConversion:
 
         self.check_settings()  # check if all required parameters are present, and fill default values if needed
 
+        if rotation_trace is not None:
+            self.fit_frame_angles(rotation_trace, timestamps=timestamps)
+
         self.mean_beam_center, self.beam_center_std = self.get_beam_centers()
         logger.debug(f'Primary beam at: {self.mean_beam_center}')
 
@@ -256,6 +302,85 @@ class ImgConversion:
                     f'`{self.__class__.__name__}` is missing stretch attrs `{stretch_attrs[0]}/{stretch_attrs[1]}`'
                 )
 
+    def fit_frame_angles(
+        self,
+        rotation_trace: tuple,
+        timestamps: Optional[dict] = None,
+        degree: int = 1,
+    ) -> None:
+        """Obtain the oscillation start and end angle of every frame by
+        fitting the rotation angle versus time, so that irregular frame
+        pacing and skipped frames do not affect the angles.
+
+        A polynomial of `degree` (1: constant rotation speed) is fitted to
+        the samples of the rotation trace recorded while the frames were
+        collected, and evaluated at the start and end time of every frame.
+        `start_angle` and `osc_angle` are updated to the best constant
+        rotation per frame, which is used by XDS.
+
+        rotation_trace: tuple,
+            arrays of times and rotation angles (degrees), i.e.
+            `RotationMonitor.samples`
+        timestamps: dict,
+            `{index: (t_start, t_end)}` for every frame on the clock of the
+            trace, by default from the `ImageGetTimeStart`/`ImageGetTimeEnd`
+            headers
+        degree: int,
+            degree of the polynomial
+        """
+        if timestamps is None:
+            timestamps = {
+                i: (h['ImageGetTimeStart'], h['ImageGetTimeEnd'])
+                for i, h in self.headers.items()
+            }
+
+        indices = np.array(sorted(timestamps))
+        times = np.array([timestamps[i] for i in indices], dtype=float)  # (n, 2)
+        trace_times, trace_angles = (np.asarray(arr, dtype=float) for arr in rotation_trace)
+
+        t0 = times[0, 0]
+        window = (trace_times >= times.min()) & (trace_times <= times.max())
+        if window.sum() > degree + 1:
+            coef = np.polyfit(trace_times[window] - t0, trace_angles[window], degree)
+            angles = np.polyval(coef, times - t0)
+            residual = trace_angles[window] - np.polyval(coef, trace_times[window] - t0)
+            logger.info(
+                f'Fitted rotation trace ({window.sum()} samples), rms residual: {residual.std():.4f} deg'
+            )
+        else:
+            # too few samples during data collection, fall back to interpolation
+            angles = np.interp(times, trace_times, trace_angles)
+
+        self.frame_angles = {int(i): (float(a), float(b)) for i, (a, b) in zip(indices, angles)}
+
+        if len(indices) > 1:
+            slope, intercept = np.polyfit(indices, angles[:, 0], 1)
+            self.start_angle = float(intercept + slope)  # frame 1
+            self.osc_angle = float(abs(slope))
+            logger.info(
+                f'Fitted start angle: {self.start_angle:.4f}, oscillation angle: {self.osc_angle:.4f}'
+            )
+
+    def get_frame_angles(self, indices) -> tuple[np.ndarray, np.ndarray]:
+        """Return the goniometer angles at the start and end of frames
+        `indices`, from `frame_angles` if available, or else assuming a
+        constant rotation of `osc_angle` per frame."""
+        indices = np.asarray(indices)
+        sign = -1 if self.start_angle > self.end_angle else 1
+
+        start = self.start_angle + sign * self.osc_angle * (indices - 1.0)
+        end = start + sign * self.osc_angle
+
+        if self.frame_angles:
+            nan = (np.nan, np.nan)
+            fitted = np.array([self.frame_angles.get(i, nan) for i in indices.flat])
+            fitted = fitted.reshape(*indices.shape, 2)
+            is_fitted = ~np.isnan(fitted[..., 0])
+            start = np.where(is_fitted, fitted[..., 0], start)
+            end = np.where(is_fitted, fitted[..., 1], end)
+
+        return start, end
+
     def get_beam_centers(
         self, invert_x: bool = False, invert_y: bool = False
     ) -> (float, float):
@@ -365,13 +490,24 @@ class ImgConversion:
         smv_path: Optional[Path] = None,
         mrc_path: Optional[Path] = None,
         workers: int = 8,
+        backend: str = 'thread',
     ) -> None:
         """Efficiently write all data to the specified formats using a
         threadpool.
 
         If a path is given, write data in the corresponding format, i.e.
         if `tiff_path` is specified TIFF files are written to that path.
+
+        With `backend='process'`, the frames are written by a pool of
+        `workers` processes. The image data are copied once to a shared
+        memory block that the workers read from, so that the frames do
+        not have to be pickled. This avoids the GIL for the per-frame
+        work (data conversion, header serialization) and scales with
+        the number of cores.
         """
+        if backend not in ('thread', 'process'):
+            raise ValueError(f"Unknown backend: {backend!r}, must be 'thread' or 'process'")
+
         write_tiff = tiff_path is not None
         write_smv = smv_path is not None
         write_mrc = mrc_path is not None
@@ -389,21 +525,64 @@ class ImgConversion:
             mrc_path.mkdir(exist_ok=True, parents=True)
             logger.debug(f'MRC files saved in folder: {mrc_path}')
 
+        tasks = []
+        for i in self.observed_range:
+            if write_tiff:
+                tasks.append(('tiff', tiff_path, i))
+            if write_mrc:
+                tasks.append(('mrc', mrc_path, i))
+            if write_smv:
+                tasks.append(('smv', smv_path, i))
+
+        if backend == 'process':
+            self._processpoolwriter(tasks, workers=workers)
+            return
+
         import concurrent.futures
 
         with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
             futures = []
-            for i in self.observed_range:
-                if write_tiff:
-                    futures.append(executor.submit(self.write_tiff, tiff_path, i))
-                if write_mrc:
-                    futures.append(executor.submit(self.write_mrc, mrc_path, i))
-                if write_smv:
-                    futures.append(executor.submit(self.write_smv, smv_path, i))
+            for fmt, path, i in tasks:
+                futures.append(executor.submit(getattr(self, f'write_{fmt}'), path, i))
 
             for future in futures:
                 ret = future.result()
 
+    def _processpoolwriter(self, tasks: list, workers: int) -> None:
+        """Run the `(format, path, index)` write tasks on a process pool,
+        passing the image data through shared memory."""
+        import concurrent.futures
+        from multiprocessing import shared_memory
+
+        indices = sorted(self.data)
+        slots = {i: slot for slot, i in enumerate(indices)}
+        dtype = np.result_type(*(self.data[i] for i in indices))
+        shape = (len(indices), *self.data_shape)
+
+        nbytes = max(int(np.prod(shape)) * dtype.itemsize, 1)
+        shm = shared_memory.SharedMemory(create=True, size=nbytes)
+        try:
+            frames = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+            for i, slot in slots.items():
+                frames[slot] = self.data[i]
+            del frames
+
+            # everything except the image data is pickled once per worker
+            state = {k: v for k, v in self.__dict__.items() if k not in ('data', 'flatfield')}
+            initargs = (type(self), state, shm.name, shape, dtype.str, slots)
+
+            chunksize = max(1, len(tasks) // (4 * workers))
+            with concurrent.futures.ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_frame_writer,
+                initargs=initargs,
+            ) as executor:
+                for ret in executor.map(_write_frame, tasks, chunksize=chunksize):
+                    pass
+        finally:
+            shm.close()
+            shm.unlink()
+
     def to_dials(self, smv_path: Path) -> None:
         """Convert the buffer to output compatible with DIALS.
 
@@ -470,7 +649,11 @@ class ImgConversion:
         img = np.ushort(img)
         shape_x, shape_y = img.shape
 
-        phi = self.start_angle + self.osc_angle * (i - 1)
+        # DIALS/XDS convention: increasing angles, the rotation axis is inverted instead
+        sign = -1 if self.start_angle > self.end_angle else 1
+        start, end = self.get_frame_angles(i)
+        phi = self.start_angle + sign * (start - self.start_angle)
+        osc_range = sign * (end - start)
 
         # TODO: Dials reads the beam_center from the first image and uses that for the whole range
         # For now, use the average beam center and consider it stationary, remove this line later
@@ -499,9 +682,9 @@ class ImgConversion:
         header['TIME'] = str(h['ImageExposureTime'])
         header['DISTANCE'] = f'{self.distance:.4f}'
         header['TWOTHETA'] = 0.00
-        header['PHI'] = '{phi:.4f}'
+        header['PHI'] = f'{phi:.4f}'
         header['OSC_START'] = f'{phi:.4f}'
-        header['OSC_RANGE'] = f'{self.osc_angle:.4f}'
+        header['OSC_RANGE'] = f'{osc_range:.4f}'
         header['WAVELENGTH'] = f'{self.wavelength:.4f}'
         # reverse XY coordinates for XDS
         header['BEAM_CENTER_X'] = f'{mean_beam_center[1]:.4f}'
@@ -539,14 +722,201 @@ class ImgConversion:
 
         return fn
 
+    def write_nexus(self, path: Path, name: str = 'data', compression: str = 'gzip') -> Path:
+        """Write all data to a single HDF5 master file `{name}_master.h5` in
+        directory `path`, following the NeXus NXmx application definition.
+
+        The frames are stored in one chunked (1 frame per chunk),
+        compressed dataset. Missing frames are filled with empty images,
+        so that the rotation scan is continuous. The rotation, beam
+        center, wavelength and distance are taken from the converter.
+
+        Matching input files are written to `path`: XDS.INP (reads the
+        master file through the HDF5 plugin in `config.settings.xds_hdf5_plugin`,
+        otherwise `LIB=` must be set by hand) and the `dials_variables`
+        scripts (`dials.import {name}_master.h5`).
+
+        Returns the path to the master file.
+        """
+        import h5py
+
+        path.mkdir(exist_ok=True, parents=True)
+        fn = path / f'{name}_master.h5'
+
+        first, last = min(self.complete_range), max(self.complete_range)
+        nframes = last - first + 1
+        shape_x, shape_y = self.data_shape  # slow, fast
+
+        invert_rotation_axis = self.start_angle > self.end_angle
+        rot_x, rot_y, rot_z = rotation_axis_to_xyz(
+            self.rotation_axis, invert=invert_rotation_axis, setting='dials'
+        )
+        # NeXus uses the McStas frame: 180 degree rotation around y from imgCIF (DIALS)
+        rotation_vector = (-rot_x, rot_y, -rot_z)
+
+        sign = -1 if invert_rotation_axis else 1
+        start, end = self.get_frame_angles(np.arange(first, last + 1))
+        omega = self.start_angle + sign * (start - self.start_angle)
+        omega_end = self.start_angle + sign * (end - self.start_angle)
+
+        # module origin relative to the beam, fast/slow axes are -x/-y in the McStas frame
+        pixelsize = self.physical_pixelsize / 1000  # m
+        beam_fast, beam_slow = self.mean_beam_center[1], self.mean_beam_center[0]
+        offset = np.array([beam_fast * pixelsize, beam_slow * pixelsize, 0.0])
+        offset_length = np.linalg.norm(offset)
+
+        def add_group(parent, group_name: str, nx_class: str):
+            group = parent.create_group(group_name)
+            group.attrs['NX_class'] = nx_class
+            return group
+
+        def add_transformation(
+            group, dset_name: str, value, kind: str, units: str, vector, depends_on
+        ):
+            dset = group.create_dataset(dset_name, data=value)
+            dset.attrs['transformation_type'] = kind
+            dset.attrs['units'] = units
+            dset.attrs['vector'] = np.asarray(vector, dtype=float)
+            dset.attrs['depends_on'] = depends_on
+            return dset
+
+        with h5py.File(fn, 'w') as f:
+            f.attrs['default'] = 'entry'
+            entry = add_group(f, 'entry', 'NXentry')
+            entry.attrs['default'] = 'data'
+            entry['definition'] = 'NXmx'
+            try:
+                start_time = self.headers[min(self.observed_range)]['ImageGetTime']
+            except KeyError:
+                pass
+            else:
+                entry['start_time'] = datetime.fromtimestamp(start_time).isoformat()
+
+            instrument = add_group(entry, 'instrument', 'NXinstrument')
+            instrument['name'] = self.name
+
+            beam = add_group(instrument, 'beam', 'NXbeam')
+            beam['incident_wavelength'] = self.wavelength
+            beam['incident_wavelength'].attrs['units'] = 'angstrom'
+
+            source = add_group(instrument, 'source', 'NXsource')
+            source['name'] = 'Electron gun'
+            source['type'] = 'Electron'
+
+            detector = add_group(instrument, 'detector', 'NXdetector')
+            detector['depends_on'] = '/entry/instrument/detector/transformations/detector_z'
+            detector['beam_center_x'] = beam_fast
+            detector['beam_center_x'].attrs['units'] = 'pixel'
+            detector['beam_center_y'] = beam_slow
+            detector['beam_center_y'].attrs['units'] = 'pixel'
+            detector['detector_distance'] = self.distance / 1000
+            detector['detector_distance'].attrs['units'] = 'm'
+            detector['x_pixel_size'] = pixelsize
+            detector['x_pixel_size'].attrs['units'] = 'm'
+            detector['y_pixel_size'] = pixelsize
+            detector['y_pixel_size'].attrs['units'] = 'm'
+            detector['count_time'] = self.acquisition_time
+            detector['count_time'].attrs['units'] = 's'
+            detector['sensor_material'] = 'Si'
+            detector['sensor_thickness'] = 0.0
+            detector['sensor_thickness'].attrs['units'] = 'm'
+
+            data = detector.create_dataset(
+                'data',
+                shape=(nframes, shape_x, shape_y),
+                dtype=np.uint16,
+                chunks=(1, shape_x, shape_y),
+                compression=compression,
+                shuffle=compression is not None,
+            )
+            empty = np.zeros(self.data_shape, dtype=np.uint16)
+            for n, i in enumerate(range(first, last + 1)):
+                data[n] = np.ushort(self.data[i]) if i in self.data else empty
+
+            transformations = add_group(detector, 'transformations', 'NXtransformations')
+            add_transformation(
+                transformations,
+                'detector_z',
+                self.distance / 1000,
+                'translation',
+                'm',
+                (0, 0, 1),
+                '.',
+            )
+
+            module = add_group(detector, 'module', 'NXdetector_module')
+            module['data_origin'] = np.array([0, 0], dtype=np.int64)
+            module['data_size'] = np.array([shape_x, shape_y], dtype=np.int64)
+            module['data_stride'] = np.array([1, 1], dtype=np.int64)
+            add_transformation(
+                module,
+                'module_offset',
+                offset_length,
+                'translation',
+                'm',
+                offset / offset_length if offset_length else (1, 0, 0),
+                '/entry/instrument/detector/transformations/detector_z',
+            )
+            add_transformation(
+                module,
+                'fast_pixel_direction',
+                pixelsize,
+                'translation',
+                'm',
+                (-1, 0, 0),
+                '/entry/instrument/detector/module/module_offset',
+            )
+            add_transformation(
+                module,
+                'slow_pixel_direction',
+                pixelsize,
+                'translation',
+                'm',
+                (0, -1, 0),
+                '/entry/instrument/detector/module/module_offset',
+            )
+
+            sample = add_group(entry, 'sample', 'NXsample')
+            sample['depends_on'] = '/entry/sample/transformations/omega'
+            transformations = add_group(sample, 'transformations', 'NXtransformations')
+            add_transformation(
+                transformations, 'omega', omega, 'rotation', 'deg', rotation_vector, '.'
+            )
+            transformations['omega_increment_set'] = self.osc_angle
+            transformations['omega_increment_set'].attrs['units'] = 'deg'
+            transformations['omega_end'] = omega_end
+            transformations['omega_end'].attrs['units'] = 'deg'
+
+            nxdata = add_group(entry, 'data', 'NXdata')
+            nxdata.attrs['signal'] = 'data'
+            nxdata['data'] = h5py.SoftLink('/entry/instrument/detector/data')
+
+        logger.debug(f'NeXus master file saved: {fn}')
+
+        plugin = config.settings.xds_hdf5_plugin
+        if plugin:
+            lib = f'LIB= {plugin}'
+        else:
+            lib = '!LIB= durin-plugin.so  ! Set the HDF5 plugin (Durin/Neggia) to read the data'
+            logger.warning('`xds_hdf5_plugin` is not set, add `LIB=` to XDS.INP to run XDS.')
+
+        # XDS finds the master file from the template of the data files
+        self.write_xds_inp(path, data_template=f'{name}_??????.h5\n{lib}')
+        export_dials_variables(
+            path,
+            sequence=self.observed_range,
+            missing=self.missing_range,
+            data=fn.name,
+        )
+
+        return fn
+
     def write_ed3d(self, path: Path) -> None:
         """Write .ed3d input file for REDp in directory `path`"""
         path.mkdir(exist_ok=True)
 
         omega = np.degrees(self.rotation_axis)
         omega = ((omega + 180) % 360) - 180  # for red, -180 <= omega <= 180
-        sign = -1 if self.start_angle > self.end_angle else +1
-
         with open(path / '1.ed3d', 'w') as f:
             print(f'WAVELENGTH    {self.wavelength}', file=f)
             print(f'ROTATIONAXIS    {omega:5f}', file=f)
@@ -559,17 +929,22 @@ class ImgConversion:
             print('', file=f)
             print('FILELIST', file=f)
 
-            for i in self.observed_range:
+            indices = sorted(self.observed_range)
+            _, angles = self.get_frame_angles(indices)
+            for i, angle in zip(indices, angles):
                 fn = f'{i:05d}.mrc'
-                angle = self.start_angle + sign * self.osc_angle * i
                 print(f'FILE {fn}    {angle: 12.4f}    0    {angle: 12.4f}', file=f)
 
             print('ENDFILELIST', file=f)
 
         logger.debug(f'ED3D file created in path: {path}')
 
-    def write_xds_inp(self, path: Path) -> None:
-        """Write XDS.INP input file for XDS in directory `path`"""
+    def write_xds_inp(self, path: Path, data_template: Optional[str] = None) -> None:
+        """Write XDS.INP input file for XDS in directory `path`
+
+        `data_template` overrides the NAME_TEMPLATE_OF_DATA_FRAMES, by
+        default the SMV frames in `self.smv_subdrc` are used.
+        """
 
         path.mkdir(exist_ok=True)
 
@@ -625,6 +1000,15 @@ class ImgConversion:
             rot_z=rot_z,
         )
 
+        if data_template:
+            s = re.sub(
+                r'^NAME_TEMPLATE_OF_DATA_FRAMES=.*$',
+                lambda m: f'NAME_TEMPLATE_OF_DATA_FRAMES= {data_template}',
+                s,
+                count=1,
+                flags=re.MULTILINE,
+            )
+
         with open(path / 'XDS.INP', 'w') as f:
             print(s, file=f)
 
@@ -641,7 +1025,6 @@ class ImgConversion:
         np.savetxt(path / 'beam_centers.txt', centers, fmt='%10.4f')
 
     def write_pets_inp(self, path: AnyPath, tiff_path: str = 'tiff') -> None:
-        sign = 1 if self.start_angle < self.end_angle else -1
         omega = np.degrees(self.rotation_axis) % 360
 
         if 'continuous' in self.method.lower():
@@ -663,8 +1046,9 @@ class ImgConversion:
         p.add('')
 
         s = []
-        for i in self.observed_range:
-            angle = self.start_angle + sign * self.osc_angle * i
+        indices = sorted(self.observed_range)
+        _, angles = self.get_frame_angles(indices)
+        for i, angle in zip(indices, angles):
             s.append(f'{tiff_path}/{i:05d}.tiff {angle:10.4f} 0.00')
         p.add('imagelist', *s)
 
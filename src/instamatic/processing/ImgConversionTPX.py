@@ -27,6 +27,8 @@ class ImgConversionTPX(ImgConversion):
         stretch_amplitude=0.0,  # Stretch correction amplitude, %
         stretch_azimuth=0.0,  # Stretch correction azimuth, degrees
         method: str = 'continuous-rotation 3D ED',  # or 'stills' or 'precession', used for CIF/documentation
+        rotation_trace: Optional[tuple] = None,  # (times, angles), `RotationMonitor.samples`
+        timestamps: Optional[dict] = None,  # {index: (t_start, t_end)} of the frames
     ):
         if flatfield is not None:
             flatfield, h = read_tiff(flatfield)
@@ -89,3 +91,6 @@ class ImgConversionTPX(ImgConversion):
         self.XDS_template = XDS_template
 
         self.check_settings()
+
+        if rotation_trace is not None:
+            self.fit_frame_angles(rotation_trace, timestamps=timestamps)
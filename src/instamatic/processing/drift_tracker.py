@@ -0,0 +1,345 @@
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+import numpy as np
+
+from instamatic.imreg import Registrator
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class DriftEstimate:
+    """Drift of a single frame with respect to the reference frame."""
+
+    index: int
+    time: float  # `time.perf_counter()` when the frame was submitted
+    shift: tuple[float, float]  # pixels (row, column), registers the frame with the reference
+    peak: float  # height of the correlation peak, 1 for identical frames
+    velocity: tuple[float, float]  # pixels / s (row, column), recent drift rate
+    correction: Optional[tuple[float, float]] = None  # deflector offset applied
+
+    @property
+    def drift(self) -> float:
+        """Distance to the reference in pixels."""
+        return float(np.hypot(*self.shift))
+
+    def __str__(self) -> str:
+        speed = np.hypot(*self.velocity)
+        s = f'Frame {self.index}: drift {self.drift:.1f} px ({speed:.2f} px/s)'
+        if self.correction is not None:
+            s += ', corrected by [{:+.0f} {:+.0f}]'.format(*self.correction)
+        return s
+
+
+class DriftCorrector:
+    """Rate-limited feedback of the measured drift to a deflector.
+
+    The drift (pixels) is converted to a deflector offset with `transform`
+    and a fraction `gain` of it is subtracted from the deflector. At most one
+    correction is applied every `min_interval` seconds, frames that were
+    submitted before the last correction are ignored, drift smaller than
+    `deadband` pixels is not corrected, and a single correction is limited
+    to `max_step` deflector units.
+
+    The correction is calculated by `update` (on the worker thread of the
+    `DriftTracker`), but only applied to the deflector by `apply`, which
+    must be called from the thread that controls the microscope, i.e.
+    between two frames of the acquisition loop. A correction that is still
+    queued when the acquisition ends is dropped with `discard`.
+
+    Parameters
+    ----------
+    deflector : Deflector
+        The deflector to correct, i.e. `ctrl.diffshift` or `ctrl.beamshift`
+    transform : np.ndarray
+        2x2 matrix, `shift @ transform` is the deflector offset that corresponds
+        to a shift of the frame of `shift` pixels (as returned by `Registrator`)
+    gain : float
+        Fraction of the drift to correct in one step
+    min_interval : float
+        Minimum time between corrections in seconds
+    deadband : float
+        Drift below this distance (pixels) is not corrected
+    max_step : float, optional
+        Maximum deflector change per correction (per axis)
+    """
+
+    def __init__(
+        self,
+        deflector,
+        transform: np.ndarray,
+        gain: float = 0.5,
+        min_interval: float = 5.0,
+        deadband: float = 1.0,
+        max_step: Optional[float] = None,
+    ):
+        super().__init__()
+        self.deflector = deflector
+        self.transform = np.asarray(transform, dtype=float)
+        self.gain = gain
+        self.min_interval = min_interval
+        self.deadband = deadband
+        self.max_step = max_step
+
+        self.corrections: list[tuple[float, np.ndarray]] = []
+        self._last_time = -np.inf
+        self._pending = None  # (offset, estimate)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_calibration(cls, ctrl, key: str = 'DiffShift', calib=None, **kwargs):
+        """Set up correction with `ctrl.diffshift` (`key='DiffShift'`) or
+        `ctrl.beamshift` (`key='BeamShift'`) from the direct beam
+        calibration (`instamatic.calibrate_directbeam`)."""
+        from instamatic.calibrate import CalibDirectBeam
+
+        if calib is None:
+            calib = CalibDirectBeam.from_file()
+
+        # linear part of the calibration, pixel shift -> deflector offset
+        origin = calib.pixelshift2any((0, 0), key=key)
+        transform = [calib.pixelshift2any(v, key=key) - origin for v in ((1, 0), (0, 1))]
+
+        deflector = getattr(ctrl, key.lower())
+        return cls(deflector, transform, **kwargs)
+
+    @property
+    def total(self) -> np.ndarray:
+        """Sum of all corrections applied so far."""
+        return sum((offset for _, offset in self.corrections), np.zeros(2))
+
+    def update(
+        self, shift: tuple[float, float], t: float, estimate: Optional[DriftEstimate] = None
+    ) -> Optional[np.ndarray]:
+        """Calculate the correction for the drift `shift` measured on a
+        frame submitted at time `t`. Returns the deflector offset that is
+        queued for `apply`, or None. The correction is recorded on
+        `estimate` once it is applied."""
+        with self._lock:
+            if self._pending is not None or t <= self._last_time:
+                return None
+            if time.perf_counter() - self._last_time < self.min_interval:
+                return None
+            if np.hypot(*shift) < self.deadband:
+                return None
+
+            offset = -self.gain * (np.asarray(shift) @ self.transform)
+            if self.max_step is not None:
+                offset = np.clip(offset, -self.max_step, self.max_step)
+
+            self._pending = (offset, estimate)
+            return offset
+
+    def apply(self) -> Optional[np.ndarray]:
+        """Apply the queued correction to the deflector, returns the offset
+        or None if there is nothing to correct."""
+        with self._lock:
+            pending, self._pending = self._pending, None
+        if pending is None:
+            return None
+        offset, estimate = pending
+
+        x, y = self.deflector.get()
+        self.deflector.set(x=int(round(x + offset[0])), y=int(round(y + offset[1])))
+
+        with self._lock:
+            self._last_time = time.perf_counter()
+            self.corrections.append((self._last_time, offset))
+        if estimate is not None:
+            estimate.correction = (float(offset[0]), float(offset[1]))
+        return offset
+
+    def discard(self) -> None:
+        """Drop the queued correction, if any."""
+        with self._lock:
+            self._pending = None
+
+
+class DriftTracker:
+    """Track the drift of the frames of a running data collection against a
+    reference frame on a background thread, and optionally correct for it
+    with a `DriftCorrector`.
+
+    Frames are registered with a `Registrator`, which caches the spectrum of
+    the reference, so every frame costs only one forward and one inverse FFT.
+    The first analyzed frame is the reference, unless `reference` is given.
+    Like `FrameQualityMonitor`, `submit` never blocks, frames are skipped if
+    the registration cannot keep up. With a `corrector`, call
+    `apply_correction` between frames to apply the queued corrections from
+    the acquisition thread.
+
+    Parameters
+    ----------
+    reference : np.ndarray, optional
+        Reference frame, defaults to the first analyzed frame
+    interval : int
+        Register every n-th submitted frame
+    corrector : DriftCorrector, optional
+        Feed the drift back to a deflector
+    callback : Callable[[DriftEstimate], None], optional
+        Called from the worker thread with every `DriftEstimate`
+    upsample_factor : int
+        Register to 1/`upsample_factor` of a pixel
+    binsize : int
+        Bin the frames before registration (faster, the shifts are in unbinned pixels)
+    roi : tuple[slice, slice], optional
+        Register only this region of the frames, i.e. around the primary beam
+    min_peak : float
+        Frames with a lower correlation peak are considered unreliable
+        and not used for correction
+    history : int
+        Number of recent estimates to calculate the drift rate from
+    maxsize : int
+        Maximum number of frames waiting for registration
+    log : logging.Logger, optional
+        Logger to write the drift to
+    """
+
+    def __init__(
+        self,
+        reference: Optional[np.ndarray] = None,
+        interval: int = 1,
+        corrector: Optional[DriftCorrector] = None,
+        callback: Optional[Callable[[DriftEstimate], None]] = None,
+        upsample_factor: int = 10,
+        binsize: int = 1,
+        roi: Optional[tuple[slice, slice]] = None,
+        min_peak: float = 0.05,
+        history: int = 10,
+        maxsize: int = 4,
+        log: Optional[logging.Logger] = None,
+    ):
+        super().__init__()
+        self.interval = max(int(interval), 1)
+        self.corrector = corrector
+        self.callback = callback
+        self.binsize = max(int(binsize), 1)
+        self.roi = roi
+        self.min_peak = min_peak
+        self.history = history
+        self.log = log or logger
+
+        # plain cross correlation, so that the bright primary beam dominates over
+        # static features such as the beam stop and the detector pattern
+        self.registrator = Registrator(
+            upsample_factor=upsample_factor, window='hann', normalization=None
+        )
+        if reference is not None:
+            self.registrator.set_reference(self._prepare(reference))
+
+        self.results: list[DriftEstimate] = []
+        self.dropped = 0
+
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._thread = None
+        self._n_submitted = 0
+
+    def __enter__(self) -> 'DriftTracker':
+        self.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def start(self) -> None:
+        """Start the worker thread."""
+        self._thread = threading.Thread(target=self._run, name='drift_tracker', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Register the remaining queued frames and stop the worker thread.
+
+        A correction that was not applied yet is dropped, the acquisition
+        has ended.
+        """
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+        if self.corrector:
+            self.corrector.discard()
+
+    def submit(self, index: int, img: np.ndarray) -> bool:
+        """Queue frame `img` for registration, returns False if the frame is
+        skipped."""
+        self._n_submitted += 1
+        if (self._n_submitted - 1) % self.interval:
+            return False
+        try:
+            self._queue.put_nowait((index, time.perf_counter(), img))
+        except queue.Full:
+            self.dropped += 1
+            return False
+        return True
+
+    def apply_correction(self) -> Optional[np.ndarray]:
+        """Apply the queued drift correction, if any (see
+        `DriftCorrector.apply`)."""
+        if not self.corrector:
+            return None
+        offset = self.corrector.apply()
+        if offset is not None:
+            self.log.info('Drift corrected by [{:+.0f} {:+.0f}]'.format(*offset))
+        return offset
+
+    def _prepare(self, img: np.ndarray) -> np.ndarray:
+        """Crop the frame to the region of interest and bin it."""
+        if self.roi is not None:
+            img = img[self.roi]
+        b = self.binsize
+        if b == 1:
+            return img
+        h, w = img.shape[0] // b * b, img.shape[1] // b * b
+        return img[:h, :w].reshape(h // b, b, w // b, b).mean(axis=(1, 3))
+
+    def velocity(self) -> np.ndarray:
+        """Drift rate (pixels / s) from a linear fit to the recent
+        estimates."""
+        recent = [r for r in self.results[-self.history :] if r.peak >= self.min_peak]
+        if len(recent) < 2:
+            return np.zeros(2)
+        t = np.array([r.time for r in recent])
+        shifts = np.array([r.shift for r in recent])
+        if np.ptp(t) == 0:
+            return np.zeros(2)
+        # drift is the displacement of the frame, opposite to the registration shift
+        return -np.polyfit(t - t[0], shifts, 1)[0]
+
+    def estimate(self, index: int, t: float, img: np.ndarray) -> DriftEstimate:
+        """Register `img` against the reference and store the estimate."""
+        img = self._prepare(img)
+        if self.registrator.shape is None:
+            self.registrator.set_reference(img)
+
+        shift, peak = self.registrator.register(img, return_peak=True)
+        shift = tuple(float(s) for s in shift * self.binsize)
+
+        estimate = DriftEstimate(
+            index=index, time=t, shift=shift, peak=float(peak), velocity=(0.0, 0.0)
+        )
+        self.results.append(estimate)
+        estimate.velocity = tuple(float(v) for v in self.velocity())
+        return estimate
+
+    def _run(self) -> None:
+        while (item := self._queue.get()) is not None:
+            index, t, img = item
+            try:
+                estimate = self.estimate(index, t, img)
+
+                if self.corrector and estimate.peak >= self.min_peak:
+                    self.corrector.update(estimate.shift, t, estimate=estimate)
+
+                self.log.info(str(estimate))
+                if self.callback:
+                    self.callback(estimate)
+            except Exception as e:
+                self.log.warning(f'Frame {index}: could not estimate drift ({e})')
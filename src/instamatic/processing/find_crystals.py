@@ -2,15 +2,15 @@ from __future__ import annotations
 
 import sys
 from collections import namedtuple
+from functools import lru_cache
 
 import matplotlib.pyplot as plt
 import numpy as np
 from scipy import ndimage
-from scipy._lib._util import _asarray_validated
 from scipy.cluster.vq import kmeans2
 from skimage import filters, measure, morphology, segmentation
 
-from instamatic.config import calibration
+from instamatic import config
 from instamatic.image_utils import autoscale
 
 CrystalPosition = namedtuple(
@@ -38,21 +38,15 @@ def isedge(prop):
     return False
 
 
-def whiten(obs, check_finite=False):
-    """Adapted from c:/python27/lib/site-
-    packages/skimage/filters/thresholding.py to return array and std_dev."""
-    obs = _asarray_validated(obs, check_finite=check_finite)
-    std_dev = np.std(obs, axis=0)
-    zero_std_mask = std_dev == 0
-    if zero_std_mask.any():
-        std_dev[zero_std_mask] = 1.0
-        raise RuntimeWarning(
-            'Some columns have standard deviation zero. The values of these columns will not change.'
-        )
-    return obs / std_dev, std_dev
+@lru_cache(maxsize=None)
+def _disk(radius: int) -> np.ndarray:
+    """Cached disk-shaped footprint for the binary morphology operations."""
+    footprint = morphology.disk(radius).astype(bool)
+    footprint.flags.writeable = False
+    return footprint
 
 
-def segment_crystals(img, r=101, offset=5, footprint=5, remove_carbon_lacing=True):
+def segment_crystals(img, r=101, offset=5, footprint=5, remove_carbon_lacing=True, mode='cg_j'):
     """
     r: `int`
        blocksize to calculate local threshold value
@@ -61,6 +55,9 @@ def segment_crystals(img, r=101, offset=5, footprint=5, remove_carbon_lacing=Tru
     offset: `int`
     Constant subtracted from weighted mean of neighborhood to calculate
         the local threshold value
+    mode: `str`
+        Segmentation of the region between features and background,
+        'cg_j' (default), 'cg' or 'bf' (solver for `random_walker`), or 'watershed' (fastest)
     """
     # workaround, because segmentation.random_walker no longer accepts floats from 0-255.0
     offset = offset / 255.0
@@ -75,31 +72,79 @@ def segment_crystals(img, r=101, offset=5, footprint=5, remove_carbon_lacing=Tru
 
     arr = morphology.remove_small_objects(arr, min_size=4 * 4, connectivity=0)  # remove noise
 
-    # magic
-    arr = morphology.binary_closing(arr, morphology.disk(footprint))  # dilation + erosion
-    arr = morphology.binary_erosion(arr, morphology.disk(footprint))  # erosion
+    # magic, erosion pads with True at the border, like `skimage.morphology.binary_erosion`
+    disk = _disk(footprint)
+    arr = ndimage.binary_dilation(arr, disk)  # closing: dilation + erosion
+    arr = ndimage.binary_erosion(arr, disk, border_value=1)
+    arr = ndimage.binary_erosion(arr, disk, border_value=1)  # erosion
 
     # remove carbon lines
     if remove_carbon_lacing:
         arr = morphology.remove_small_objects(arr, min_size=8 * 8, connectivity=0)
-        arr = morphology.remove_small_holes(arr, min_size=32 * 32, connectivity=0)
-    arr = morphology.binary_dilation(arr, morphology.disk(footprint))  # dilation
+        arr = morphology.remove_small_holes(arr, 32 * 32, connectivity=0)
+    arr = ndimage.binary_dilation(arr, disk)  # dilation
 
     # get background pixels
-    bkg = np.invert(morphology.binary_dilation(arr, morphology.disk(footprint * 2)) | arr)
+    bkg = np.invert(ndimage.binary_dilation(arr, _disk(footprint * 2)) | arr)
 
     # 2: features
     # 1: background
     # 0: unlabeled
     markers = arr * 2 + bkg
 
-    # segment using random_walker
-    segmented = segmentation.random_walker(img, markers, beta=50, spacing=(5, 5), mode='bf')
+    if mode == 'watershed':
+        segmented = segmentation.watershed(filters.sobel(img), markers)
+    else:
+        # segment using random_walker
+        segmented = segmentation.random_walker(img, markers, beta=50, spacing=(5, 5), mode=mode)
     segmented = segmented.astype(int) - 1
 
     return arr, segmented
 
 
+def cluster_regions(coordinates, regions, n_clusters, iters=20, seed=None):
+    """K-means clustering of the pixels of several regions.
+
+    The pixel coordinates of all regions are gathered in a single pass,
+    after which every region is clustered independently with `kmeans2` in
+    whitened coordinates.
+
+    coordinates: (n, 2) np.ndarray
+        Pixel coordinates
+    regions: (n,) np.ndarray
+        Index of the region (0, 1, ...) that each pixel belongs to
+    n_clusters: (m,) np.ndarray
+        Number of clusters for each region
+    iters: int
+        Number of iterations of the k-means algorithm
+    seed: int
+        Seed for the random initialization, centroids start on random pixels
+
+    Returns:
+        centroids: (k, 2) np.ndarray, region index of each centroid: (k,) np.ndarray
+    """
+    rng = np.random.default_rng(seed)
+    coordinates = np.asarray(coordinates, dtype=float)
+
+    order = np.argsort(regions, kind='stable')
+    bounds = np.cumsum(np.bincount(regions, minlength=len(n_clusters)))[:-1]
+
+    centroids = []
+    centroid_region = []
+    for i, (obs, k) in enumerate(zip(np.split(coordinates[order], bounds), n_clusters)):
+        # kmeans needs normalized data, store std to calculate coordinates after
+        std = np.std(obs, axis=0)
+        std[std == 0] = 1.0
+
+        k = min(int(k), len(obs))
+        cluster_centroids, _ = kmeans2(obs / std, k, iter=iters, minit='points', seed=rng)
+
+        centroids.append(cluster_centroids * std)
+        centroid_region.append(np.full(k, i))
+
+    return np.concatenate(centroids), np.concatenate(centroid_region)
+
+
 def find_crystals_timepix(img, magnification, spread=0.6, plot=False, **kwargs):
     """Specialized function with better defaults for timepix camera."""
     r = kwargs.get('r', 75)
@@ -119,6 +164,7 @@ def find_crystals_timepix(img, magnification, spread=0.6, plot=False, **kwargs):
         offset=offset,
         r=r,
         remove_carbon_lacing=False,
+        mode=kwargs.get('mode', 'cg_j'),
     )
 
 
@@ -148,17 +194,14 @@ def find_crystals(img, magnification, spread=2.0, plot=False, **kwargs):
     props = measure.regionprops(labels, img)
 
     # calculate the pixel dimensions in micrometer
-    px = py = calibration['mag1']['pixelsize'][magnification] / 1000  # nm -> um
+    px = py = config.calibration.table['mag1'].pixelsize(magnification) / 1000  # nm -> um
 
     iters = 20
 
-    crystals = []
+    positions = []
+    multi = {}  # label -> number of clusters
     for prop in props:
         area = prop.area * px * py
-        bbox = np.array(prop.bbox)
-
-        # origin of the prop
-        origin = bbox[0:2]
 
         # edge detection
         if isedge(prop):
@@ -168,21 +211,33 @@ def find_crystals(img, magnification, spread=2.0, plot=False, **kwargs):
         nclust = int(area // spread) + 1
 
         if nclust > 1:
-            # use skmeans clustering to segment large blobs
-            coordinates = np.argwhere(prop.image)
-
-            # kmeans needs normalized data (w), store std to calculate coordinates after
-            w, std = whiten(coordinates)
-
-            # nclust must be an integer for some reason
-            cluster_centroids, closest_centroids = kmeans2(
-                w, nclust, iter=iters, minit='points'
-            )
+            multi[prop.label] = nclust
+        positions.append((prop, area, nclust))
+
+    clusters = {}
+    if multi:
+        # use kmeans clustering to segment large blobs
+        lookup = np.full(numlabels + 1, -1)
+        lookup[list(multi)] = np.arange(len(multi))
+        region = lookup[labels]
+        coordinates = np.argwhere(region >= 0)
+        centroids, centroid_region = cluster_regions(
+            coordinates,
+            region[region >= 0],
+            np.array(list(multi.values())),
+            iters=iters,
+        )
+        for i, label in enumerate(multi):
+            clusters[label] = centroids[centroid_region == i] / scale
 
-            # convert to image coordinates
-            xy = (cluster_centroids * std + origin[0:2]) / scale
+    crystals = []
+    for prop, area, nclust in positions:
+        if nclust > 1:
             crystals.extend(
-                [CrystalPosition(x, y, False, nclust, area, prop.area) for x, y in xy]
+                [
+                    CrystalPosition(x, y, False, nclust, area, prop.area)
+                    for x, y in clusters[prop.label]
+                ]
             )
         else:
             x, y = prop.centroid
@@ -7,7 +7,7 @@ import numpy as np
 from scipy import ndimage
 from skimage import color, filters, measure, morphology, segmentation
 
-from instamatic.config import calibration
+from instamatic import config
 from instamatic.image_utils import autoscale
 
 plt.rcParams['image.cmap'] = 'gray'
@@ -112,7 +112,7 @@ def calculate_hole_area(diameter, magnification, img_scale=1, binsize=1):
         area: float,
             apprximate feature size in pixels
     """
-    px = py = calibration['lowmag']['pixelsize'][magnification] / 1000  # nm -> um
+    px = py = config.calibration.table['lowmag'].pixelsize(magnification) / 1000  # nm -> um
     px *= binsize / img_scale
     py *= binsize / img_scale
     hole_area = (np.pi * (diameter / 2.0) ** 2) / (px * py)
@@ -199,7 +199,9 @@ def find_holes_entry():
         print()
         for hole in holes:
             x, y = hole.centroid
-            px = py = calibration['lowmag']['pixelsize'][magnification] / 1000  # nm -> um
+            px = py = (
+                config.calibration.table['lowmag'].pixelsize(magnification) / 1000
+            )  # nm -> um
             area = hole.area * px * py / scale**2
             d = 2 * (area / np.pi) ** 0.5
             print(f'x: {x * scale:.2f}, y: {y * scale:.2f}, d: {d:.2f} um')
@@ -0,0 +1,231 @@
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+import numpy as np
+from scipy import ndimage
+
+from instamatic.tools import find_beam_center
+from instamatic.utils.beamstop import get_radial_integrator
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class FrameMetrics:
+    """Quality metrics of a single diffraction frame."""
+
+    index: int
+    n_spots: int
+    resolution: Optional[float]  # Angstrom, None if unknown
+    beam_center: tuple[float, float]
+    drift: float  # pixels, beam center displacement from the first frame
+
+    def __str__(self) -> str:
+        resolution = f'{self.resolution:.2f} Å' if self.resolution else '-'
+        return (
+            f'Frame {self.index}: {self.n_spots} spots, resolution {resolution}, '
+            f'beam center drift {self.drift:.1f} px'
+        )
+
+
+def find_spots(
+    img: np.ndarray,
+    center: tuple[float, float],
+    sigma: float = 5.0,
+    min_size: int = 2,
+    beam_radius: float = 20.0,
+) -> np.ndarray:
+    """Find diffraction spots in `img` as pixels that are `sigma` standard
+    deviations above the radially averaged background.
+
+    Parameters
+    ----------
+    img : np.ndarray
+        Diffraction pattern
+    center : tuple[float, float]
+        Position of the primary beam (row, column)
+    sigma : float
+        Detection threshold in (robust) standard deviations of the background
+    min_size : int
+        Minimum number of pixels in a spot
+    beam_radius : float
+        Pixels within this distance of the primary beam are ignored
+
+    Returns
+    -------
+    np.ndarray
+        Shape (n, 2), center of mass of every spot (row, column)
+    """
+    integrator = get_radial_integrator(img.shape, np.round(center))
+    background = integrator.radial_map(integrator(img))
+    residual = img - background
+
+    mad = np.median(np.abs(residual - np.median(residual)))
+    threshold = sigma * 1.4826 * max(mad, 1.0)
+
+    seg = residual > threshold
+    seg[integrator.bins < beam_radius] = False
+
+    labeled, n = ndimage.label(seg)
+    if n == 0:
+        return np.empty((0, 2))
+
+    index = np.arange(1, n + 1)
+    sizes = ndimage.sum_labels(seg, labeled, index)
+    index = index[sizes >= min_size]
+    if len(index) == 0:
+        return np.empty((0, 2))
+
+    return np.array(ndimage.center_of_mass(residual, labeled, index)).reshape(-1, 2)
+
+
+def frame_metrics(
+    index: int,
+    img: np.ndarray,
+    pixelsize: Optional[float] = None,
+    reference_center: Optional[tuple[float, float]] = None,
+    **kwargs,
+) -> FrameMetrics:
+    """Calculate the quality metrics for diffraction frame `img`.
+
+    Parameters
+    ----------
+    index : int
+        Frame number
+    img : np.ndarray
+        Diffraction pattern
+    pixelsize : float, optional
+        Reciprocal pixel size (Angstrom^-1 / pixel), required for the resolution estimate
+    reference_center : tuple[float, float], optional
+        Beam center to calculate the drift against
+    **kwargs
+        Passed to `find_spots`
+
+    Returns
+    -------
+    FrameMetrics
+    """
+    center = find_beam_center(img)
+    spots = find_spots(img, center, **kwargs)
+
+    resolution = None
+    if pixelsize and len(spots):
+        radius = np.percentile(np.linalg.norm(spots - center, axis=1), 95)
+        resolution = float(1 / (radius * pixelsize))
+
+    if reference_center is None:
+        drift = 0.0
+    else:
+        drift = float(np.linalg.norm(center - np.asarray(reference_center)))
+
+    return FrameMetrics(
+        index=index,
+        n_spots=len(spots),
+        resolution=resolution,
+        beam_center=(float(center[0]), float(center[1])),
+        drift=drift,
+    )
+
+
+class FrameQualityMonitor:
+    """Calculate `FrameMetrics` for the frames of a running data collection
+    on a background thread.
+
+    Frames are passed with `submit`, which never blocks: if the analysis
+    cannot keep up, frames are skipped. The results are written to the log
+    and passed to `callback`, and collected in `results`.
+
+    Parameters
+    ----------
+    pixelsize : float, optional
+        Reciprocal pixel size (Angstrom^-1 / pixel), required for the resolution estimate
+    callback : Callable[[FrameMetrics], None], optional
+        Called from the worker thread with the metrics of every analyzed frame
+    interval : int
+        Analyze every n-th submitted frame
+    maxsize : int
+        Maximum number of frames waiting for analysis
+    log : logging.Logger, optional
+        Logger to write the metrics to
+    """
+
+    def __init__(
+        self,
+        pixelsize: Optional[float] = None,
+        callback: Optional[Callable[[FrameMetrics], None]] = None,
+        interval: int = 1,
+        maxsize: int = 4,
+        log: Optional[logging.Logger] = None,
+    ):
+        super().__init__()
+        self.pixelsize = pixelsize
+        self.callback = callback
+        self.interval = max(int(interval), 1)
+        self.log = log or logger
+
+        self.results: list[FrameMetrics] = []
+        self.dropped = 0
+        self.reference_center = None
+
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._thread = None
+        self._n_submitted = 0
+
+    def __enter__(self) -> 'FrameQualityMonitor':
+        self.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def start(self) -> None:
+        """Start the worker thread."""
+        self._thread = threading.Thread(target=self._run, name='frame_quality', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Analyze the remaining queued frames and stop the worker
+        thread."""
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+
+    def submit(self, index: int, img: np.ndarray) -> bool:
+        """Queue frame `img` for analysis, returns False if the frame is
+        skipped."""
+        self._n_submitted += 1
+        if (self._n_submitted - 1) % self.interval:
+            return False
+        try:
+            self._queue.put_nowait((index, img))
+        except queue.Full:
+            self.dropped += 1
+            return False
+        return True
+
+    def _run(self) -> None:
+        while (item := self._queue.get()) is not None:
+            index, img = item
+            try:
+                metrics = frame_metrics(
+                    index,
+                    img,
+                    pixelsize=self.pixelsize,
+                    reference_center=self.reference_center,
+                )
+                if self.reference_center is None:
+                    self.reference_center = metrics.beam_center
+
+                self.results.append(metrics)
+                self.log.info(str(metrics))
+                if self.callback:
+                    self.callback(metrics)
+            except Exception as e:
+                self.log.warning(f'Frame {index}: could not calculate metrics ({e})')
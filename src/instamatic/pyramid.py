@@ -0,0 +1,344 @@
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from instamatic.formats.stack import MB, LRUCache, bin2
+
+
+def tile_weight(shape: tuple, method: str = 'weighted') -> np.ndarray:
+    """Blending weight for a tile of `shape`. With `weighted`, the weight
+    decreases linearly with the distance from the center of the tile, with
+    `average` all pixels have the same weight."""
+    if method == 'average':
+        return np.ones(shape, dtype=np.float32)
+    elif method != 'weighted':
+        raise ValueError(f'No such method: `{method}`')
+
+    a = np.arange(shape[0]) - (shape[0] - 1) / 2
+    b = np.arange(shape[1]) - (shape[1] - 1) / 2
+    r = np.hypot(a[:, np.newaxis], b[np.newaxis, :])
+    d = (r.max() - r) / r.max()
+    # small offset, so that the corners of the montage are not empty
+    return (d + 1e-3).astype(np.float32)
+
+
+class MontagePyramid:
+    """Multi-resolution pyramid of a montage, stored on disk as square
+    chunks of `chunk_size` pixels (`{path}/{level}/{cx}_{cy}.npy`).
+
+    Tiles are added one at a time with `add_tile`, and blended into the
+    chunks of level 0 that they overlap (the weighted sum and the sum of
+    the weights are stored), so the full mosaic never has to be in memory.
+    Level `n` is binned by `2**n`, its chunks are built on demand from the
+    4 chunks below, and kept on disk until one of them changes.
+
+    Coordinates follow the `Montage` convention, `x` is the row and `y` the
+    column in level 0 pixels, regions are read with `read_region`.
+
+    An existing pyramid in `path` is opened, unless `overwrite` is given.
+
+    Usage:
+        pyramid = MontagePyramid('pyramid')
+        for img, coord in zip(images, coords):
+            pyramid.add_tile(img, coord)
+        img = pyramid.read_region(0, 0, 1024, 1024, level=2)
+        pyramid.export('stitched.tiff')
+    """
+
+    META = 'pyramid.json'
+
+    def __init__(
+        self,
+        path: str,
+        chunk_size: int = 512,
+        method: str = 'weighted',
+        cache_size: float = 256,
+        overwrite: bool = False,
+    ):
+        super().__init__()
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+
+        meta = self.path / self.META
+        if meta.exists() and not overwrite:
+            d = json.loads(meta.read_text())
+        else:
+            d = {'chunk_size': chunk_size, 'method': method, 'tiles': [], 'bounds': None}
+
+        self.chunk_size = d['chunk_size']
+        self.method = d['method']
+        self.tiles = d['tiles']
+        self.bounds = d['bounds']  # xmin, ymin, xmax, ymax (level 0)
+
+        self.cache = LRUCache(int(cache_size * MB))
+        self._weights = {}
+
+        if overwrite:
+            self.clear()
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}('{self.path}', tiles={len(self.tiles)})"
+
+    @property
+    def n_levels(self) -> int:
+        """Number of levels, the last level fits in a single chunk."""
+        if not self.bounds:
+            return 1
+        xmin, ymin, xmax, ymax = self.bounds
+        extent = max(xmax - xmin, ymax - ymin)
+        return max(1, int(np.ceil(np.log2(max(extent / self.chunk_size, 1)))) + 1)
+
+    def shape(self, level: int = 0) -> tuple:
+        """Shape of the bounding box of all tiles at `level`."""
+        xmin, ymin, xmax, ymax = np.array(self.bounds) // 2**level
+        return xmax - xmin, ymax - ymin
+
+    def _chunk_fn(self, level: int, cx: int, cy: int) -> Path:
+        return self.path / str(level) / f'{cx}_{cy}.npy'
+
+    def _write_meta(self) -> None:
+        d = {
+            'chunk_size': self.chunk_size,
+            'method': self.method,
+            'tiles': self.tiles,
+            'bounds': self.bounds,
+        }
+        meta = self.path / self.META
+        tmp = meta.with_name(f'{meta.name}.tmp')
+        tmp.write_text(json.dumps(d))
+        os.replace(tmp, meta)
+
+    def clear(self) -> None:
+        """Remove all tiles and chunks from the pyramid."""
+        import shutil
+
+        for drc in self.path.iterdir():
+            if drc.is_dir() and drc.name.isdigit():
+                shutil.rmtree(drc)
+        self.tiles = []
+        self.bounds = None
+        self.cache.clear()
+        self._write_meta()
+
+    def _invalidate(self, cx: int, cy: int) -> None:
+        """Remove the chunks built from level 0 chunk `cx, cy`."""
+        self.cache.pop((0, cx, cy))
+        for level in range(1, self.n_levels + 1):
+            self.cache.pop((level, cx >> level, cy >> level))
+            self._chunk_fn(level, cx >> level, cy >> level).unlink(missing_ok=True)
+
+    def add_tile(self, image: np.ndarray, coord: tuple) -> None:
+        """Blend `image` into the pyramid at pixel coordinate `coord` (x0,
+        y0) of its upper left corner."""
+        cs = self.chunk_size
+        image = np.asarray(image, dtype=np.float32)
+        x0, y0 = (int(round(c)) for c in coord)
+        x1, y1 = x0 + image.shape[0], y0 + image.shape[1]
+
+        weight = self._weights.get(image.shape)
+        if weight is None:
+            weight = self._weights[image.shape] = tile_weight(image.shape, self.method)
+
+        for cx in range(x0 // cs, (x1 - 1) // cs + 1):
+            for cy in range(y0 // cs, (y1 - 1) // cs + 1):
+                fn = self._chunk_fn(0, cx, cy)
+                if fn.exists():
+                    raw = np.load(fn)
+                else:
+                    fn.parent.mkdir(exist_ok=True)
+                    raw = np.zeros((2, cs, cs), dtype=np.float32)
+
+                # overlap of the tile with the chunk, in chunk coordinates
+                a0, a1 = max(x0, cx * cs), min(x1, (cx + 1) * cs)
+                b0, b1 = max(y0, cy * cs), min(y1, (cy + 1) * cs)
+                tile = np.s_[a0 - x0 : a1 - x0, b0 - y0 : b1 - y0]
+                chunk = np.s_[a0 - cx * cs : a1 - cx * cs, b0 - cy * cs : b1 - cy * cs]
+
+                raw[0][chunk] += image[tile] * weight[tile]
+                raw[1][chunk] += weight[tile]
+                np.save(fn, raw)
+
+                self._invalidate(cx, cy)
+
+        if self.bounds:
+            xmin, ymin, xmax, ymax = self.bounds
+            self.bounds = [min(xmin, x0), min(ymin, y0), max(xmax, x1), max(ymax, y1)]
+        else:
+            self.bounds = [x0, y0, x1, y1]
+        self.tiles.append([x0, y0, *image.shape])
+        self._write_meta()
+
+    def chunk(self, level: int, cx: int, cy: int) -> Optional[np.ndarray]:
+        """Return chunk `cx, cy` of `level`, None if it is empty."""
+        key = (level, cx, cy)
+        img = self.cache.get(key)
+        if img is not None:
+            return img
+
+        fn = self._chunk_fn(level, cx, cy)
+
+        if level == 0:
+            if not fn.exists():
+                return None
+            total, weight = np.load(fn)
+            img = np.divide(total, weight, out=np.zeros_like(total), where=weight > 0)
+        elif fn.exists():
+            img = np.load(fn)
+        else:
+            children = [
+                [self.chunk(level - 1, 2 * cx + i, 2 * cy + j) for j in (0, 1)] for i in (0, 1)
+            ]
+            if all(child is None for row in children for child in row):
+                return None
+            cs = self.chunk_size
+            merged = np.zeros((2 * cs, 2 * cs), dtype=np.float32)
+            for i, row in enumerate(children):
+                for j, child in enumerate(row):
+                    if child is not None:
+                        merged[i * cs : (i + 1) * cs, j * cs : (j + 1) * cs] = child
+            img = bin2(merged)
+            fn.parent.mkdir(exist_ok=True)
+            np.save(fn, img)
+
+        img.flags.writeable = False
+        self.cache.put(key, img)
+        return img
+
+    def read_region(self, x0: int, y0: int, x1: int, y1: int, level: int = 0) -> np.ndarray:
+        """Read the region `[x0:x1, y0:y1]` (in pixels of `level`), only the
+        chunks that overlap with the region are read."""
+        cs = self.chunk_size
+        out = np.zeros((max(x1 - x0, 0), max(y1 - y0, 0)), dtype=np.float32)
+
+        for cx in range(x0 // cs, (x1 - 1) // cs + 1):
+            for cy in range(y0 // cs, (y1 - 1) // cs + 1):
+                img = self.chunk(level, cx, cy)
+                if img is None:
+                    continue
+                a0, a1 = max(x0, cx * cs), min(x1, (cx + 1) * cs)
+                b0, b1 = max(y0, cy * cs), min(y1, (cy + 1) * cs)
+                out[a0 - x0 : a1 - x0, b0 - y0 : b1 - y0] = img[
+                    a0 - cx * cs : a1 - cx * cs, b0 - cy * cs : b1 - cy * cs
+                ]
+
+        return out
+
+    def overview(self, max_size: int = 2048) -> tuple:
+        """Return the first level where all tiles fit in `max_size` pixels
+        as `(image, level)`, the image starts at the origin like
+        `Montage.stitched`."""
+        xmax, ymax = self.bounds[2:]
+        level = 0
+        while max(xmax, ymax) / 2**level > max_size and level < self.n_levels - 1:
+            level += 1
+        scale = 2**level
+        return self.read_region(0, 0, -(-xmax // scale), -(-ymax // scale), level), level
+
+    def export(self, outfile: str = 'stitched.tiff') -> None:
+        """Export the pyramid to a tiled, multi-resolution tiff file (the
+        levels are stored as sub-images), one chunk at a time."""
+        import tifffile
+
+        cs = self.chunk_size
+        n_levels = self.n_levels
+
+        def iter_chunks(level: int, cxs: range, cys: range):
+            empty = np.zeros((cs, cs), dtype=np.float32)
+            for cx in cxs:
+                for cy in cys:
+                    img = self.chunk(level, cx, cy)
+                    yield empty if img is None else img
+
+        # align the origin with the chunks of the top level, so that the
+        # chunks of every level are the tiles of the tiff file
+        xmin, ymin, xmax, ymax = self.bounds
+        step = cs * 2 ** (n_levels - 1)
+        ox, oy = xmin // step * step, ymin // step * step
+
+        with tifffile.TiffWriter(outfile, bigtiff=True) as tif:
+            for level in range(n_levels):
+                scale = 2**level
+                shape = -(-(xmax - ox) // scale), -(-(ymax - oy) // scale)
+                cx0, cy0 = ox // scale // cs, oy // scale // cs
+                cxs = range(cx0, cx0 - (-shape[0] // cs))
+                cys = range(cy0, cy0 - (-shape[1] // cs))
+                tif.write(
+                    iter_chunks(level, cxs, cys),
+                    shape=shape,
+                    dtype=np.float32,
+                    tile=(cs, cs),
+                    **(
+                        {'subfiletype': 1}
+                        if level
+                        else {'subifds': n_levels - 1, 'software': 'instamatic'}
+                    ),
+                )
+
+
+class PyramidView:
+    """Show a `MontagePyramid` on a matplotlib axis. When the view changes
+    (zoom/pan), only the chunks of the visible region are read, at the
+    level that matches the resolution of the screen.
+
+    binning: int,
+        divide the pixel coordinates by this factor, i.e. to overlay the
+        coordinates of a montage stitched with `binning`
+    transpose: bool,
+        show `x` horizontally and `y` vertically (see `Browser`)
+    **kwargs:
+        passed to `ax.imshow`
+    """
+
+    def __init__(
+        self, pyramid: MontagePyramid, ax, binning: int = 1, transpose: bool = False, **kwargs
+    ):
+        super().__init__()
+        self.pyramid = pyramid
+        self.ax = ax
+        self.binning = binning
+        self.transpose = transpose
+
+        img, self.level = pyramid.overview()
+        self.region = None
+        self.im = ax.imshow(img.T if transpose else img, **kwargs)
+        self.im.set_extent(self._extent(0, 0, *img.shape, self.level))
+        ax.set_autoscale_on(False)
+        ax.callbacks.connect('xlim_changed', self.update)
+        ax.callbacks.connect('ylim_changed', self.update)
+
+    def _extent(self, x0, y0, x1, y1, level) -> tuple:
+        """Extent of a region of `level` in display coordinates."""
+        s = 2**level / self.binning
+        if self.transpose:
+            return (x0 * s, x1 * s, y1 * s, y0 * s)
+        return (y0 * s, y1 * s, x1 * s, x0 * s)
+
+    def visible(self) -> tuple:
+        """Visible region in level 0 pixels (x0, y0, x1, y1)."""
+        (h0, h1), (v0, v1) = sorted(self.ax.get_xlim()), sorted(self.ax.get_ylim())
+        if self.transpose:
+            x0, x1, y0, y1 = h0, h1, v0, v1
+        else:
+            x0, x1, y0, y1 = v0, v1, h0, h1
+        return tuple(int(c * self.binning) for c in (x0, y0, x1, y1))
+
+    def update(self, ax=None) -> None:
+        x0, y0, x1, y1 = self.visible()
+        screen = max(self.ax.bbox.width, self.ax.bbox.height, 1)
+        level = int(np.clip(np.log2(max(x1 - x0, y1 - y0, 1) / screen), 0, None))
+        level = min(level, self.pyramid.n_levels - 1)
+
+        scale = 2**level
+        region = (x0 // scale, y0 // scale, -(-x1 // scale), -(-y1 // scale))
+        if (region, level) == (self.region, self.level):
+            return
+        self.region, self.level = region, level
+
+        img = self.pyramid.read_region(*region, level=level)
+        self.im.set_data(img.T if self.transpose else img)
+        self.im.set_extent(self._extent(*region, level))
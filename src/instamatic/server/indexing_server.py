@@ -0,0 +1,412 @@
+from __future__ import annotations
+
+import ast
+import datetime
+import json
+import logging
+import os
+import socket
+import subprocess as sp
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Callable, Optional, Sequence, Union
+
+from instamatic import config
+
+logger = logging.getLogger(__name__)
+
+HOST = config.settings.indexing_server_host
+PORT = config.settings.indexing_server_port
+BUFF = 1024
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+LOGFILE = 'indexing.log'
+
+
+@dataclass
+class IndexingJob:
+    """State of a single indexing job."""
+
+    id: int
+    path: str
+    status: str = QUEUED
+    info: dict = field(default_factory=dict)  # extra data sent with the job, i.e. `nframes`
+    submitted: float = field(default_factory=time.time)
+    started: Optional[float] = None
+    finished: Optional[float] = None
+    returncode: Optional[int] = None
+    result: str = ''
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in (DONE, FAILED)
+
+
+class JobStore:
+    """Keeps track of the indexing jobs, and persists their state to the
+    json file `path` on every change, so that the queue survives a restart
+    of the server."""
+
+    def __init__(self, path: Optional[str] = None):
+        super().__init__()
+        self.path = Path(path) if path else None
+        self.jobs: dict[int, IndexingJob] = {}
+        self.lock = threading.RLock()
+        self.load()
+
+    def load(self) -> None:
+        if not (self.path and self.path.exists()):
+            return
+        try:
+            jobs = json.loads(self.path.read_text())
+        except (OSError, ValueError) as e:
+            logger.warning('Could not read job state `%s`: %s', self.path, e)
+            return
+        self.jobs = {job['id']: IndexingJob(**job) for job in jobs}
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        # the workers save concurrently, keep the lock until the file is replaced
+        with self.lock:
+            s = json.dumps([asdict(job) for job in self.jobs.values()], indent=2)
+            tmp = self.path.with_name(f'{self.path.name}.tmp')
+            tmp.write_text(s)
+            os.replace(tmp, self.path)
+
+    def add(self, path: str, info: dict) -> IndexingJob:
+        with self.lock:
+            job = IndexingJob(id=max(self.jobs, default=0) + 1, path=path, info=info)
+            self.jobs[job.id] = job
+        self.save()
+        return job
+
+    def update(self, job: IndexingJob, **kwargs) -> None:
+        with self.lock:
+            for key, value in kwargs.items():
+                setattr(job, key, value)
+        self.save()
+
+    def find(self, path: str) -> Optional[IndexingJob]:
+        """Return the most recent job for `path`."""
+        with self.lock:
+            jobs = [job for job in self.jobs.values() if job.path == path]
+        return jobs[-1] if jobs else None
+
+
+def read_unit_cell(job: IndexingJob) -> str:
+    """Default result parser, returns the lines reporting the unit cell from
+    the output of the indexing program."""
+    try:
+        lines = (Path(job.path) / LOGFILE).read_text().splitlines()
+    except OSError:
+        return ''
+    return '\n'.join(line.strip() for line in lines if 'Unit cell' in line)
+
+
+class IndexingServer:
+    """Indexing server with a job queue.
+
+    Jobs are run by a pool of `workers`, each job runs `command` as a
+    separate process in the data directory of the job, with the output
+    written to `indexing.log` in that directory. The arguments in
+    `command` can refer to the data directory as `{path}`. The result of
+    the job is obtained by calling `parse_result(job)`.
+
+    Submitting a path that is queued, running or already indexed returns
+    the existing job, unless `force` is given. Failed jobs are rerun.
+
+    The server accepts the following requests (one per message):
+
+    - `{"verb": "submit", "path": ..., "force": false, ...}`: queue the
+      data directory for indexing, any additional items are stored in the
+      job `info`, returns the job
+    - `{"verb": "status", "job": id}` or `{"verb": "status", "path": ...}`:
+      returns the job
+    - `{"verb": "result", "job": id, "timeout": null}`: wait until the job
+      has finished, and return it
+    - `{"verb": "list"}`: returns all jobs
+    - `close` / `kill`: close the connection / stop the server
+
+    Replies are json. For compatibility with older clients, a dict without
+    `verb` (i.e. `{"path": ..., "nframes": ...}`) submits the job and
+    replies `OK`, and a bare path submits the job, replies `OK`, and sends
+    the result when the job has finished.
+    """
+
+    def __init__(
+        self,
+        command: Sequence[str],
+        workers: Optional[int] = None,
+        state_file: Optional[str] = None,
+        parse_result: Optional[Callable[[IndexingJob], str]] = None,
+    ):
+        super().__init__()
+        self.command = list(command)
+        self.workers = workers or config.settings.indexing_server_workers
+        self.parse_result = parse_result or read_unit_cell
+        self.store = JobStore(state_file)
+
+        self._finished: dict[int, threading.Event] = {}
+        self._futures: dict[int, Future] = {}
+        self._stopped = False
+        self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix='indexing')
+        self._socket = None
+        self.address = None
+
+        # requeue the jobs that were interrupted by the last shutdown
+        for job in list(self.store.jobs.values()):
+            if not job.is_finished:
+                self._queue(job)
+
+    def submit(self, path: str, force: bool = False, **info) -> IndexingJob:
+        """Queue data directory `path` for indexing, returns the job."""
+        path = os.path.abspath(path)
+        with self.store.lock:
+            job = self.store.find(path)
+            if job and job.status != FAILED and not (force and job.is_finished):
+                logger.info('Job %d for `%s` is %s', job.id, path, job.status)
+                return job
+            job = self.store.add(path, info)
+
+        logger.info('Job %d queued: `%s`', job.id, path)
+        self._queue(job)
+        return job
+
+    def _queue(self, job: IndexingJob) -> None:
+        self.store.update(job, status=QUEUED)
+        self._finished[job.id] = threading.Event()
+        self._futures[job.id] = self._executor.submit(self._run, job)
+
+    def _run(self, job: IndexingJob) -> None:
+        returncode, status, result = None, FAILED, ''
+        try:
+            self.store.update(job, status=RUNNING, started=time.time())
+            cmd = [arg.format(path=job.path) for arg in self.command]
+
+            with open(Path(job.path) / LOGFILE, 'w') as f:
+                p = sp.run(cmd, cwd=job.path, stdout=f, stderr=sp.STDOUT)
+            result = self.parse_result(job)
+            returncode = p.returncode
+            status = DONE if returncode == 0 else FAILED
+        except Exception as e:
+            logger.exception(e)
+            result = f'{type(e).__name__}: {e}'
+        finally:
+            # always wake up the waiting clients, even if the state cannot be saved
+            try:
+                self.store.update(
+                    job,
+                    status=status,
+                    returncode=returncode,
+                    result=result,
+                    finished=time.time(),
+                )
+            except Exception as e:
+                logger.exception(e)
+            self._finished[job.id].set()
+
+        logger.info('Job %d %s: `%s`', job.id, status, job.path)
+        now = datetime.datetime.now().strftime('%H:%M:%S.%f')
+        print(f'{now} | Job {job.id} {status}: {job.path}')
+
+    def status(self, job_id: Optional[int] = None, path: Optional[str] = None):
+        """Return the job with `job_id` or the last job for `path`, None if
+        it does not exist."""
+        if job_id is not None:
+            return self.store.jobs.get(job_id)
+        return self.store.find(os.path.abspath(path))
+
+    def wait(self, job_id: int, timeout: Optional[float] = None) -> IndexingJob:
+        """Block until job `job_id` has finished (or `timeout`), returns the
+        job.
+
+        Raises RuntimeError if the server was stopped before the job ran.
+        """
+        event = self._finished.get(job_id)
+        if event is not None:
+            event.wait(timeout)
+        job = self.store.jobs[job_id]
+        if self._stopped and not job.is_finished:
+            raise RuntimeError(
+                f'Server stopped, job {job_id} is {job.status} and resumes after a restart'
+            )
+        return job
+
+    def handle_request(self, request: dict) -> object:
+        """Handle a single request, returns the reply (json-serializable)."""
+        request = dict(request)
+        verb = request.pop('verb')
+
+        if verb == 'submit':
+            job = self.submit(**request)
+        elif verb in ('status', 'result'):
+            job = self.status(job_id=request.get('job'), path=request.get('path'))
+            if job and verb == 'result':
+                job = self.wait(job.id, timeout=request.get('timeout'))
+        elif verb == 'list':
+            return [asdict(job) for job in self.store.jobs.values()]
+        else:
+            return {'error': f'Unknown verb: {verb}'}
+
+        return asdict(job) if job else {'error': 'No such job'}
+
+    def handle(self, conn: socket.socket) -> None:
+        """Handle incoming connection."""
+        with conn:
+            while True:
+                data = conn.recv(BUFF).decode()
+                now = datetime.datetime.now().strftime('%H:%M:%S.%f')
+
+                if not data:
+                    break
+
+                print(f'{now} | {data}')
+                if data == 'close':
+                    print(f'{now} | Closing connection')
+                    break
+
+                elif data == 'kill':
+                    print(f'{now} | Killing server')
+                    self.stop()
+                    break
+
+                try:
+                    request = parse_request(data)
+                    if 'verb' in request:
+                        reply = json.dumps(self.handle_request(request))
+                        conn.send(reply.encode())
+                    elif is_dict(data):
+                        self.submit(**request)
+                        conn.send(b'OK')
+                    else:
+                        job = self.submit(request['path'])
+                        conn.send(b'OK')
+                        conn.send(self.wait(job.id).result.encode())
+                except Exception as e:
+                    logger.exception(e)
+                    conn.send(json.dumps({'error': f'{type(e).__name__}: {e}'}).encode())
+
+            try:
+                conn.send(b'Connection closed')
+            except OSError:
+                pass
+
+        print('Connection closed')
+
+    def serve(self, host: str = HOST, port: int = PORT) -> None:
+        """Accept connections on `host:port` until `stop` is called."""
+        self._socket = s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        s.bind((host, port))
+        s.listen(5)
+        self.address = s.getsockname()
+
+        logger.info(f'Indexing server listening on {host}:{self.address[1]}')
+        print(f'Indexing server listening on {host}:{self.address[1]} ({self.workers} workers)')
+
+        with s:
+            while True:
+                try:
+                    conn, addr = s.accept()
+                except OSError:  # socket closed by `stop`
+                    break
+                logger.info('Connected by %s', addr)
+                print('Connected by', addr)
+                threading.Thread(target=self.handle, args=(conn,), daemon=True).start()
+
+    def stop(self) -> None:
+        """Stop accepting connections, and shut down the workers once the
+        running jobs have finished (queued jobs resume after a restart)."""
+        if self._socket is not None:
+            try:
+                # wakes up `accept`, closing the socket alone does not on linux
+                self._socket.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            self._socket.close()
+        self._stopped = True
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+        # wake up the clients waiting for a job that will not run
+        for job_id, future in self._futures.items():
+            if future.cancelled():
+                self._finished[job_id].set()
+
+
+def is_dict(data: str) -> bool:
+    return data.lstrip().startswith('{')
+
+
+def parse_request(data: str) -> dict:
+    """Parse a request, either a json or python dict, or a bare path."""
+    if is_dict(data):
+        try:
+            return json.loads(data)
+        except ValueError:
+            return ast.literal_eval(data)
+    return {'path': data.strip()}
+
+
+def main_server(
+    name: str,
+    command: Union[Sequence[str], Callable[[object], Sequence[str]]],
+    parse_result=None,
+    description: str = '',
+    add_arguments: Optional[Callable] = None,
+) -> None:
+    """Set up logging and command line options, and run the indexing
+    server.
+
+    `command` can be a function that returns the command from the parsed
+    command line options, `add_arguments(parser)` adds its options.
+    """
+    import argparse
+
+    program = f'the {name} program' if callable(command) else f'`{" ".join(command)}`'
+    description = f"""
+Starts an indexing server ({name}) to send indexing jobs to. Runs {program} for every job sent to it, using a pool of workers. Opens a socket on port {HOST}:{PORT}.
+{description}
+The state of the jobs is stored in the logs directory, so that queued jobs continue after a restart.
+"""
+
+    parser = argparse.ArgumentParser(
+        description=description, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        '-w',
+        '--workers',
+        type=int,
+        default=config.settings.indexing_server_workers,
+        help='Number of indexing jobs to run in parallel (default: %(default)s)',
+    )
+    if add_arguments:
+        add_arguments(parser)
+
+    options, _ = parser.parse_known_args()
+    if callable(command):
+        command = command(options)
+
+    date = datetime.datetime.now().strftime('%Y-%m-%d')
+    logfile = config.locations['logs'] / f'instamatic_indexing_server_{date}.log'
+    logging.basicConfig(
+        format='%(asctime)s | %(module)s:%(lineno)s | %(levelname)s | %(message)s',
+        filename=logfile,
+        level=logging.DEBUG,
+    )
+    logging.captureWarnings(True)
+
+    server = IndexingServer(
+        command,
+        workers=options.workers,
+        state_file=config.locations['logs'] / f'indexing_jobs_{name.lower()}.json',
+        parse_result=parse_result,
+    )
+    server.serve(HOST, PORT)
@@ -8,6 +8,13 @@ from diffpy import structure as diffpy
 Crystal_T = TypeVar('Crystal_T', bound='Crystal')
 
 
+def _hkl_grid(max_h: int, max_k: int, max_l: int) -> np.ndarray:
+    """All integer (h, k, l) with |h| <= max_h etc. as a (n, 3) array, with
+    l varying fastest."""
+    hkls = np.mgrid[-max_h : max_h + 1, -max_k : max_k + 1, -max_l : max_l + 1]
+    return hkls.reshape(3, -1).T
+
+
 class Crystal:
     def __init__(
         self, a: float, b: float, c: float, alpha: float, beta: float, gamma: float
@@ -45,6 +52,10 @@ class Crystal:
             lattice=self.lattice,
         )
 
+        # Lattice points only depend on `d_min`, so they are calculated once
+        self._reciprocal_lattice_cache = {}
+        self._reflections_cache = {}
+
     @property
     def a_vec(self) -> np.ndarray:
         return self.lattice.cartesian((1, 0, 0))
@@ -89,14 +100,7 @@ class Crystal:
         max_h = int(d_max // self.a)
         max_k = int(d_max // self.b)
         max_l = int(d_max // self.c)
-        hkls = np.array(
-            [
-                (h, k, l)
-                for h in range(-max_h, max_h + 1)  # noqa: E741
-                for k in range(-max_k, max_k + 1)  # noqa: E741
-                for l in range(-max_l, max_l + 1)  # noqa: E741
-            ]
-        )
+        hkls = _hkl_grid(max_h, max_k, max_l)
         vecs = self.lattice.cartesian(hkls)
         return vecs
 
@@ -114,18 +118,30 @@ class Crystal:
         np.ndarray
             Shape (n, 3), lattice points
         """
+        try:
+            return self._reciprocal_lattice_cache[d_min]
+        except KeyError:
+            pass
         max_h = int(d_min // self.lattice.ar)
         max_k = int(d_min // self.lattice.br)
         max_l = int(d_min // self.lattice.cr)
-        hkls = np.array(
-            [
-                (h, k, l)
-                for h in range(-max_h, max_h + 1)  # noqa: E741
-                for k in range(-max_k, max_k + 1)  # noqa: E741
-                for l in range(-max_l, max_l + 1)  # noqa: E741
-            ]
-        )
+        hkls = _hkl_grid(max_h, max_k, max_l)
         vecs = self.lattice.reciprocal().cartesian(hkls)
+        vecs.flags.writeable = False
+        self._reciprocal_lattice_cache[d_min] = vecs
+        return vecs
+
+    def _reflections_within(self, d_min: float) -> np.ndarray:
+        """Cached reciprocal lattice points with length below `d_min`."""
+        try:
+            return self._reflections_cache[d_min]
+        except KeyError:
+            pass
+        vecs = self.reciprocal_space_lattice(d_min)
+        d = np.sum(vecs**2, axis=1)
+        vecs = vecs[d < d_min**2]
+        vecs.flags.writeable = False
+        self._reflections_cache[d_min] = vecs
         return vecs
 
     def diffraction_pattern_mask(
@@ -163,9 +179,7 @@ class Crystal:
         # TODO this depends on convergence angle
         spot_radius = 3  # pixels
 
-        vecs = self.reciprocal_space_lattice(d_min)
-        d = np.sum(vecs**2, axis=1)
-        vecs = vecs[d < d_min**2]
+        vecs = self._reflections_within(d_min)
 
         k = 2 * np.pi / wavelength
         k_vec = rotation_matrix @ np.array([0, 0, -k])
@@ -180,15 +194,16 @@ class Crystal:
         # Project onto screen
         vecs_xy = (rotation_matrix.T @ vecs.T).T[:, :-1]  # ignoring curvature
 
-        # Make image
-        for vec in vecs_xy:
-            x = int(vec[0] * d_min * shape[1] / 2) + shape[1] // 2
-            y = int(vec[1] * d_min * shape[0] / 2) + shape[0] // 2
-            min_x = max(0, x - spot_radius)
-            max_x = min(shape[1], x + spot_radius)
-            min_y = max(0, y - spot_radius)
-            max_y = min(shape[0], y + spot_radius)
-            out[min_y:max_y, min_x:max_x] = 1
+        # Make image, every spot is a square of 2 * spot_radius pixels
+        x = np.trunc(vecs_xy[:, 0] * d_min * shape[1] / 2).astype(int) + shape[1] // 2
+        y = np.trunc(vecs_xy[:, 1] * d_min * shape[0] / 2).astype(int) + shape[0] // 2
+        offsets = np.arange(-spot_radius, spot_radius)
+        yy, xx = np.broadcast_arrays(
+            y[:, np.newaxis, np.newaxis] + offsets[np.newaxis, :, np.newaxis],
+            x[:, np.newaxis, np.newaxis] + offsets[np.newaxis, np.newaxis, :],
+        )
+        inside = (yy >= 0) & (yy < shape[0]) & (xx >= 0) & (xx < shape[1])
+        out[yy[inside], xx[inside]] = 1
         return out
 
     def __str__(self) -> str:
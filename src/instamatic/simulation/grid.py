@@ -67,11 +67,12 @@ class Grid:
     def get_center_mark(self, x: np.ndarray, y: np.ndarray) -> np.ndarray:
         # TODO
         warnings.warn('Center mark is not implemented yet', NotImplementedWarning)
-        return np.zeros(x.shape, dtype=bool)
+        return np.zeros(np.broadcast_shapes(x.shape, y.shape), dtype=bool)
 
     def array_from_coords(self, x: np.ndarray, y: np.ndarray) -> np.ndarray:
         """Get mask array for given coordinate arrays (output from
-        np.meshgrid). (x, y) = (0, 0) is in the center of the grid.
+        np.meshgrid, or a row and a column vector that broadcast to the
+        output shape). (x, y) = (0, 0) is in the center of the grid.
 
         Parameters
         ----------
@@ -123,8 +124,7 @@ class Grid:
         np.ndarray
             Mask array, False where the grid is blocking
         """
-        x, y = np.meshgrid(
-            np.linspace(x_min, x_max, shape[1]),
-            np.linspace(y_min, y_max, shape[0]),
-        )
+        # Broadcasting a row and a column vector avoids building full meshgrids
+        x = np.linspace(x_min, x_max, shape[1])[np.newaxis, :]
+        y = np.linspace(y_min, y_max, shape[0])[:, np.newaxis]
         return self.array_from_coords(x, y)
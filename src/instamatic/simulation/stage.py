@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import warnings
+from typing import Optional
 
 import numpy as np
 from scipy.spatial.transform import Rotation
@@ -8,6 +9,7 @@ from scipy.spatial.transform import Rotation
 from instamatic.simulation.crystal import Crystal
 from instamatic.simulation.grid import Grid
 from instamatic.simulation.sample import Sample
+from instamatic.simulation.tiles import TileCache, assemble_tiles, pixel_lattice
 from instamatic.simulation.warnings import NotImplementedWarning
 
 
@@ -18,6 +20,8 @@ class Stage:
         min_crystal_size: float = 100,
         max_crystal_size: float = 1000,
         random_seed: int = 100,
+        tile_size: int = 64,
+        tile_cache_size: Optional[int] = None,
     ) -> None:
         """Handle many samples on a grid.
 
@@ -31,6 +35,11 @@ class Stage:
             Maximum radius of the crystals, in nm, by default 1000
         random_seed : int, optional
             Seed for random number generation, by default 100
+        tile_size : int, optional
+            Size of the square tiles, in pixels, used to cache rendered images, by default 64
+        tile_cache_size : int, optional
+            Maximum number of tiles kept in memory, by default enough for two
+            frames of the largest image shape requested so far (i.e. the camera)
         """
         # TODO make this settable
         self.x = 0
@@ -64,6 +73,13 @@ class Stage:
             )
             for _ in range(num_crystals)
         ]
+        self._sample_xyr = np.array([(s.x, s.y, s.r) for s in self.samples]).reshape(-1, 3)
+
+        self._k_scale_cache = {}
+
+        self.tile_size = tile_size
+        self.tiles = TileCache(maxsize=tile_cache_size or 0)
+        self._auto_tile_cache_size = tile_cache_size is None
 
     def set_position(
         self,
@@ -101,6 +117,54 @@ class Stage:
             degrees=True,
         ).as_matrix()
 
+    def samples_in_range(
+        self,
+        x_min: float,
+        x_max: float,
+        y_min: float,
+        y_max: float,
+    ) -> list[Sample]:
+        """Vectorized equivalent of `Sample.range_might_contain_crystal` over
+        all samples on the stage.
+
+        Parameters
+        ----------
+        x_min : float
+            Lower bound for x
+        x_max : float
+            Upper bound for x
+        y_min : float
+            Lower bound for y
+        y_max : float
+            Upper bound for y
+
+        Returns
+        -------
+        list[Sample]
+            Samples that might be (partially) inside the range
+        """
+        x, y, r = self._sample_xyr.T
+        in_x = (x_min <= x + r) & (x - r <= x_max)
+        in_y = (y_min <= y + r) & (y - r <= y_max)
+        return [self.samples[i] for i in np.flatnonzero(in_x & in_y)]
+
+    def _k_scale(self, shape: tuple[int, int], d_min: float) -> np.ndarray:
+        """Cached intensity scale map in k-space for the given shape."""
+        key = (tuple(shape), d_min)
+        try:
+            return self._k_scale_cache[key]
+        except KeyError:
+            pass
+        kx, ky = np.meshgrid(
+            np.linspace(-1 / d_min, 1 / d_min, shape[1]),
+            np.linspace(-1 / d_min, 1 / d_min, shape[0]),
+        )
+        k_squared = kx**2 + ky**2
+        scale = 1 / (3 * k_squared + 1)
+        scale.flags.writeable = False
+        self._k_scale_cache[key] = scale
+        return scale
+
     def image_extent_to_sample_coordinates(
         self,
         shape: tuple[int, int],
@@ -185,18 +249,28 @@ class Stage:
         np.ndarray
             Image
         """
+        if self._use_tiles(shape):
+            return self._assemble_tiles('image', shape, x_min, x_max, y_min, y_max)
+
         x, y = self.image_extent_to_sample_coordinates(
             shape=shape, x_min=x_min, x_max=x_max, y_min=y_min, y_max=y_max
         )
+        return self._render_image(x, y, x_min=x_min, x_max=x_max, y_min=y_min, y_max=y_max)
 
+    def _render_image(
+        self,
+        x: np.ndarray,
+        y: np.ndarray,
+        x_min: float,
+        x_max: float,
+        y_min: float,
+        y_max: float,
+    ) -> np.ndarray:
+        """Render the image for (broadcastable) sample coordinate arrays."""
         grid_mask = self.grid.array_from_coords(x, y)
 
-        sample_data = np.ones(shape, dtype=int) * 1000
-        for ind, sample in enumerate(self.samples):
-            if not sample.range_might_contain_crystal(
-                x_min=x_min, x_max=x_max, y_min=y_min, y_max=y_max
-            ):
-                continue
+        sample_data = np.ones(grid_mask.shape, dtype=int) * 1000
+        for sample in self.samples_in_range(x_min=x_min, x_max=x_max, y_min=y_min, y_max=y_max):
             # TODO better logic here
             sample_data[sample.pixel_contains_crystal(x, y)] = 1000 * (1 - sample.thickness)
 
@@ -204,6 +278,58 @@ class Stage:
 
         return sample_data
 
+    def _use_tiles(self, shape: tuple[int, int]) -> bool:
+        """Tiles can be reused if sample and lab coordinates are aligned."""
+        return min(shape) > 1 and np.allclose(self.rotation_matrix, np.eye(3))
+
+    def _tile_coordinates(
+        self, dx: float, dy: float, ty: int, tx: int
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Sample coordinates of tile (ty, tx) as a row (x) and column (y)
+        vector."""
+        pixels = np.arange(self.tile_size)
+        x = (tx * self.tile_size + pixels) * dx
+        y = (ty * self.tile_size + pixels) * dy
+        return x[np.newaxis, :], y[:, np.newaxis]
+
+    def _render_tile(self, kind: str, dx: float, dy: float, ty: int, tx: int) -> np.ndarray:
+        x, y = self._tile_coordinates(dx, dy, ty, tx)
+        if kind == 'grid':
+            return self.grid.array_from_coords(x, y)
+        return self._render_image(
+            x, y, x_min=x[0, 0], x_max=x[0, -1], y_min=y[0, 0], y_max=y[-1, 0]
+        )
+
+    def _assemble_tiles(
+        self,
+        kind: str,
+        shape: tuple[int, int],
+        x_min: float,
+        x_max: float,
+        y_min: float,
+        y_max: float,
+    ) -> np.ndarray:
+        """Assemble the `kind` ('image' or 'grid') array for the given extent
+        from cached tiles. The extent is snapped to the nearest pixel on a
+        global pixel lattice, so that frames at the same magnification and
+        shape share tiles, and a small stage move only renders the newly
+        exposed tiles."""
+        dx, dy, ix0, iy0 = pixel_lattice(shape, x_min, x_max, y_min, y_max)
+
+        if self._auto_tile_cache_size:
+            # a frame covers up to (n + 1) tiles along each axis, keep two frames
+            n_tiles = (shape[0] // self.tile_size + 2) * (shape[1] // self.tile_size + 2)
+            self.tiles.maxsize = max(self.tiles.maxsize, 2 * n_tiles)
+
+        def get_tile(ty: int, tx: int) -> np.ndarray:
+            return self.tiles.get(
+                (kind, dx, dy, ty, tx), lambda: self._render_tile(kind, dx, dy, ty, tx)
+            )
+
+        return assemble_tiles(
+            shape, ix0=ix0, iy0=iy0, tile_size=self.tile_size, get_tile=get_tile
+        )
+
     def get_diffraction_pattern(
         self,
         shape: tuple[int, int],
@@ -236,12 +362,18 @@ class Stage:
         np.ndarray
             diffraction pattern
         """
-        x, y = self.image_extent_to_sample_coordinates(
-            shape=shape, x_min=x_min, x_max=x_max, y_min=y_min, y_max=y_max
-        )
         d_min = 1.0
 
-        grid_mask = self.grid.array_from_coords(x, y)
+        if self._use_tiles(shape):
+            grid_mask = self._assemble_tiles('grid', shape, x_min, x_max, y_min, y_max)
+            dx, dy, ix0, iy0 = pixel_lattice(shape, x_min, x_max, y_min, y_max)
+            x = ((ix0 + np.arange(shape[1])) * dx)[np.newaxis, :]
+            y = ((iy0 + np.arange(shape[0])) * dy)[:, np.newaxis]
+        else:
+            x, y = self.image_extent_to_sample_coordinates(
+                shape=shape, x_min=x_min, x_max=x_max, y_min=y_min, y_max=y_max
+            )
+            grid_mask = self.grid.array_from_coords(x, y)
 
         if np.all(grid_mask):
             # no transmission
@@ -254,11 +386,7 @@ class Stage:
             shape[0] // 2 - 4 : shape[0] // 2 + 4, shape[1] // 2 - 4 : shape[1] // 2 + 4
         ] = 1
 
-        for sample in self.samples:
-            if not sample.range_might_contain_crystal(
-                x_min=x_min, x_max=x_max, y_min=y_min, y_max=y_max
-            ):
-                continue
+        for sample in self.samples_in_range(x_min=x_min, x_max=x_max, y_min=y_min, y_max=y_max):
             pos = sample.pixel_contains_crystal(x, y)
             if np.all(grid_mask[pos]):
                 # Crystal is completely on the grid
@@ -278,14 +406,7 @@ class Stage:
         # Simple scaling
         # TODO improve, proper form factors maybe
         # TODO camera length
-        kx, ky = np.meshgrid(
-            np.linspace(-1 / d_min, 1 / d_min, shape[1]),
-            np.linspace(-1 / d_min, 1 / d_min, shape[0]),
-        )
-        k_squared = kx**2 + ky**2
-        scale = 1 / (3 * k_squared + 1)
-
-        scale[~reflections] = 0
+        scale = np.where(reflections, self._k_scale(shape, d_min), 0)
 
         # Convert to int array
         scale = (scale * 0x8000).astype(int)
@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import Callable, Hashable
+
+import numpy as np
+
+
+class TileCache:
+    def __init__(self, maxsize: int = 512) -> None:
+        """Least-recently-used cache for rendered image tiles.
+
+        Parameters
+        ----------
+        maxsize : int, optional
+            Maximum number of tiles to keep in memory, by default 512
+        """
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._tiles: OrderedDict[Hashable, np.ndarray] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._tiles)
+
+    def clear(self) -> None:
+        self._tiles.clear()
+
+    def get(self, key: Hashable, render: Callable[[], np.ndarray]) -> np.ndarray:
+        """Get the tile for `key`, calling `render()` to create it if it is
+        not in the cache.
+
+        Parameters
+        ----------
+        key : Hashable
+            Unique identifier of the tile
+        render : Callable[[], np.ndarray]
+            Function that renders the tile
+
+        Returns
+        -------
+        np.ndarray
+            Read-only tile
+        """
+        try:
+            tile = self._tiles[key]
+        except KeyError:
+            self.misses += 1
+            tile = render()
+            tile.flags.writeable = False
+            self._tiles[key] = tile
+            if len(self._tiles) > self.maxsize:
+                self._tiles.popitem(last=False)
+        else:
+            self.hits += 1
+            self._tiles.move_to_end(key)
+        return tile
+
+
+def pixel_lattice(
+    shape: tuple[int, int],
+    x_min: float,
+    x_max: float,
+    y_min: float,
+    y_max: float,
+) -> tuple[float, float, int, int]:
+    """Snap an image extent to a global pixel lattice with its origin at (0,
+    0), so that frames with the same pixel size share tiles.
+
+    Parameters
+    ----------
+    shape : tuple[int, int]
+        Image shape, must be at least 2 in both dimensions
+    x_min : float
+        Lower bound for x
+    x_max : float
+        Upper bound for x
+    y_min : float
+        Lower bound for y
+    y_max : float
+        Upper bound for y
+
+    Returns
+    -------
+    tuple[float, float, int, int]
+        Pixel size dx, dy and index of the first pixel along x, y. The pixel
+        size is rounded to 12 significant digits, so that it does not differ
+        in the last bits between stage positions and can be used as cache key.
+    """
+    dx = float(f'{(x_max - x_min) / (shape[1] - 1):.12g}')
+    dy = float(f'{(y_max - y_min) / (shape[0] - 1):.12g}')
+    return dx, dy, int(round(x_min / dx)), int(round(y_min / dy))
+
+
+def assemble_tiles(
+    shape: tuple[int, int],
+    ix0: int,
+    iy0: int,
+    tile_size: int,
+    get_tile: Callable[[int, int], np.ndarray],
+) -> np.ndarray:
+    """Assemble an image with `shape` starting at global pixel (iy0, ix0) from
+    square tiles.
+
+    Parameters
+    ----------
+    shape : tuple[int, int]
+        Output shape
+    ix0 : int
+        Global index of the first pixel along x
+    iy0 : int
+        Global index of the first pixel along y
+    tile_size : int
+        Width and height of the tiles in pixels
+    get_tile : Callable[[int, int], np.ndarray]
+        Returns the tile with index (ty, tx), covering global pixels
+        ty * tile_size ... (ty + 1) * tile_size along y, etc.
+
+    Returns
+    -------
+    np.ndarray
+        Assembled image
+    """
+    ty0, tx0 = iy0 // tile_size, ix0 // tile_size
+    ty1, tx1 = (iy0 + shape[0] - 1) // tile_size, (ix0 + shape[1] - 1) // tile_size
+
+    rows = [
+        np.concatenate([get_tile(ty, tx) for tx in range(tx0, tx1 + 1)], axis=1)
+        for ty in range(ty0, ty1 + 1)
+    ]
+    canvas = np.concatenate(rows, axis=0)
+
+    oy = iy0 - ty0 * tile_size
+    ox = ix0 - tx0 * tile_size
+    return canvas[oy : oy + shape[0], ox : ox + shape[1]].copy()
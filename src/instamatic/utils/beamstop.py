@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from functools import lru_cache
 from pathlib import Path
 
 import numpy as np
@@ -72,6 +73,105 @@ def minimum_bounding_rectangle(points):
     return rval
 
 
+class RadialIntegrator:
+    """Azimuthal integration plan for images of a given shape, center and
+    mask.
+
+    The radius bins and pixel weights are computed once; integrating a
+    frame (or a stack of frames) is then a single sparse matrix-vector
+    product. Use `get_radial_integrator` to reuse the plans between calls.
+
+    Parameters
+    ----------
+    shape : tuple
+        Shape (rows, columns) of the images to integrate.
+    center : array
+        The array indices of the diffraction pattern center about which the
+        radial integration is performed.
+    mask : array, optional
+        Boolean array with `shape`, pixels set to True are excluded.
+    bin_width : float
+        Width of the radial bins in pixels.
+    """
+
+    def __init__(self, shape, center, mask=None, bin_width: float = 1.0):
+        from scipy import sparse
+
+        self.shape = tuple(shape)
+        self.center = tuple(center)
+        self.bin_width = bin_width
+
+        y, x = np.indices(self.shape)
+        r = np.sqrt((x - center[1]) ** 2 + (y - center[0]) ** 2)
+        self.bins = (r / bin_width).astype(int)
+        self.nbins = self.bins.max() + 1
+
+        bins = self.bins.ravel()
+        if mask is None:
+            pixels = np.arange(bins.size)
+        else:
+            pixels = np.flatnonzero(~np.asarray(mask, dtype=bool))
+        bins = bins[pixels]
+
+        self.counts = np.bincount(bins, minlength=self.nbins)
+        with np.errstate(divide='ignore'):
+            weights = 1.0 / self.counts
+
+        # (nbins, npixels) matrix averaging the pixels in every bin
+        self._matrix = sparse.csr_matrix(
+            (weights[bins], (bins, pixels)),
+            shape=(self.nbins, self.bins.size),
+        )
+        self._empty = self.counts == 0
+
+    @property
+    def radius(self) -> np.ndarray:
+        """Inner radius of every bin, in pixels."""
+        return np.arange(self.nbins) * self.bin_width
+
+    def __call__(self, z) -> np.ndarray:
+        """Radial profile of image `z`, or of every frame for a stack with
+        shape (n, rows, columns). Empty bins are set to NaN.
+        """
+        z = np.asarray(z)
+        if z.shape[-2:] != self.shape:
+            raise ValueError(f'Image shape {z.shape[-2:]} does not match {self.shape}')
+
+        if z.ndim == 2:
+            averaged = self._matrix @ z.ravel()
+        else:
+            averaged = z.reshape(-1, self.bins.size) @ self._matrix.T
+
+        averaged[..., self._empty] = np.nan
+        return averaged
+
+    def radial_map(self, profile) -> np.ndarray:
+        """Map the radial profile to the pixel positions of the 2D image."""
+        return profile[..., self.bins]
+
+
+@lru_cache(maxsize=8)
+def _get_radial_integrator(shape, center, mask_bytes, bin_width) -> RadialIntegrator:
+    if mask_bytes is not None:
+        mask = np.frombuffer(mask_bytes, dtype=bool).reshape(shape)
+    else:
+        mask = None
+    return RadialIntegrator(shape, center, mask=mask, bin_width=bin_width)
+
+
+def get_radial_integrator(shape, center, mask=None, bin_width: float = 1.0) -> RadialIntegrator:
+    """Return a (cached) `RadialIntegrator` for the given shape, center and
+    mask.
+
+    The plan is cached on the exact center, which pays off when the same
+    center is used for many frames (round it if it varies slightly). For
+    a one-off center, `radial_average` is faster.
+    """
+    mask_bytes = None if mask is None else np.asarray(mask, dtype=bool).tobytes()
+    center = tuple(float(c) for c in center)
+    return _get_radial_integrator(tuple(shape), center, mask_bytes, bin_width)
+
+
 def radial_average(z, center, as_radial_map=False):
     """Calculate the radial profile by azimuthal averaging about a specified
     center.
@@ -89,6 +189,8 @@ def radial_average(z, center, as_radial_map=False):
     radial_profile : array
         Radial profile of the diffraction pattern.
     """
+    # a single bincount is faster than setting up a `RadialIntegrator` for
+    # a center that is used once, i.e. the beam center of every new image
     y, x = np.indices(z.shape)
     r = np.sqrt((x - center[1]) ** 2 + (y - center[0]) ** 2)
     r = r.astype(int)
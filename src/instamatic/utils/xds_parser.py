@@ -1,11 +1,15 @@
 from __future__ import annotations
 
 import os
+import re
 import shutil
 import sys
 import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from math import cos, radians
 from pathlib import Path
+from typing import Optional
 
 
 def volume(cell):
@@ -26,6 +30,122 @@ def volume(cell):
     return vol
 
 
+# Matches the lines of interest in `CORRECT.LP` in a single pass, the
+# named group of every alternative holds the value to parse. All of them
+# start with the literal `\n `, so that `re` can skip ahead to the next line
+# instead of trying every position.
+CORRECT_LP = re.compile(
+    r'\n (?:'
+    r'UNIT CELL PARAMETERS(?P<cell>[^\n]*)'
+    r'|SPACE GROUP NUMBER(?P<spgr>[^\n]*)'
+    r'|    a        b          ISa[^\n]*\n(?P<ISa>[^\n]*)'
+    r'|  WILSON LINE \(using all data\)(?P<Boverall>[^\n]*)'
+    r'|  -{74}[^\n]*\n(?P<res_range>[^\n]*)'
+    r'|SUBSET OF INTENSITY DATA WITH SIGNAL/NOISE >= -3\.0 AS FUNCTION OF RESOLUTION\n'
+    r'(?P<shells>(?s:.*?)\n    total[^\n]*)'
+    r')'
+)
+RAW_CELL = 'as used by INTEGRATE\n'
+
+SHELL_KEYS = ('ntot', 'nuniq', 'completeness', 'ios', 'rmeas', 'cchalf')
+
+
+def parse_shell(line: str) -> Optional[tuple]:
+    """Parse a line of the resolution shell table, returns `(dmin, dict)`,
+    where `dmin` is `'total'` for the last line, or None if the line is not
+    part of the table."""
+    inp = line.split()
+    if len(inp) != 14:
+        return None
+
+    res = inp[0]
+    if res != 'total':
+        try:
+            res = float(res)
+        except ValueError:
+            return None
+
+    values = (
+        int(inp[1]),
+        int(inp[2]),
+        float(inp[4].strip('%')),
+        float(inp[8]),
+        float(inp[9].strip('%')),
+        float(inp[10].strip('*')),
+    )
+    return res, dict(zip(SHELL_KEYS, values))
+
+
+def parse_correct_lp(filename: str, ios_threshold: float = 0.8) -> Optional[dict]:
+    """Parse the XDS output file `CORRECT.LP` for the lattice parameters,
+    space group, and integration statistics (see `xds_parser`).
+
+    Resolution shells with I/sigma below `ios_threshold` are omitted from
+    the statistics, the outer shell is the highest resolution shell above
+    the threshold. All shells are listed under `shells`. Returns None if
+    there are no shells above the threshold, and raises ValueError if the
+    file is incomplete.
+    """
+    fn = Path(filename)
+    with open(fn) as f:
+        text = '\n' + f.read()
+
+    # only the last occurrence counts
+    found = {m.lastgroup: m[m.lastgroup] for m in CORRECT_LP.finditer(text)}
+
+    # the raw cell is identified by the end of the line
+    end = text.rfind(RAW_CELL)
+    if end >= 0:
+        found['raw_cell'] = text[text.rfind('\n', 0, end) + 1 : end]
+
+    missing = {'cell', 'raw_cell', 'spgr', 'ISa', 'Boverall', 'res_range'} - set(found)
+    if missing:
+        raise ValueError(f'{fn}: Could not find {", ".join(sorted(missing))}')
+
+    cell = list(map(float, found['cell'].split()[:6]))
+    raw_cell = list(map(float, found['raw_cell'].split()[1:7]))
+    dmax_range, dmin_range = found['res_range'].split()[:2]
+
+    d = {}
+    d['ISa'] = float(found['ISa'].split()[2])
+    d['Boverall'] = float(found['Boverall'].split()[-3])
+
+    dmin = 999
+    shells = []
+
+    for line in found.get('shells', '').splitlines():
+        shell = parse_shell(line)
+        if shell is None:
+            continue
+        res, values = shell
+
+        if res != 'total':
+            shells.append({'dmin': res, **values})
+            if values['ios'] < ios_threshold:
+                continue
+            if res < dmin:
+                outer_shell = (dmin, res)
+                dmin = res
+
+        d[res] = values
+
+    if dmin == 999:
+        return
+
+    d['outer'] = dmin
+    d['outer_shell'] = outer_shell
+    d['shells'] = shells
+    d['res_range'] = float(dmax_range), float(dmin_range)
+    d['volume'] = volume(cell)
+    d['cell'] = cell
+    d['raw_cell'] = raw_cell
+    d['raw_volume'] = volume(raw_cell)
+    d['spgr'] = int(found['spgr'].split()[-1])
+    d['fn'] = fn.resolve()
+
+    return d
+
+
 class xds_parser:
     """Parser for XDS output files to obtain the lattice parameters, space
     group, and integration criteria."""
@@ -38,108 +158,7 @@ class xds_parser:
         self.d = self.parse()
 
     def parse(self):
-        ios_threshold = self.ios_threshold
-
-        fn = self.filename
-
-        f = open(fn)
-
-        in_block = False
-        block = []
-
-        d = {}
-
-        for line in f:
-            if line.startswith(
-                ' SUBSET OF INTENSITY DATA WITH SIGNAL/NOISE >= -3.0 AS FUNCTION OF RESOLUTION'
-            ):
-                in_block = True
-                block = []
-            elif line.startswith('    total'):
-                block.append(line.strip('\n'))
-                in_block = False
-            elif line.startswith(' UNIT CELL PARAMETERS'):
-                cell = list(map(float, line.strip('\n').split()[3:9]))
-            elif line.endswith('as used by INTEGRATE\n'):
-                raw_cell = list(map(float, line.strip('\n').split()[1:7]))
-            elif line.startswith(' SPACE GROUP NUMBER'):
-                spgr = int(line.strip('\n').split()[-1])
-            elif line.startswith('     a        b          ISa'):
-                line = next(f)
-                inp = line.split()
-                ISa = float(inp[2])
-            elif line.startswith('   WILSON LINE (using all data)'):
-                inp = line.split()
-                Boverall = float(inp[-3])
-            elif line.startswith(
-                '   --------------------------------------------------------------------------'
-            ):
-                line = next(f)
-                inp = line.split()
-                resolution_range = float(inp[0]), float(inp[1])
-
-            if in_block:
-                if line:
-                    block.append(line.strip('\n'))
-
-        vol = volume(cell)
-        raw_vol = volume(raw_cell)
-
-        d['ISa'] = ISa
-        d['Boverall'] = Boverall
-
-        dmin = 999
-
-        for line in block:
-            inp = line.split()
-            if len(inp) != 14:
-                continue
-
-            try:
-                res = float(inp[0])
-            except ValueError:
-                res = inp[0]
-                if res != 'total':
-                    continue
-
-            res = float(inp[0]) if inp[0] != 'total' else inp[0]
-            ntot, nuniq, completeness = int(inp[1]), int(inp[2]), float(inp[4].strip('%'))
-            ios, rmeas, cchalf = (
-                float(inp[8]),
-                float(inp[9].strip('%')),
-                float(inp[10].strip('*')),
-            )
-
-            if ios < ios_threshold and res != 'total':
-                continue
-
-            if (res != 'total') and (res < dmin):
-                shell = (dmin, res)
-                dmin = res
-
-            d[res] = {
-                'ntot': ntot,
-                'nuniq': nuniq,
-                'completeness': completeness,
-                'ios': ios,
-                'rmeas': rmeas,
-                'cchalf': cchalf,
-            }
-
-        if dmin == 999:
-            return
-
-        d['outer'] = dmin
-        d['outer_shell'] = shell
-        d['res_range'] = resolution_range
-        d['volume'] = vol
-        d['cell'] = cell
-        d['raw_cell'] = raw_cell
-        d['raw_volume'] = raw_vol
-        d['spgr'] = spgr
-        d['fn'] = fn
-
-        return d
+        return parse_correct_lp(self.filename, ios_threshold=self.ios_threshold)
 
     def info_header(self):
         s = '  #   dmax  dmin    ntot   nuniq   compl   i/sig   rmeas CC(1/2)     ISa   B(ov)\n'
@@ -284,6 +303,78 @@ def parse_fns(fns):
     return new_fns
 
 
+SUMMARY_COLUMNS = (
+    'fn spgr a b c al be ga volume raw_volume ISa Boverall dmax dmin '
+    'ntot nuniq completeness ios rmeas cchalf '
+    'outer_dmax outer_dmin outer_ntot outer_nuniq outer_completeness outer_ios '
+    'outer_rmeas outer_cchalf mtime error'
+).split()
+
+
+def summarize_correct_lp(filename: str, ios_threshold: float = 0.8) -> dict:
+    """Parse `CORRECT.LP` into a flat dict with the cell and the statistics
+    of all data and of the outer shell, a row of `parse_tree`.
+
+    Instead of raising, the reason that the file could not be parsed is
+    stored under `error`.
+    """
+    row = {'fn': str(filename)}
+
+    try:
+        d = parse_correct_lp(filename, ios_threshold=ios_threshold)
+        row['mtime'] = os.path.getmtime(filename)
+    except (OSError, ValueError) as e:
+        row['error'] = str(e)
+        return row
+
+    if d is None:
+        row['error'] = f'No resolution shells with I/sigma >= {ios_threshold}'
+        return row
+
+    row['spgr'] = d['spgr']
+    row.update(zip('a b c al be ga'.split(), d['cell']))
+    row['volume'] = d['volume']
+    row['raw_volume'] = d['raw_volume']
+    row['ISa'] = d['ISa']
+    row['Boverall'] = d['Boverall']
+    row['dmax'], row['dmin'] = d['res_range']
+    row.update(d['total'])
+    row['outer_dmax'], row['outer_dmin'] = d['outer_shell']
+    row.update({f'outer_{key}': value for key, value in d[d['outer']].items()})
+
+    return row
+
+
+def parse_tree(*paths, ios_threshold: float = 0.8, workers: Optional[int] = None):
+    """Parse all `CORRECT.LP` files in the given files/directories into a
+    `pd.DataFrame` with a row for every file (see `summarize_correct_lp`).
+
+    The files are parsed in parallel using `workers` processes (default:
+    the number of cpus), `workers=1` parses them in the current process.
+    As the worker processes are spawned on Windows, this function must be
+    called from the `if __name__ == '__main__'` block of a script.
+
+    Usage:
+        df = parse_tree('autocred_data')
+        df[(df.ISa > 5) & (df.completeness > 50)].sort_values('dmin')
+    """
+    import pandas as pd
+
+    fns = sorted(parse_fns([Path(path) for path in paths] or [Path('.')]))
+    summarize = partial(summarize_correct_lp, ios_threshold=ios_threshold)
+
+    workers = min(workers or os.cpu_count() or 1, len(fns))
+
+    if workers <= 1:
+        rows = [summarize(fn) for fn in fns]
+    else:
+        chunksize = max(1, len(fns) // (4 * workers))
+        with ProcessPoolExecutor(workers) as executor:
+            rows = list(executor.map(summarize, fns, chunksize=chunksize))
+
+    return pd.DataFrame.from_records(rows, columns=SUMMARY_COLUMNS)
+
+
 def main():
     fns = sys.argv[1:]
 
@@ -299,7 +390,7 @@ def main():
     for fn in fns:
         try:
             p = xds_parser(fn)
-        except UnboundLocalError:
+        except ValueError:
             continue
         else:
             if p.d:
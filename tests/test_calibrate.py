@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+
+@pytest.fixture
+def image_series() -> list[np.ndarray]:
+    rng = np.random.default_rng(seed=0)
+    img = rng.random((128, 128))
+    return [np.roll(img, shift=(3 * i, -2 * i), axis=(0, 1)) for i in range(5)]
+
+
+@pytest.mark.parametrize('max_workers', [None, 2, 3])
+def test_cross_correlate_image_series(image_series, max_workers):
+    from instamatic.calibrate.calibrate_stagematrix import (
+        cross_correlate_image_pair,
+        cross_correlate_image_series,
+    )
+
+    expected = [
+        cross_correlate_image_pair(a, b) for a, b in zip(image_series, image_series[1:])
+    ]
+
+    series_x, series_y = cross_correlate_image_series(
+        image_series, image_series[::-1], max_workers=max_workers
+    )
+
+    assert len(series_x) == len(series_y) == len(image_series) - 1
+    np.testing.assert_allclose(series_x, expected)
+    np.testing.assert_allclose(series_x, [(-3, 2)] * 4)
+    np.testing.assert_allclose(series_y, [(3, -2)] * 4)
+
+
+def test_cross_correlate_image_series_verbose(image_series, capsys):
+    from instamatic.calibrate.calibrate_stagematrix import cross_correlate_image_series
+
+    cross_correlate_image_series(image_series)
+    assert capsys.readouterr().out == ''
+
+    # the command line prints the shifts to judge the fit
+    cross_correlate_image_series(image_series, verbose=True)
+    assert capsys.readouterr().out.count('shift [') == len(image_series) - 1
+
+
+@pytest.mark.parametrize('start_offset', [-180, 0, 240])
+def test_optimize_diffraction_focus(ctrl, monkeypatch, start_offset):
+    from instamatic.calibrate import calibrate_directbeam
+
+    ctrl.mode.set('diff')
+    optimum = ctrl.difffocus.value + 137
+    exposures = []
+
+    def get_image(*args, **kwargs):
+        """Primary beam that broadens away from the optimal focus."""
+        exposures.append(kwargs)
+        sigma = np.hypot(1.5, (ctrl.difffocus.value - optimum) / 5)
+        yy, xx = np.indices((256, 256))
+        img = 1000 * np.exp(-((yy - 120) ** 2 + (xx - 140) ** 2) / (2 * sigma**2))
+        return img, {}
+
+    monkeypatch.setattr(ctrl, 'get_image', get_image)
+    monkeypatch.setattr(calibrate_directbeam, '_difffocus_warm_start', {})
+
+    start = optimum + start_offset
+    ctrl.difffocus.set(start)
+    grid = calibrate_directbeam.optimize_diffraction_focus(ctrl)
+    n_grid = len(exposures)
+
+    exposures.clear()
+    ctrl.difffocus.set(start)
+    best = calibrate_directbeam.optimize_diffraction_focus(ctrl, method='search')
+
+    assert len(exposures) < 10 < n_grid
+    assert all(kwargs['header_keys'] is None for kwargs in exposures)
+    assert ctrl.difffocus.value == best
+    assert abs(best - optimum) <= 5
+    assert abs(best - grid) <= 5
+
+    # warm start from the last optimum
+    exposures.clear()
+    ctrl.difffocus.set(start)
+    assert abs(calibrate_directbeam.search_diffraction_focus(ctrl) - optimum) <= 5
+    assert len(exposures) < 10
+
+
+def test_stage_motion_model():
+    from instamatic.calibrate import CalibStageRotation, StageMotionModel
+    from instamatic.calibrate.calibrate_stage_translation import CalibStageTranslationX
+
+    model = StageMotionModel.from_file()
+    assert set(model.calibrations) == {'a'}  # only rotation is calibrated in tests/config
+    assert model.move_time((0, 0, 0, 0.0, 0.0), {'a': 10.0}, speed=5) == 2.0
+    assert np.isnan(model.move_time((0, 0, 0, 0.0, 0.0), {'x': 1000}))
+
+    model = StageMotionModel(
+        {
+            'x': CalibStageTranslationX(pace=1e-5, windup=0.0, delay=0.1),
+            'y': CalibStageTranslationX(pace=2e-5, windup=0.0, delay=0.1),
+            'a': CalibStageRotation(pace=0.1, windup=0.0, delay=0.5),
+        },
+        settle=0.2,
+    )
+    start = (0, 0, 0, 0.0, 0.0)
+    assert model.move_time(start, start) == 0.0
+    # x and y move together, the rotation before
+    assert np.isclose(model.move_time(start, (10_000, 10_000, None, 10.0)), 1.5 + 0.3 + 0.2)
+
+    # backlash correction: approach from (10_000, 10_000)
+    t = model.move_time(start, {'x': 20_000, 'y': 20_000}, backlash_step=10_000)
+    assert np.isclose(t, (0.3 + 0.2) * 2)
+
+    times = model.path_times(start, [(10_000, 0), (10_000, 10_000), (10_000, 10_000)])
+    np.testing.assert_allclose(times, [0.1 + 0.1 + 0.2, 0.2 + 0.1 + 0.2, 0.0])
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import os
+
+import numpy as np
+import pytest
+
+
+def test_config_snapshot(tmp_path, monkeypatch):
+    from instamatic.config.snapshot import ConfigSnapshot, yaml
+
+    fn = tmp_path / 'settings.yaml'
+    fn.write_text('a: 1\nb: [1, 2]\n')
+    path = tmp_path / '.config_snapshot.pickle'
+
+    snapshot = ConfigSnapshot(path)
+    assert snapshot.load_yaml(fn) == {'a': 1, 'b': [1, 2]}
+    assert path.exists()
+
+    # copies are returned, loaded from the snapshot without parsing
+    monkeypatch.setattr(yaml, 'load', None)
+    snapshot = ConfigSnapshot(path)
+    dct = snapshot.load_yaml(fn)
+    dct['b'].append(3)
+    assert snapshot.load_yaml(fn) == {'a': 1, 'b': [1, 2]}
+
+    # new modification time, but the contents still match the hash
+    stat = os.stat(fn)
+    os.utime(fn, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert snapshot.load_yaml(fn) == {'a': 1, 'b': [1, 2]}
+    monkeypatch.undo()
+
+    fn.write_text('a: 2\n')
+    assert snapshot.load_yaml(fn) == {'a': 2}
+    assert ConfigSnapshot(path).load_yaml(fn) == {'a': 2}
+
+    # a broken snapshot is ignored
+    path.write_bytes(b'garbage')
+    assert ConfigSnapshot(path).entries == {}
+
+
+def test_lazy_calibration():
+    from instamatic import config
+
+    config.load_all()
+    assert 'calibration' not in vars(config)
+    assert config.calibration.name == config.settings.calibration
+    assert 'calibration' in vars(config)
+    assert config.locations['calibration_config'].exists()
+
+    with pytest.raises(AttributeError):
+        config.does_not_exist  # noqa: B018
+
+
+def test_calibration_table():
+    from instamatic import config
+    from instamatic.config.calibration_table import CalibrationTable
+
+    table = config.calibration.table
+    assert set(table) == {'diff', 'lowmag', 'mag1'}
+    assert table['mag1'].pixelsize(2500) == 11.54651
+    assert list(table['mag1'].mags) == config.microscope.ranges['mag1']
+    np.testing.assert_array_equal(table['mag1'].stagematrix(2500), np.eye(2))
+
+    # vectorized lookup
+    mags = [2500, 3000, 4000]
+    pixelsizes = [config.calibration['mag1']['pixelsize'][mag] for mag in mags]
+    np.testing.assert_array_equal(table['mag1'].pixelsize(mags), pixelsizes)
+    assert table['mag1'].stagematrix(mags).shape == (3, 2, 2)
+
+    # camera length 1000 is in the microscope ranges, but not calibrated
+    with pytest.raises(KeyError):
+        table['diff'].pixelsize(1000)
+    assert table['diff'].pixelsize(1000, fallback='nearest') == 0.00148
+    assert table['diff'].pixelsize(700, fallback='nearest') == 0.00148
+    assert 0.00148 < table['diff'].pixelsize(700, fallback='interpolate') < 0.00198
+    with pytest.raises(KeyError):
+        table['lowmag'].pixelsize(200, fallback='nearest')
+    with pytest.raises(KeyError):
+        table['samag']
+
+    table = CalibrationTable.from_mapping(
+        {
+            'mag1': {
+                'stagematrix': {1000: [2, 0, 0, 2], 4000: [0.5, 0, 0, 0.5]},
+                'rot90': {1000: 3},
+            }
+        }
+    )
+    np.testing.assert_allclose(
+        table['mag1'].stagematrix(2000, fallback='interpolate'), np.eye(2)
+    )
+    assert table['mag1'].rot90(1000) == 3
+    assert table['mag1'].rot90(4000) == 0
+    assert table['mag1'].rot90(5000) == 0
@@ -1,5 +1,8 @@
 from __future__ import annotations
 
+import logging
+import time
+
 import numpy as np
 import pytest
 
@@ -236,6 +239,153 @@ def test_align_to(ctrl):
     assert pos != ctrl.stage.xy
 
 
+def test_state_mirror(ctrl):
+    from instamatic.microscope.mirror import StateMirror
+
+    tem = StateMirror(ctrl.tem)
+    tem.setFunctionMode('mag1')
+
+    mag = tem.getMagnification()
+    assert tem.getMagnification() == mag
+    assert tem.hits == 1
+
+    # setters issued through the mirror invalidate the cached value
+    tem.setMagnificationIndex(0)
+    assert tem.getMagnification() == ctrl.tem.getMagnification()
+
+    changes = []
+    tem.subscribe(lambda name, value: changes.append((name, value)))
+
+    # changes made behind the mirror are picked up by polling
+    ctrl.tem.setSpotSize(1)
+    assert tem.getSpotSize() == 1
+    ctrl.tem.setSpotSize(2)
+    assert tem.getSpotSize() == 1
+    tem.poll(['getSpotSize'])
+    assert tem.getSpotSize() == 2
+    assert ('getSpotSize', 2) in changes
+
+    # non-cached attributes are passed through
+    assert tem.getStagePosition() == ctrl.tem.getStagePosition()
+
+
+def test_async_controller(ctrl):
+    import asyncio
+
+    from instamatic.async_controller import AsyncTEMController
+
+    async def main(actrl):
+        ret = await asyncio.gather(
+            actrl.stage.set(x=1000, y=-1000, a=5.0),
+            actrl.beamshift.set(x=100, y=200),
+            actrl.get_image(exposure=0.01),
+        )
+        assert await actrl.stage.get() == ctrl.stage.get()
+        assert await actrl.beamshift.get() == (100, 200)
+        return ret
+
+    with pytest.raises(AttributeError):
+        AsyncTEMController(ctrl).stage.xy
+
+    actrl = AsyncTEMController(ctrl)
+    _, _, (img, h) = asyncio.run(main(actrl))
+    actrl.close()
+
+    assert ctrl.stage.xy == (1000, -1000)
+    assert ctrl.stage.a == 5.0
+    assert img.shape == h['ImageResolution']
+    assert 'BeamShift' in h
+
+
+def test_wait_for_stage(caplog):
+    from instamatic.microscope.utils import (
+        SettleProfile,
+        StagePositionTuple,
+        get_settle_profiles,
+        wait_for_stage,
+    )
+
+    # stage reports it stopped, but x keeps creeping for a few readings
+    xs = iter([0, 100, 150, 160, 162, 163, 163, 163, 163])
+    positions = []
+
+    def get_position():
+        positions.append(StagePositionTuple(next(xs, 163), 0, 0, 0.0, 0.0))
+        return positions[-1]
+
+    profiles = {'x': SettleProfile(tolerance=2, n_stable=3)}
+    wait_for_stage(lambda: False, get_position, profiles, interval=0.001)
+    assert positions[-1].x == 163
+    assert len(positions) == 6
+
+    # encoder noise, the position never settles within the timeout
+    noisy = iter(range(0, 10_000, 50))
+    profiles = {'x': SettleProfile(tolerance=2, timeout=0.05)}
+    with caplog.at_level(logging.WARNING):
+        wait_for_stage(
+            lambda: False,
+            lambda: StagePositionTuple(next(noisy), 0, 0, 0.0, 0.0),
+            profiles,
+            interval=0.001,
+        )
+    assert 'did not settle' in caplog.text
+
+    # without a position readout, wait the full start timeout
+    assert wait_for_stage(lambda: False, start_timeout=0.1) >= 0.1
+
+    profiles = get_settle_profiles({'x': {'tolerance': 5}})
+    assert profiles['x'].tolerance == 5
+    assert profiles['y'] == SettleProfile(tolerance=20)
+
+
+def test_stage_wait_settled(ctrl):
+    stage = ctrl.stage
+    stage.set(x=0, y=0)
+
+    stage.set(x=50_000, y=-50_000, wait=False)
+    assert stage.wait_settled('xy') < 1.0
+    assert stage.xy == (50_000, -50_000)
+    assert not stage.is_moving()
+
+
+def test_rotation_monitor(ctrl, monkeypatch):
+    from instamatic.microscope.rotation_monitor import RotationMonitor
+
+    stage = ctrl.stage
+    stage.a = 0.0
+    # rotate at a finite speed, the test configuration moves the stage instantly
+    monkeypatch.setitem(stage._tem._stage_dict['a'], 'speed', 20.0)
+
+    events = []
+    monitor = RotationMonitor(stage, interval=0.01, target=5.0, tolerance=0.1, stall_time=0.2)
+    monitor.subscribe(lambda event, t, a: events.append(event))
+
+    with monitor:
+        t0 = time.perf_counter()
+        stage.set(a=5.0, wait=False)
+        assert monitor.wait_for_start(timeout=2) > 0.2
+        assert monitor.wait_for_target(timeout=2)
+        t1 = time.perf_counter()
+
+    assert events == ['started', 'target_reached']
+    assert not monitor.stalled.is_set()
+    times, angles = monitor.samples
+    assert np.all(np.diff(times) > 0)
+
+    frame_angles = monitor.angle_at(np.linspace(t0, t1, 10))
+    assert np.all(np.diff(frame_angles) >= 0)
+    assert frame_angles[0] < 0.2
+    assert frame_angles[-1] == pytest.approx(5.0, abs=0.1)
+
+    # rotation stops short of the target
+    monitor = RotationMonitor(stage, interval=0.01, target=10.0, stall_time=0.2)
+    with monitor:
+        stage.set(a=3.0, wait=False)
+        assert not monitor.wait_for_target(timeout=2)
+    assert monitor.stalled.is_set()
+    assert monitor.angle == pytest.approx(3.0)
+
+
 if __name__ == '__main__':
     test_ctrl()
 
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import time
+from types import SimpleNamespace
+
+import numpy as np
+from scipy import ndimage
+
+from instamatic.processing.drift_tracker import DriftCorrector, DriftTracker
+
+
+def make_frame(center, shape=(256, 256)):
+    """Primary beam with a halo at `center` (row, col) on a noisy background."""
+    rng = np.random.default_rng(1)
+    img = rng.poisson(20, shape).astype(float)
+    yy, xx = np.indices(shape)
+    r2 = (yy - center[0]) ** 2 + (xx - center[1]) ** 2
+    img += 5000 * np.exp(-r2 / (2 * 4**2)) + 200 * np.exp(-r2 / (2 * 30**2))
+    return ndimage.gaussian_filter(img, 1)
+
+
+class Deflector:
+    def __init__(self, x=0, y=0):
+        self.x, self.y = x, y
+
+    def get(self):
+        return self.x, self.y
+
+    def set(self, x, y):
+        self.x, self.y = x, y
+
+
+def test_drift_tracker():
+    results = []
+
+    with DriftTracker(callback=results.append, maxsize=10) as tracker:
+        for i, center in enumerate(((128, 128), (130, 127), (133, 125.5)), start=1):
+            assert tracker.submit(i, make_frame(center))
+            time.sleep(0.01)
+
+    assert [r.index for r in results] == [1, 2, 3]
+    assert tracker.results == results
+    assert results[0].drift == 0
+    np.testing.assert_allclose(results[2].shift, (-5, 2.5), atol=0.2)
+    # drifting down and to the left
+    assert results[2].velocity[0] > 0 > results[2].velocity[1]
+
+
+def test_drift_correction():
+    from instamatic.calibrate import CalibDirectBeam
+
+    # 10 deflector units per pixel, deflector x/y move the beam along columns/rows,
+    # the calibration maps the registration shift (-displacement) to the deflector
+    r = np.array([[0, 10], [10, 0]])
+    calib = CalibDirectBeam({'DiffShift': {'r': r, 't': np.array([5, 5])}})
+    ctrl = SimpleNamespace(diffshift=Deflector(32768, 32768))
+
+    corrector = DriftCorrector.from_calibration(
+        ctrl, calib=calib, gain=1.0, min_interval=0, max_step=100
+    )
+    np.testing.assert_allclose(corrector.transform, r)
+    tracker = DriftTracker(make_frame((128, 128)), corrector=corrector)
+
+    def beam_position(drift):
+        x, y = ctrl.diffshift.get()
+        return drift[0] - (y - 32768) / 10, drift[1] - (x - 32768) / 10
+
+    drift = np.array([128.0, 128.0])
+    for i in range(1, 9):
+        drift += (1.5, -2.0)
+        t = time.perf_counter()
+        estimate = tracker.estimate(i, t, make_frame(beam_position(drift)))
+        xy = ctrl.diffshift.get()
+        offset = corrector.update(estimate.shift, t, estimate=estimate)
+        # the deflector is only changed from the acquisition thread
+        assert ctrl.diffshift.get() == xy
+        assert estimate.correction is None
+        np.testing.assert_array_equal(corrector.apply(), offset)
+        if offset is not None:
+            np.testing.assert_array_equal(estimate.correction, offset)
+
+    # the beam is kept on the reference position, within the deadband
+    assert np.hypot(*(np.array(beam_position(drift)) - 128)) < 5
+    assert len(corrector.corrections) > 1
+    assert all(np.abs(offset).max() <= 100 for _, offset in corrector.corrections)
+
+    # a correction that is still queued when the tracker stops is not applied
+    assert corrector.update((20, 20), time.perf_counter()) is not None
+    tracker.start()
+    tracker.stop()
+    assert tracker.apply_correction() is None
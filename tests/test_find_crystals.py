@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from instamatic.processing import find_crystals as fc
+
+
+@pytest.fixture(scope='module')
+def image() -> np.ndarray:
+    """Bright background with a few dark crystals."""
+    rng = np.random.default_rng(seed=0)
+    img = np.full((256, 256), 200.0)
+    yy, xx = np.indices(img.shape)
+    for cy, cx, r in ((60, 60, 15), (70, 180, 25), (180, 120, 20)):
+        img[(yy - cy) ** 2 + (xx - cx) ** 2 < r**2] = 60
+    return img + rng.normal(0, 10, img.shape)
+
+
+def test_disk_is_cached():
+    assert fc._disk(5) is fc._disk(5)
+    assert not fc._disk(5).flags.writeable
+
+
+@pytest.mark.parametrize('mode', ['cg_j', 'watershed'])
+def test_segment_crystals(image, mode):
+    arr_bf, seg_bf = fc.segment_crystals(image, mode='bf')
+    arr, seg = fc.segment_crystals(image, mode=mode)
+
+    np.testing.assert_array_equal(arr, arr_bf)
+    assert (seg == seg_bf).mean() > 0.95
+    assert seg[60, 60] == seg[70, 180] == seg[180, 120] == 1
+    assert seg[130, 30] == 0
+
+
+def test_cluster_regions():
+    rng = np.random.default_rng(seed=0)
+    blobs = [(10, 10), (40, 40), (80, 20)]
+    coordinates = np.vstack([rng.normal(blob, 1.0, size=(50, 2)) for blob in blobs])
+    regions = np.array([0] * 100 + [1] * 50)
+
+    centroids, centroid_region = fc.cluster_regions(coordinates, regions, [2, 1], seed=0)
+
+    np.testing.assert_array_equal(centroid_region, [0, 0, 1])
+    np.testing.assert_allclose(sorted(map(tuple, centroids[:2])), blobs[:2], atol=1.0)
+    np.testing.assert_allclose(centroids[2], blobs[2], atol=1.0)
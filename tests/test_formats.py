@@ -91,3 +91,73 @@ def test_read(format, write_func, with_header, raises, data, header, temp_data_f
         # Check if the header we want is in the header we read
         if not all(str(v) == str(h.get(k)) for k, v in header.items()):
             raise ValueError('Header mismatch')
+
+
+@pytest.mark.parametrize('codec', ['json', 'yaml'])
+def test_header_codec(codec, data, temp_data_file):
+    from instamatic.microscope.components.deflectors import DeflectorTuple
+
+    header = {
+        'ImageExposureTime': np.float64(0.5),
+        'ImageResolution': (64, 64),
+        'BeamShift': DeflectorTuple(x=1, y=2),
+        'ImageComment': 'test',
+    }
+    out = temp_data_file + f'{codec}.tiff'
+    formats.write_tiff(out, data, header, codec=codec)
+
+    img, h = formats.read_image(out)
+
+    assert h['ImageExposureTime'] == 0.5
+    assert tuple(h['ImageResolution']) == (64, 64)
+    x, y = h['BeamShift']
+    assert (x, y) == (1, 2)
+    assert h['ImageComment'] == 'test'
+
+
+def test_header_codec_legacy():
+    import yaml
+
+    header = {'value': 123, 'string': 'test'}
+    assert formats.decode_header(yaml.dump(header)) == header
+    assert formats.decode_header(formats.encode_header(header)) == header
+    assert formats.encode_header(header).startswith('#instamatic-header: json\n')
+    # old readers only know yaml
+    assert yaml.safe_load(formats.encode_header(header)) == header
+
+
+def test_image_stack(tmp_path, header):
+    import mrcfile
+
+    from instamatic.formats.stack import LRUCache, open_stack
+
+    frames = np.arange(5 * 64 * 64, dtype=np.uint16).reshape(5, 64, 64)
+
+    for i, frame in enumerate(frames):
+        formats.write_tiff(tmp_path / f'image_{i:04d}.tiff', frame, header)
+    formats.write_hdf5(tmp_path / 'stack.h5', frames, header)
+    with mrcfile.new(tmp_path / 'stack.mrc') as mrc:
+        mrc.set_data(frames)
+
+    for path in (tmp_path / 'image_*.tiff', tmp_path / 'stack.h5', tmp_path / 'stack.mrc'):
+        with open_stack(str(path), prefetch=2) as stack:
+            assert len(stack) == 5
+            np.testing.assert_array_equal(stack[1], frames[1])
+            np.testing.assert_array_equal(stack[-1], frames[-1])
+            with pytest.raises(IndexError):
+                stack[5]
+
+            thumb = stack.thumbnail(2, size=16)
+            assert thumb.shape == (16, 16)
+            assert thumb.dtype == frames.dtype
+            assert stack.thumbnail(2, size=16) is thumb
+
+    with open_stack(str(tmp_path / 'image_*.tiff')) as stack:
+        assert stack.header(0) == header
+
+    # the size of the cache is bounded
+    cache = LRUCache(max_bytes=2 * frames[0].nbytes)
+    for i, frame in enumerate(frames):
+        cache.put(i, frame)
+    assert list(cache._data) == [3, 4]
+    assert cache.nbytes == 2 * frames[0].nbytes
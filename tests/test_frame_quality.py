@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+import numpy as np
+
+from instamatic.processing.frame_quality import FrameQualityMonitor, frame_metrics
+
+
+def make_pattern(center=(250, 260), spots=((100, 100), (400, 300), (250, 450), (300, 200))):
+    rng = np.random.default_rng(1)
+    img = rng.poisson(20, (516, 516)).astype(float)
+    yy, xx = np.indices(img.shape)
+    img += 5000 * np.exp(-((yy - center[0]) ** 2 + (xx - center[1]) ** 2) / (2 * 4**2))
+    for y, x in spots:
+        img[y - 1 : y + 2, x - 1 : x + 2] += 500
+    return img
+
+
+def test_frame_metrics():
+    img = make_pattern()
+    metrics = frame_metrics(1, img, pixelsize=0.01, reference_center=(250, 250))
+
+    assert metrics.n_spots == 4
+    np.testing.assert_allclose(metrics.beam_center, (250, 260), atol=1)
+    assert 9 < metrics.drift < 11
+    # outermost spot is ~219 px from the beam
+    assert 0.45 < metrics.resolution < 0.48
+
+
+def test_frame_quality_monitor():
+    results = []
+
+    with FrameQualityMonitor(pixelsize=0.01, callback=results.append, maxsize=10) as monitor:
+        for i, center in enumerate(((250, 260), (252, 260), (254, 260)), start=1):
+            assert monitor.submit(i, make_pattern(center=center))
+
+    assert [m.index for m in results] == [1, 2, 3]
+    assert monitor.results == results
+    assert results[0].drift == 0
+    assert 3 < results[2].drift < 5
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import time
+
+import numpy as np
+import pytest
+
+from instamatic.formats import read_image
+from instamatic.processing.ImgConversionTPX import ImgConversionTPX
+
+
+@pytest.fixture
+def img_conv():
+    buffer = []
+    for i in range(1, 7):
+        img = np.random.randint(0, 1000, size=(64, 64)).astype(np.uint16)
+        img[30:34, 30:34] = 10000
+        h = {'ImageGetTime': time.time(), 'ImageExposureTime': 0.5}
+        buffer.append((i, img, h))
+
+    return ImgConversionTPX(
+        buffer=buffer,
+        osc_angle=0.5,
+        start_angle=-30,
+        end_angle=-27,
+        rotation_axis=-2.24,
+        acquisition_time=0.6,
+        flatfield=None,
+        pixelsize=0.01,
+        physical_pixelsize=0.055,
+        wavelength=0.0251,
+    )
+
+
+@pytest.mark.parametrize('backend', ['thread', 'process'])
+def test_threadpoolwriter(img_conv, backend, tmp_path):
+    tiff_path = tmp_path / 'tiff'
+    smv_path = tmp_path / 'SMV'
+    mrc_path = tmp_path / 'RED'
+
+    img_conv.threadpoolwriter(
+        tiff_path=tiff_path,
+        smv_path=smv_path,
+        mrc_path=mrc_path,
+        workers=2,
+        backend=backend,
+    )
+
+    for i in img_conv.observed_range:
+        tiff, h = read_image(tiff_path / f'{i:05d}.tiff')
+        np.testing.assert_array_equal(tiff, img_conv.data[i])
+        assert h['ImageExposureTime'] == 0.5
+
+        smv, h = read_image(smv_path / 'data' / f'{i:05d}.img')
+        np.testing.assert_array_equal(smv, img_conv.data[i])
+
+        mrc, _ = read_image(mrc_path / f'{i:05d}.mrc')
+        np.testing.assert_array_equal(mrc, np.flipud(img_conv.data[i]))
+
+
+def test_write_nexus(img_conv, tmp_path, monkeypatch):
+    import h5py
+
+    del img_conv.data[4]
+    img_conv.observed_range.discard(4)
+    img_conv.missing_range.add(4)
+
+    fn = img_conv.write_nexus(tmp_path)
+
+    with h5py.File(fn, 'r') as f:
+        assert f['entry/definition'][()] == b'NXmx'
+        data = f['entry/data/data']
+        assert data.shape == (6, 64, 64)
+        assert data.chunks == (1, 64, 64)
+        np.testing.assert_array_equal(data[0], img_conv.data[1])
+        assert not data[3].any()
+
+        omega = f['entry/sample/transformations/omega']
+        np.testing.assert_allclose(omega[:], -30 + 0.5 * np.arange(6))
+        assert omega.attrs['transformation_type'] == 'rotation'
+        assert f['entry/instrument/beam/incident_wavelength'][()] == img_conv.wavelength
+
+    xds_inp = (tmp_path / 'XDS.INP').read_text()
+    assert 'NAME_TEMPLATE_OF_DATA_FRAMES= data_??????.h5\n' in xds_inp
+    assert '!LIB=' in xds_inp
+
+    from instamatic import config
+
+    monkeypatch.setattr(config.settings, 'xds_hdf5_plugin', '/opt/durin-plugin.so')
+    img_conv.write_nexus(tmp_path)
+    assert '\nLIB= /opt/durin-plugin.so' in (tmp_path / 'XDS.INP').read_text()
+    assert 'EXCLUDE_DATA_RANGE=4 4' in xds_inp
+    assert 'dials.import data_master.h5' in (tmp_path / 'dials_variables.sh').read_text()
+
+
+def test_fit_frame_angles(img_conv, tmp_path):
+    rng = np.random.default_rng(seed=0)
+
+    # irregular frame pacing, frame 4 was skipped
+    t_start = {1: 0.0, 2: 1.1, 3: 2.0, 5: 4.3, 6: 5.0}
+    timestamps = {i: (t, t + 0.5) for i, t in t_start.items()}
+    del img_conv.data[4], img_conv.headers[4]
+
+    # rotation at 0.5 degree / second, stationary before and after
+    trace_t = np.arange(-1, 7, 0.05)
+    trace_a = -30 + 0.5 * trace_t.clip(0, 5.5) + rng.normal(0, 0.005, trace_t.shape)
+
+    img_conv.fit_frame_angles((trace_t, trace_a), timestamps=timestamps)
+
+    start, end = img_conv.get_frame_angles(list(t_start))
+    expected = -30 + 0.5 * np.array(list(t_start.values()))
+    np.testing.assert_allclose(start, expected, atol=0.01)
+    np.testing.assert_allclose(end - start, 0.25, atol=0.01)
+    assert img_conv.start_angle == pytest.approx(-30, abs=0.1)
+    assert img_conv.osc_angle == pytest.approx(0.5, abs=0.05)
+
+    fn = img_conv.write_smv(tmp_path, 2)
+    _, h = read_image(fn)
+    assert float(h['OSC_START']) == pytest.approx(-29.45, abs=0.01)
+    assert float(h['OSC_RANGE']) == pytest.approx(0.25, abs=0.01)
+
+    # missing frames fall back to the fitted constant rotation
+    start, _ = img_conv.get_frame_angles(4)
+    assert start == pytest.approx(img_conv.start_angle + 3 * img_conv.osc_angle)
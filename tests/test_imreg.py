@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+from scipy import ndimage
+
+
+def fourier_shift(img, shift):
+    freqs = np.meshgrid(*(np.fft.fftfreq(n) for n in img.shape), indexing='ij')
+    phase = np.exp(-2j * np.pi * sum(f * s for f, s in zip(freqs, shift)))
+    return np.fft.ifft2(np.fft.fft2(img) * phase).real
+
+
+@pytest.fixture
+def image():
+    rng = np.random.default_rng(0)
+    return ndimage.gaussian_filter(rng.random((128, 150)), 2)
+
+
+def test_translation(image):
+    from instamatic.imreg import translation
+
+    moving = np.roll(image, (5, -12), axis=(0, 1))
+    assert translation(image, moving) == [-5, 12]
+    assert translation(image, moving, limit_shift=True) == [-5, 12]
+
+    shift, ir = translation(image, moving, return_fft=True)
+    assert ir.shape == image.shape
+
+
+def test_registrator(image):
+    from instamatic.imreg import Registrator
+
+    shifts = [(0, 0), (3.3, -5.7), (-10.25, 7.5), (0.1, 40.8)]
+    stack = [fourier_shift(image, shift) for shift in shifts]
+
+    reg = Registrator(image, upsample_factor=20)
+    for moving, shift in zip(stack, shifts):
+        np.testing.assert_allclose(reg.register(moving), np.negative(shift), atol=0.05)
+
+    result, peaks = reg.register_stack(np.array(stack), batch_size=3, return_peak=True)
+    np.testing.assert_allclose(result, np.negative(shifts), atol=0.05)
+    assert peaks[0] == pytest.approx(1.0)
+
+    # integer shifts, the window makes the peak slightly less sharp
+    reg = Registrator(image[:, :149], window='hann', pad=True)
+    assert reg.fft_shape == (128, 150)
+    result = reg.register_stack([img[:, :149] for img in stack])
+    np.testing.assert_allclose(result, np.negative(shifts), atol=1)
+
+    with pytest.raises(ValueError):
+        reg.register(image[:100])
@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import json
+import socket
+import sys
+import threading
+import time
+
+import pytest
+
+STUB = """
+import sys, time
+from pathlib import Path
+
+time.sleep(0.2)
+if Path('FAIL').exists():
+    sys.exit(1)
+print('Unit cell: 10.0 10.0 10.0 90 90 90', Path(sys.argv[1]).name)
+"""
+
+
+def test_indexing_server(tmp_path):
+    from instamatic.server.indexing_server import DONE, FAILED, IndexingServer
+
+    stub = tmp_path / 'index.py'
+    stub.write_text(STUB)
+    command = [sys.executable, str(stub), '{path}']
+    state_file = tmp_path / 'jobs.json'
+
+    drcs = []
+    for name in ('a', 'b', 'c'):
+        drc = tmp_path / name
+        drc.mkdir()
+        drcs.append(drc)
+    (drcs[2] / 'FAIL').touch()
+
+    server = IndexingServer(command, workers=2, state_file=state_file)
+    thread = threading.Thread(target=server.serve, args=('localhost', 0), daemon=True)
+    thread.start()
+    while server.address is None:
+        time.sleep(0.01)
+
+    def request(conn, **kwargs):
+        conn.send(json.dumps(kwargs).encode())
+        return json.loads(conn.recv(4096).decode())
+
+    with socket.create_connection(server.address) as conn:
+        jobs = [request(conn, verb='submit', path=str(drc), nframes=10) for drc in drcs]
+        assert [job['id'] for job in jobs] == [1, 2, 3]
+        assert jobs[0]['info'] == {'nframes': 10}
+
+        # resubmitted paths are deduplicated
+        assert request(conn, verb='submit', path=str(drcs[0]))['id'] == 1
+
+        job = request(conn, verb='result', job=1)
+        assert job['status'] == DONE
+        assert job['result'] == 'Unit cell: 10.0 10.0 10.0 90 90 90 a'
+        assert request(conn, verb='status', path=str(drcs[1]))['id'] == 2
+        assert request(conn, verb='result', job=3)['status'] == FAILED
+        assert request(conn, verb='status', job=99) == {'error': 'No such job'}
+
+        # legacy client, bare path, waits for the result
+        conn.send(str(drcs[1]).encode())
+        assert conn.recv(2) == b'OK'
+        assert conn.recv(4096) == b'Unit cell: 10.0 10.0 10.0 90 90 90 b'
+
+        # failed jobs are rerun
+        (drcs[2] / 'FAIL').unlink()
+        assert request(conn, verb='submit', path=str(drcs[2]))['id'] == 4
+        assert request(conn, verb='result', job=4)['status'] == DONE
+
+        conn.send(b'kill')
+
+    thread.join(timeout=5)
+    assert not thread.is_alive()
+
+    # job state is persistent
+    server = IndexingServer(command, workers=1, state_file=state_file)
+    assert len(server.store.jobs) == 4
+    assert server.status(path=str(drcs[0])).status == DONE
+    assert server.submit(drcs[0]).id == 1
+    assert server.submit(drcs[0], force=True).id == 5
+    assert server.wait(5, timeout=10).status == DONE
+    server.stop()
+
+
+def test_indexing_server_stop(tmp_path):
+    from instamatic.server.indexing_server import QUEUED, IndexingServer
+
+    stub = tmp_path / 'index.py'
+    stub.write_text(STUB)
+    command = [sys.executable, str(stub), '{path}']
+
+    server = IndexingServer(command, workers=1)
+    jobs = []
+    for name in ('a', 'b'):
+        drc = tmp_path / name
+        drc.mkdir()
+        jobs.append(server.submit(drc))
+
+    errors = []
+
+    def wait():
+        try:
+            server.wait(jobs[1].id)
+        except RuntimeError as e:
+            errors.append(e)
+
+    waiting = threading.Thread(target=wait, daemon=True)
+    waiting.start()
+    server.stop()
+
+    # the queued job is cancelled, its client gets an error instead of hanging
+    waiting.join(timeout=5)
+    assert not waiting.is_alive()
+    assert len(errors) == 1
+    assert jobs[1].status == QUEUED
+    with pytest.raises(RuntimeError):
+        server.wait(jobs[1].id)
+
+
+def test_indexing_server_concurrent(tmp_path):
+    from instamatic.server.indexing_server import DONE, IndexingServer, JobStore
+
+    stub = tmp_path / 'index.py'
+    stub.write_text(STUB)
+    command = [sys.executable, str(stub), '{path}']
+    state_file = tmp_path / 'jobs.json'
+
+    server = IndexingServer(command, workers=4, state_file=state_file)
+    jobs = []
+    for i in range(8):
+        drc = tmp_path / f'data_{i}'
+        drc.mkdir()
+        jobs.append(server.submit(drc))
+
+    for job in jobs:
+        assert server.wait(job.id, timeout=30).status == DONE
+    server.stop()
+
+    # the state saved by the concurrent workers is complete
+    store = JobStore(state_file)
+    assert [job.status for job in store.jobs.values()] == [DONE] * 8
+
+    errors = []
+
+    def save():
+        for _ in range(300):
+            try:
+                store.update(store.jobs[1], status=DONE)
+            except OSError as e:
+                errors.append(e)
+
+    threads = [threading.Thread(target=save) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+    assert len(JobStore(state_file).jobs) == 8
@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+
+def test_montage_pyramid(tmp_path):
+    import tifffile
+
+    from instamatic.formats.stack import bin2
+    from instamatic.montage import InstamaticMontage
+    from instamatic.pyramid import MontagePyramid
+
+    rng = np.random.default_rng(0)
+    images = [rng.integers(0, 1000, (100, 100)).astype(np.float32) for _ in range(6)]
+    gridspec = {'gridshape': (2, 3), 'direction': 'updown', 'zigzag': True, 'flip': False}
+
+    m = InstamaticMontage(images=images, gridspec=gridspec, overlap=0.1)
+    m.calculate_montage_coords()
+    stitched = m.stitch(method='average')
+
+    pyramid = m.build_pyramid(tmp_path / 'pyramid', chunk_size=64, method='average')
+    assert pyramid.n_levels == 4
+    assert pyramid.shape() == stitched.shape
+
+    # blending per chunk gives the same result as stitching in memory
+    np.testing.assert_allclose(pyramid.read_region(0, 0, *stitched.shape), stitched, rtol=1e-5)
+    np.testing.assert_allclose(pyramid.read_region(10, 20, 30, 40), stitched[10:30, 20:40])
+
+    level1 = pyramid.read_region(0, 0, 64, 64, level=1)
+    np.testing.assert_allclose(level1, bin2(pyramid.read_region(0, 0, 128, 128)), rtol=1e-5)
+
+    overview, level = pyramid.overview(max_size=140)
+    assert level == 1
+    assert overview.shape == (95, 140)
+
+    fn = tmp_path / 'stitched.tiff'
+    m.export(fn)
+    with tifffile.TiffFile(fn) as tiff:
+        levels = tiff.series[0].levels
+        assert len(levels) == 4
+        assert levels[1].shape == (95, 140)
+        np.testing.assert_allclose(levels[0].asarray(), stitched, rtol=1e-5)
+
+    # state is persistent, and adding a tile updates the levels above
+    pyramid = MontagePyramid(tmp_path / 'pyramid')
+    assert len(pyramid.tiles) == 6
+    np.testing.assert_allclose(pyramid.chunk(1, 0, 0), level1, rtol=1e-5)
+    pyramid.add_tile(np.zeros((100, 100)), (0, 0))
+    assert pyramid.read_region(0, 0, 64, 64, level=1)[0, 0] == pytest.approx(level1[0, 0] / 2)
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 from typing import Type
 
+import numpy as np
 import pytest
 
 from instamatic.simulation.crystal import (
@@ -100,3 +101,21 @@ def test_get_lattice_cubic():
         (1, 1, 0),
         (1, 1, 1),
     ]
+
+
+def test_diffraction_pattern_mask():
+    c = CubicCrystal(10)
+    lat = c.reciprocal_space_lattice(1)
+    assert c.reciprocal_space_lattice(1) is lat
+
+    mask = c.diffraction_pattern_mask(
+        (128, 128),
+        d_min=1,
+        rotation_matrix=np.eye(3),
+        wavelength=0.02,
+        excitation_error=0.01,
+    )
+    assert mask.shape == (128, 128)
+    assert mask.dtype == bool
+    # The origin of reciprocal space is a 6x6 pixel spot in the center
+    assert mask[61:67, 61:67].all()
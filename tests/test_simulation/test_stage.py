@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import numpy as np
 import pytest
 
 from instamatic.simulation.stage import Stage
@@ -36,3 +37,41 @@ def test_tilt():
 def test_image_rotation():
     # Image rotates with focus ect.
     assert False, 'TODO'
+
+
+def test_samples_in_range():
+    s = Stage(num_crystals=1000)
+    extent = dict(x_min=-1e5, x_max=1e5, y_min=-2e5, y_max=5e4)
+    expected = [sample for sample in s.samples if sample.range_might_contain_crystal(**extent)]
+    assert s.samples_in_range(**extent) == expected
+
+
+def test_get_image_tiles():
+    s = Stage(num_crystals=1000, tile_size=16)
+    shape = (40, 50)
+    dx = 100.0
+    extent = dict(x_min=-20 * dx, x_max=29 * dx, y_min=10 * dx, y_max=49 * dx)
+
+    img = s.get_image(shape=shape, **extent)
+    assert img.shape == shape
+    n_tiles = len(s.tiles)
+    assert s.tiles.hits == 0
+
+    # Repeated frames are served from the cache
+    assert np.array_equal(s.get_image(shape=shape, **extent), img)
+    assert len(s.tiles) == n_tiles
+    assert s.tiles.hits == s.tiles.misses
+
+    # Same result as rendering the full frame at once
+    x, y = s.image_extent_to_sample_coordinates(shape=shape, **extent)
+    expected = s._render_image(x, y, **extent)
+    assert np.array_equal(img, expected)
+
+    # The cache is sized from the frame shape
+    assert s.tiles.maxsize >= 2 * n_tiles
+
+    # Small moves only render newly exposed tiles
+    misses = s.tiles.misses
+    extent = {key: value + 5 * dx for key, value in extent.items()}
+    s.get_image(shape=shape, **extent)
+    assert 0 < s.tiles.misses - misses < n_tiles
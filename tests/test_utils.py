@@ -55,3 +55,103 @@ NativeTestCase(input_value=int(1), output_type=int)
 def test_native(test_case) -> None:
     """Assert `native` always returns numpy native NativeNumber types."""
     assert isinstance(native(test_case.input_value), test_case.output_type)
+
+
+def test_radial_integrator() -> None:
+    from instamatic.utils.beamstop import (
+        RadialIntegrator,
+        get_radial_integrator,
+        radial_average,
+    )
+
+    rng = np.random.default_rng(0)
+    stack = rng.random((3, 50, 60))
+    center = (20.3, 31.7)
+
+    y, x = np.indices(stack.shape[1:])
+    r = np.sqrt((x - center[1]) ** 2 + (y - center[0]) ** 2).astype(int)
+    expected = np.bincount(r.ravel(), stack[0].ravel()) / np.bincount(r.ravel())
+
+    np.testing.assert_allclose(radial_average(stack[0], center), expected)
+    np.testing.assert_allclose(
+        radial_average(stack[0], center, as_radial_map=True), expected[r]
+    )
+    assert get_radial_integrator(stack.shape[1:], center) is get_radial_integrator(
+        stack.shape[1:], center
+    )
+
+    mask = np.zeros(stack.shape[1:], dtype=bool)
+    mask[:, :35] = True
+    integrator = RadialIntegrator(stack.shape[1:], center, mask=mask)
+    profiles = integrator(stack)
+    assert profiles.shape == (3, integrator.nbins)
+    for img, profile in zip(stack, profiles):
+        keep = ~mask.ravel()
+        rr = r.ravel()[keep]
+        with np.errstate(invalid='ignore'):
+            masked = np.bincount(
+                rr, img.ravel()[keep], minlength=integrator.nbins
+            ) / np.bincount(rr, minlength=integrator.nbins)
+        np.testing.assert_allclose(profile, masked)
+
+
+CORRECT_LP = """\
+ ***** CORRECT *****
+ UNIT_CELL_CONSTANTS=    10.10    10.20    20.30  90.000  90.000  90.000 as used by INTEGRATE
+ UNIT CELL PARAMETERS     10.000    10.000    20.000  90.000  90.000  90.000
+ SPACE GROUP NUMBER      1
+
+     a        b          ISa
+ 1.000E+00  2.000E-03    9.87
+
+ REFINED PARAMETERS
+ UNIT CELL PARAMETERS     10.123    10.234    20.345  90.000  90.000  90.000
+ SPACE GROUP NUMBER     19
+
+   WILSON LINE (using all data) : A=  -1.234 B=   3.456 CORRELATION=  0.98
+
+ RESOLUTION RANGE  I/SIGMA  CHI^2  R-FACTOR  R-FACTOR  NUMBER ACCEPTED REJECTED
+   --------------------------------------------------------------------------
+  20.000   0.900      12.3     1.0      5.0%     5.5%    1000      990      10
+
+ SUBSET OF INTENSITY DATA WITH SIGNAL/NOISE >= -3.0 AS FUNCTION OF RESOLUTION
+ RESOLUTION     NUMBER OF REFLECTIONS    COMPLETENESS R-FACTOR  R-FACTOR COMPARED I/SIGMA   R-meas  CC(1/2)  Anomal  SigAno   Nano
+   LIMIT     OBSERVED  UNIQUE  POSSIBLE     OF DATA   observed  expected                                      Corr
+
+     2.70         400     100       110       90.9%       5.0%      5.5%      400   12.50     5.8%    99.8*     0    0.000       0
+     1.35         300     200       250       80.0%      20.0%     21.0%      300    2.10    23.1%    95.0*     0    0.000       0
+     0.90         100      80       200       40.0%      90.0%     95.0%      100    0.50   104.0%    20.0     0    0.000       0
+    total         800     380       560       67.9%      10.0%     11.0%      800    6.00    11.5%    99.0*     0    0.000       0
+"""
+
+
+def test_parse_correct_lp(tmp_path):
+    from instamatic.utils.xds_parser import parse_correct_lp, parse_tree, xds_parser
+
+    fn = tmp_path / 'a' / 'CORRECT.LP'
+    fn.parent.mkdir()
+    fn.write_text(CORRECT_LP)
+
+    d = parse_correct_lp(fn)
+    assert d['cell'] == [10.123, 10.234, 20.345, 90.0, 90.0, 90.0]
+    assert d['raw_cell'] == [10.10, 10.20, 20.30, 90.0, 90.0, 90.0]
+    assert d['spgr'] == 19
+    assert d['ISa'] == 9.87
+    assert d['Boverall'] == 3.456
+    assert d['res_range'] == (20.0, 0.9)
+    assert d['total']['completeness'] == 67.9
+    assert d['outer'] == 1.35
+    assert d['outer_shell'] == (2.70, 1.35)
+    assert 0.9 not in d
+    assert [shell['dmin'] for shell in d['shells']] == [2.70, 1.35, 0.90]
+    assert xds_parser(fn).space_group == 19
+
+    (tmp_path / 'b').mkdir()
+    (tmp_path / 'b' / 'CORRECT.LP').write_text(CORRECT_LP.split(' SUBSET')[0])
+
+    df = parse_tree(tmp_path, workers=1)
+    assert list(df.fn) == [str(fn), str(tmp_path / 'b' / 'CORRECT.LP')]
+    assert df.loc[0, 'outer_dmin'] == 1.35
+    assert df.loc[0, 'cchalf'] == 99.0
+    assert df.loc[1, 'error'].startswith('No resolution shells')
+    assert df.equals(parse_tree(tmp_path, workers=2))